@@ -0,0 +1,62 @@
+# Searches the scripts of PyWright games from the command line, without starting the IDE
+# The trigram index of each game is updated first, then only the scripts that can contain the text are read
+#
+# Usage, from the folder PyWright IDE is in:
+#   python PyWrightSearch.py "text" path/to/PyWright/games/game [path/to/another/game ...]
+#                            [--regex] [--match-case] [--whole-word] [--index-folder path] [--stats]
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+from data import ProjectSearch, TrigramIndex
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Searches the scripts of PyWright games.")
+    parser.add_argument("text", help="the text to find")
+    parser.add_argument("game_folders", nargs="+", type=Path, help="the game folders to search")
+    parser.add_argument("--regex", action="store_true", help="the text is a regular expression")
+    parser.add_argument("--match-case", action="store_true")
+    parser.add_argument("--whole-word", action="store_true")
+    parser.add_argument("--index-folder", type=Path, default=None,
+                        help="where the indexes are kept, the cache folder of the IDE by default")
+    parser.add_argument("--stats", action="store_true", help="print the time taken by each game on stderr")
+    args = parser.parse_args()
+
+    try:
+        pattern = ProjectSearch.compile_search_pattern(args.text, args.match_case, args.whole_word, args.regex)
+    except re.error as e:
+        print("Invalid regular expression: {}".format(e), file=sys.stderr)
+        return 2
+
+    match_count = 0
+    for game_path in args.game_folders:
+        if not game_path.is_dir():
+            print("{} is not a folder".format(game_path), file=sys.stderr)
+            return 2
+
+        start_time = time.perf_counter()
+        index = TrigramIndex.get_index(game_path, args.index_folder)
+        updated_file_count = index.update()
+        index.save()
+        update_time = time.perf_counter()
+
+        candidate_paths = index.find_candidate_files(pattern)
+        for file_path in sorted(candidate_paths):
+            for match in ProjectSearch.search_file(file_path, pattern):
+                print("{}:{}:{}: {}".format(match.file_path, match.line + 1, match.column + 1, match.line_text.strip()))
+                match_count += 1
+
+        if args.stats:
+            print("{}: {} files indexed, {} updated in {:.3f} s, {} candidates searched in {:.3f} s".format(
+                      game_path, len(index.get_file_paths()), updated_file_count, update_time - start_time,
+                      len(candidate_paths), time.perf_counter() - update_time), file=sys.stderr)
+
+    # Like grep, tell whether anything was found
+    return 0 if match_count > 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# A benchmark for loading PyWright games, to compare reading the macro folders one by one and with a thread pool.
+# It generates a synthetic game (or uses an existing game folder), and can simulate the latency of a slow or network disk.
+#
+# Usage, from the folder PyWright IDE is in:
+#   python benchmarks/game_loading_benchmark.py [--game path/to/PyWright/games/game] [--cases 60] [--latency-ms 5]
+#                                               [--threads 1 8] [--repeats 3]
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data import PyWrightGame
+from data.MacroIndex import MacroIndex
+from data.PyWrightGame import PyWrightGameInfo
+
+MACRO_FILES_PER_FOLDER = 4
+MACROS_PER_FILE = 10
+
+
+def write_macro_file(file_path: Path, prefix: str):
+    lines = []
+    for number in range(MACROS_PER_FILE):
+        lines += ["macro {}_{}".format(prefix, number), "char $1 e=$2", '"{c}Some text{p 10}"', "endmacro", ""]
+    file_path.write_text("\n".join(lines), encoding="utf-8")
+
+
+def make_game(root_path: Path, case_count: int) -> Path:
+    """Generates a PyWright folder holding a single game with case_count cases, and returns the game folder."""
+    game_path = root_path / "games" / "benchmark"
+    for folder in ("art", "core/macros", "games/benchmark/art"):
+        (root_path / folder).mkdir(parents=True, exist_ok=True)
+    (root_path / "PyWright.py").write_text("")
+
+    case_names = ["case_{}".format(number) for number in range(case_count)]
+    (game_path / "data.txt").write_text("title Benchmark\nversion 1\nauthor benchmark\n")
+    (game_path / "intro.txt").write_text("set _order_cases variable\n" + "".join(
+        "set _case_{} {}\n".format(number + 1, case_name) for number, case_name in enumerate(case_names)) + "casemenu")
+
+    for number in range(MACRO_FILES_PER_FOLDER * 10):
+        write_macro_file(root_path / "core" / "macros" / "builtin_{}.mcro".format(number), "builtin_{}".format(number))
+    for number in range(MACRO_FILES_PER_FOLDER):
+        write_macro_file(game_path / "game_{}.mcro".format(number), "game_{}".format(number))
+    for case_name in case_names:
+        (game_path / case_name).mkdir()
+        (game_path / case_name / "intro.txt").write_text("script intro")
+        for number in range(MACRO_FILES_PER_FOLDER):
+            write_macro_file(game_path / case_name / "{}.mcro".format(number), "{}_{}".format(case_name, number))
+        write_macro_file(game_path / case_name / "macros.txt", "{}_txt".format(case_name))
+
+    return game_path
+
+
+def simulate_disk_latency(latency: float):
+    """Makes every macro file read wait for latency seconds first, like a network drive would."""
+    read_macros_in_file = PyWrightGameInfo._read_macros_in_file
+
+    def slow_read_macros_in_file(macro_file_name):
+        time.sleep(latency)
+        return read_macros_in_file(macro_file_name)
+
+    PyWrightGameInfo._read_macros_in_file = staticmethod(slow_read_macros_in_file)
+
+
+def benchmark_loading(game_path: Path, threads: int, repeats: int, index_folder: Path, warm: bool) -> list[float]:
+    # A fresh macro index reads every macro file, a warm one only checks that they didn't change
+    PyWrightGame.macro_index = MacroIndex(index_folder / "warm_{}.json".format(threads))
+    if warm:
+        PyWrightGameInfo.load_from_folder(game_path, threads)
+
+    timings = []
+    for repeat in range(repeats):
+        if not warm:
+            PyWrightGame.macro_index = MacroIndex(index_folder / "cold_{}_{}.json".format(threads, repeat))
+
+        start = time.perf_counter()
+        PyWrightGameInfo.load_from_folder(game_path, threads)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks loading a PyWright game with and without a thread pool.")
+    parser.add_argument("--game", type=Path, help="an existing game folder to load, instead of a generated one")
+    parser.add_argument("--cases", type=int, default=60, help="number of cases of the generated game")
+    parser.add_argument("--latency-ms", type=float, default=0, help="simulated latency of each macro file read")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8], help="thread counts to compare")
+    parser.add_argument("--repeats", type=int, default=3, help="number of loads for each thread count")
+    arguments = parser.parse_args()
+
+    if arguments.latency_ms > 0:
+        simulate_disk_latency(arguments.latency_ms / 1000)
+
+    with tempfile.TemporaryDirectory() as temporary_folder:
+        temporary_path = Path(temporary_folder)
+        game_path = arguments.game if arguments.game is not None else make_game(temporary_path / "PyWright", arguments.cases)
+        index_folder = temporary_path / "index"
+        print("Game: {} ({} cases), simulated latency: {} ms".format(game_path, len(PyWrightGameInfo._load_intro_txt(game_path)),
+                                                                    arguments.latency_ms))
+
+        for warm in (False, True):
+            print("\n{} macro index".format("Warm" if warm else "Cold"))
+            for threads in arguments.threads:
+                timings = benchmark_loading(game_path, threads, arguments.repeats, index_folder, warm)
+                print("  {:3d} threads: best {:8.1f} ms   median {:8.1f} ms".format(
+                    threads, min(timings) * 1e3, statistics.median(timings) * 1e3))
+
+
+if __name__ == '__main__':
+    main()
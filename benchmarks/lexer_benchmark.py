@@ -0,0 +1,190 @@
+# A benchmark for the PyWright script lexer, to catch regressions in syntax highlighting speed.
+# It generates synthetic scripts, then measures full styling, restyling after single line edits, and autocompletion.
+#
+# Usage, from the folder PyWright IDE is in:
+#   python benchmarks/lexer_benchmark.py [--sizes 1000 10000 100000] [--repeats 3] [--edits 200] [--seed 0]
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# Runs without any window showing up, and from any working directory
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.Qsci import QsciScintilla
+
+from data.PyWrightSymbolTable import PyWrightSymbolTable, MacroSignature
+from gui.IDEScintillaWidget import IDEScintillaWidget
+
+# Number of lines Scintilla is asked to style after an edit, about what an editor window shows
+VISIBLE_LINES = 60
+
+BUILTIN_MACRO_COUNT = 60
+GAME_MACRO_COUNT = 600
+CASE_MACRO_COUNT = 300
+
+CHARACTERS = ["phoenix", "maya", "edgeworth", "gumshoe", "judge", "franziska"]
+EMOTIONS = ["normal", "thinking", "sweating", "angry", "happy", "damage"]
+WORDS = ["objection", "hold", "it", "the", "evidence", "witness", "clearly", "says", "that", "you", "were", "there",
+         "at", "night", "é", "“really”", "defense", "prosecution", "court", "is", "now", "in", "session"]
+
+# Lines to put the cursor at the end of, to get a completion list for each context
+AUTOCOMPLETION_CONTEXTS = {
+    "command": "fa",
+    "macro call": "{ga",
+    "parameter": "bg court x",
+    "string token": '"Hold it {',
+    "string variable": '"You have {$_ev',
+}
+
+
+def make_macro_names(prefix: str, count: int) -> list[str]:
+    return ["{}_{}".format(prefix, number) for number in range(count)]
+
+
+def make_dialogue(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randrange(3, 12))]
+    # Sprinkle {} tokens in the text
+    for token in rng.sample(["{c}", "{c 900}", "{p 10}", "{$_speaking_name}", "{$evidence}", "{n}", "{sfx /sfx/thud}"],
+                            rng.randrange(0, 3)):
+        words.insert(rng.randrange(len(words) + 1), token)
+    return '"' + " ".join(words) + '"'
+
+
+def make_script(line_count: int, macros: list[str], seed: int = 0) -> str:
+    """Generates a script of line_count lines, mixing the kind of lines real cases are made of."""
+    rng = random.Random(seed)
+    lines = []
+    while len(lines) < line_count:
+        kind = rng.randrange(10)
+        character = rng.choice(CHARACTERS)
+        if kind <= 3:
+            lines.append("char {} e={} nametag=\"{}\"".format(character, rng.choice(EMOTIONS), character.title()))
+            lines.append(make_dialogue(rng))
+        elif kind == 4:
+            lines.append("is {} == {} ? label_{}".format(rng.choice(["$var", "_speaking", "$1"]), rng.randrange(100),
+                                                          rng.randrange(50)))
+            lines.append("flag seen_{}? {}".format(rng.randrange(20), rng.choice(macros)))
+        elif kind == 5:
+            lines.append("{{{} {} x={} y={}}}".format(rng.choice(macros), character, rng.randrange(256),
+                                                      rng.randrange(192)))
+        elif kind == 6:
+            lines.append("fg {} x={} y={} z={} stack fade nowait".format(character, rng.randrange(-50, 256),
+                                                                       rng.randrange(192), rng.randrange(10)))
+        elif kind == 7:
+            lines.append("# {}".format(" ".join(rng.choice(WORDS) for _ in range(6))))
+        elif kind == 8:
+            lines.append("setvar {} {}".format(rng.choice(["var", "count", "_music_loop"]), rng.uniform(0, 100)))
+            lines.append("mus {} fade".format(rng.choice(WORDS)))
+        else:
+            lines.append("label label_{}".format(rng.randrange(50)))
+            lines.append("")
+    return "\n".join(lines[:line_count]) + "\n"
+
+
+def percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def make_editor(builtin_macros: list[str], game_macros: list[str], case_macros: list[str]) -> IDEScintillaWidget:
+    symbol_table = PyWrightSymbolTable()
+    symbol_table.set_builtin_macros([MacroSignature(name) for name in builtin_macros])
+    symbol_table.set_game_macros([MacroSignature(name) for name in game_macros])
+    symbol_table.set_case_macros("case", [MacroSignature(name) for name in case_macros])
+
+    editor = IDEScintillaWidget()
+    editor.resize(800, 600)
+    editor.supply_symbols_to_lexer(symbol_table.case_view("case"))
+    return editor
+
+
+def benchmark_full_styling(editor: IDEScintillaWidget, script: str, repeats: int) -> list[float]:
+    timings = []
+    for _ in range(repeats):
+        editor.setText(script)
+        start = time.perf_counter()
+        editor.SendScintilla(QsciScintilla.SCI_COLOURISE, 0, -1)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def benchmark_edits(editor: IDEScintillaWidget, edits: int, rng: random.Random) -> list[float]:
+    """Types a character on random lines, then styles what an editor window would show from there."""
+    timings = []
+    line_count = editor.lines()
+    for _ in range(edits):
+        line = rng.randrange(line_count - 1)
+        index = rng.randrange(len(editor.text(line).encode("utf-8")))
+        position = editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line) + index
+        view_end = editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, min(line + VISIBLE_LINES, line_count - 1))
+
+        start = time.perf_counter()
+        editor.SendScintilla(QsciScintilla.SCI_INSERTTEXT, position, b"x")
+        editor.SendScintilla(QsciScintilla.SCI_COLOURISE, position, view_end + 1)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def benchmark_autocompletion(editor: IDEScintillaWidget, repeats: int) -> dict[str, list[float]]:
+    apis = editor.lexer().apis()
+    timings = {}
+    for context, text in AUTOCOMPLETION_CONTEXTS.items():
+        editor.append(text)
+        line = editor.lines() - 1
+        editor.setCursorPosition(line, len(text))
+
+        timings[context] = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            apis.updateAutoCompletionList([text.split(" ")[-1]], [])
+            timings[context].append(time.perf_counter() - start)
+        editor.append("\n")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the PyWright script lexer on synthetic scripts.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="line counts of the generated scripts")
+    parser.add_argument("--repeats", type=int, default=3, help="number of full stylings of each script")
+    parser.add_argument("--edits", type=int, default=200, help="number of single line edits on each script")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated scripts and edits")
+    arguments = parser.parse_args()
+
+    app = QApplication(sys.argv)
+
+    builtin_macros = make_macro_names("builtin", BUILTIN_MACRO_COUNT)
+    game_macros = make_macro_names("game", GAME_MACRO_COUNT)
+    case_macros = make_macro_names("case", CASE_MACRO_COUNT)
+    macros = builtin_macros + game_macros + case_macros
+
+    print("Macros: {} builtin, {} game, {} case".format(len(builtin_macros), len(game_macros), len(case_macros)))
+    for line_count in arguments.sizes:
+        script = make_script(line_count, macros, arguments.seed)
+        editor = make_editor(builtin_macros, game_macros, case_macros)
+        print("\n{} lines ({:.1f} MB)".format(line_count, len(script.encode("utf-8")) / 1e6))
+
+        full_timings = benchmark_full_styling(editor, script, arguments.repeats)
+        best = min(full_timings)
+        print("  full styling:  best {:9.1f} ms   median {:9.1f} ms   {:10.0f} lines/s".format(
+            best * 1e3, statistics.median(full_timings) * 1e3, line_count / best))
+
+        edit_timings = benchmark_edits(editor, arguments.edits, random.Random(arguments.seed))
+        print("  line edit:     median {:7.2f} ms   p95 {:7.2f} ms   max {:7.2f} ms".format(
+            statistics.median(edit_timings) * 1e3, percentile(edit_timings, 95) * 1e3, max(edit_timings) * 1e3))
+
+        for context, timings in benchmark_autocompletion(editor, 100).items():
+            print("  completion ({}): {}median {:8.1f} µs   p95 {:8.1f} µs".format(
+                context, " " * (16 - len(context)), statistics.median(timings) * 1e6, percentile(timings, 95) * 1e6))
+
+        editor.deleteLater()
+        app.processEvents()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+# A golden-output check of the PyWright script tokenizer, against the coloring rules of the lexer it replaced.
+# The previous lexer's rules are kept below as they were, and both style the same scripts byte by byte:
+# generated scripts, a CRLF script, hand-written sample lines and random edge-case lines.
+# The previous lexer styled some tokens with character lengths instead of byte lengths, which shifted every following
+# style. Lines where it did so can't be compared, they are counted apart instead of being reported as differences.
+#
+# Usage, from the folder PyWright IDE is in:
+#   python benchmarks/lexer_golden_check.py [--lines 400] [--random-lines 3000] [--seed 0] [--verbose]
+import argparse
+import os
+import random
+import re
+import sys
+
+# Runs without any window showing up, and from any working directory
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtWidgets import QApplication
+
+from data.PyWrightScriptLexer import PyWrightScriptLexer
+from data.PyWrightScriptTokenizer import is_string_number, commands, special_variables, cases, named_parameters, \
+    parameters, logic_operators
+from lexer_benchmark import make_script, make_macro_names, make_editor
+
+BUILTIN_MACRO_COUNT = 60
+GAME_MACRO_COUNT = 600
+CASE_MACRO_COUNT = 300
+
+SAMPLE_LINES = [
+    "",
+    "   ",
+    "\t\tbg court",
+    "fade",
+    "bg court fade",
+    "script intro",
+    "script intro script",
+    "char phoenix e=normal nametag=\"Phoenix Wright\"",
+    "char maya e=é x=é",
+    "fg edgeworth x=-50 y=10.5 z=2 stack nowait",
+    "is $var == 3 ? label_1",
+    "is $1 >= -2.5 AND NOT $_speaking ? label_2",
+    "flag seen_1? builtin_0",
+    "flag seen??? done",
+    "?",
+    "setvar count 1e5",
+    "setvar _music_loop 42",
+    "# A comment {with} \"quotes\"",
+    "// Another comment",
+    "\"Hold it!{c 900} {$_speaking_name} says {p 10}hi{n}\"",
+    "“Curly quotes {sfx /sfx/thud}”",
+    "\"Unclosed {brace",
+    "\"Stray } brace {}\"",
+    "{game_1}",
+    "{game_1 phoenix x=10 y=20}",
+    "{game_1 a}{game_2 b}",
+    "{game_1 \"string argument\"}",
+    "{builtin_0 é}",
+    "}",
+    "{",
+    "{}",
+    "_case_3 _case_99 _case_100",
+    "$_speaking $stack $1 $unknown",
+    "case_0 game_0 builtin_0 unknown_macro",
+    "label café_là",
+    "goto café_là",
+    "-",
+    "-3",
+    "3.",
+    ".5",
+    "nan inf",
+    "x=y=z",
+    "name=",
+]
+
+# Fragments the random edge-case lines are made of
+FRAGMENTS = ["bg", "fade", "script", "stack", "x=", "x=5", "e=é", "name=\"Maya\"", "==", "?", "??", "a?", "5?",
+             "$1", "$_speaking", "_case_1", "{", "}", "{}", "{game_1", "{game_1 a}", "{builtin_0 é x=1}",
+             "\"", "\"a {c} b", "“é", "#", "//", "é", "-1.5", "1e3", "nan", "game_2", "case_5", "builtin_3",
+             "\t", " ", "  "]
+
+
+class BaselineLexer:
+    """The coloring rules of the lexer before the tokenizer, without Qt. Styles are appended to style_buffer."""
+
+    _TOKEN_REGEX = re.compile(r"//[^\r\n]*|#[^\r\n]*|\{[^\r\n]*}|[\"“][^\r\n]*|\S+|\s+")
+    _QUESTION_MARK_REGEX = re.compile(r"\?+")
+
+    def __init__(self, builtin_macros: list[str], game_macros: list[str], case_macros: list[str]):
+        self.builtin_macros = builtin_macros
+        self.game_macros = game_macros
+        self.case_macros = case_macros
+        self.style_buffer = bytearray()
+
+    def style_range(self, text: str):
+        token_list = [(token, len(bytearray(token, "utf-8"))) for token in self._TOKEN_REGEX.findall(text)]
+
+        wasNewLine = True
+        for i, token in enumerate(token_list):
+            self._set_styling_for_token(token, wasNewLine)
+            wasNewLine = '\n' in token[0].replace('\r', '\n') or (wasNewLine and not token[0].strip())
+
+    def _add_styling(self, length: int, style: int):
+        self.style_buffer += bytes([style]) * length
+
+    def _set_styling_for_token(self, token: tuple[str, int], isFirstOfLine: bool = False):
+        if token[0].endswith("?") and len(token[0]) > 1 and not (token[0].startswith("//") or token[0].startswith("#")):
+            question_marks = self._QUESTION_MARK_REGEX.findall(token[0])
+
+            if len(question_marks[0]) == 1:
+                token_split = token[0].rsplit("?", maxsplit=1)
+                token_0_len = len(bytearray(token_split[0], "utf-8"))
+                self._set_styling_for_token((token_split[0], token_0_len))
+                self._add_styling(1, 2)
+                return
+
+        if token[0] in commands:
+            if token[0] in parameters and not isFirstOfLine:
+                self._add_styling(token[1], 3)
+                return
+            self._add_styling(token[1], 1)
+        elif token[0] in logic_operators:
+            self._add_styling(token[1], 2)
+        elif token[0] in special_variables or token[0] in cases:
+            self._add_styling(token[1], 2)
+        elif token[0].startswith("$") and (token[0][1:] in special_variables
+                                           or token[0][1:] in parameters
+                                           or token[0][1:].isdigit()):
+            self._add_styling(token[1], 2)
+        elif token[0].startswith(named_parameters):
+            param_name = token[0].split("=", maxsplit=1)
+            param_0_len = len(param_name[0]) + 1
+            self._add_styling(param_0_len, 3)
+            param_1_token = (param_name[1], len(param_name[1]))
+            self._set_styling_for_token(param_1_token)
+        elif token[0] in parameters:
+            self._add_styling(token[1], 3)
+        elif token[0].startswith("{") and "}" in token[0] and ' ' in token[0]:
+            tokens = re.findall('[^}]+}|[^}]+', token[0])
+            if (len(tokens) > 1):
+                for subtoken in tokens:
+                    self._set_styling_for_token((subtoken, len(subtoken)))
+                return
+
+            token_split = token[0].split(' ')
+            for tokenpiece in token_split:
+                if tokenpiece == token_split[0]:
+                    self._add_styling(len(token_split[0]) + 1, 3)
+                    continue
+                elif tokenpiece.endswith("}"):
+                    tokenpiece_split = tokenpiece.split("}", maxsplit=1)
+                    self._set_styling_for_token((tokenpiece_split[0], len(tokenpiece_split[0])))
+                    self._set_styling_for_token(("}", 1))
+                    break
+                self._set_styling_for_token((tokenpiece, len(tokenpiece) + 1))
+        elif token[0] == "}" or token[0].startswith("{") and token[0].endswith("}"):
+            self._add_styling(token[1], 3)
+        elif token[0].startswith("//") or token[0].startswith("#"):
+            self._add_styling(token[1], 4)
+        elif (token[0].startswith("\"") or token[0].startswith('“')):
+            self._set_styling_for_string_token(token[0])
+        elif is_string_number(token[0]):
+            self._add_styling(token[1], 6)
+        elif token[0] in self.builtin_macros:
+            self._add_styling(token[1], 7)
+        elif token[0] in self.game_macros:
+            self._add_styling(token[1], 8)
+        elif token[0] in self.case_macros:
+            self._add_styling(token[1], 8)
+        else:
+            self._add_styling(token[1], 0)
+
+    def _set_styling_for_string_token(self, text: str):
+        while len(text) > 0:
+            openPos = text.find("{", 1)
+            closePos = text.find("}", 1)
+
+            if openPos < 0:
+                nextPos = closePos
+            elif closePos < 0:
+                nextPos = openPos
+            else:
+                nextPos = min(openPos, closePos)
+
+            if openPos < 0 and closePos < 0:
+                self._add_styling(len(bytearray(text, "utf-8")), 5)
+                break
+            else:
+                token = text[:nextPos]
+                text = text[nextPos:]
+
+                if token.startswith('{') and text.startswith('}'):
+                    token = token + text[0]
+                    text = text[1:]
+                    self._add_styling(len(bytearray(token, "utf-8")), 9)
+                else:
+                    self._add_styling(len(bytearray(token, "utf-8")), 5)
+
+
+def style_with_baseline(text: str, baseline_lexer: BaselineLexer) -> bytes:
+    baseline_lexer.style_buffer = bytearray()
+    baseline_lexer.style_range(text)
+    return bytes(baseline_lexer.style_buffer)
+
+
+def style_with_lexer(text: str, lexer: PyWrightScriptLexer) -> bytes:
+    """Styles text the way the lexer does when Scintilla asks for it, the whitespace left at the end gets the default style."""
+    data = text.encode("utf-8")
+    lexer._style_buffer = bytearray()
+    lexer._style_range(data)
+    return bytes(lexer._style_buffer.ljust(len(data), b"\x00"))
+
+
+def make_random_line(rng: random.Random) -> str:
+    return "".join(rng.choice(FRAGMENTS) + rng.choice(["", " ", " "]) for _ in range(rng.randrange(1, 7)))
+
+
+def compare(name: str, text: str, baseline_lexer: BaselineLexer, lexer: PyWrightScriptLexer, verbose: bool) -> tuple[int, int]:
+    """Compares the styles of each line of text.
+    :return: The number of differing lines and the number of lines the previous lexer shifted the styles of"""
+    differences = 0
+    shifted = 0
+    for line_number, line in enumerate(text.splitlines(keepends=True)):
+        expected = style_with_baseline(line, baseline_lexer)
+        actual = style_with_lexer(line, lexer)
+        if len(expected) != len(actual):
+            shifted += 1
+            if verbose:
+                print("  {}:{}: shifted by the previous lexer: {!r}".format(name, line_number + 1, line))
+        elif expected != actual:
+            differences += 1
+            print("  {}:{}: {!r}\n    expected {}\n    actual   {}".format(
+                name, line_number + 1, line, list(expected), list(actual)))
+    return differences, shifted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checks the PyWright script tokenizer against the previous lexer.")
+    parser.add_argument("--lines", type=int, default=400, help="line count of the generated script")
+    parser.add_argument("--random-lines", type=int, default=3000, help="number of random edge-case lines")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated script and random lines")
+    parser.add_argument("--verbose", action="store_true", help="also list the lines shifted by the previous lexer")
+    arguments = parser.parse_args()
+
+    builtin_macros = make_macro_names("builtin", BUILTIN_MACRO_COUNT)
+    game_macros = make_macro_names("game", GAME_MACRO_COUNT)
+    case_macros = make_macro_names("case", CASE_MACRO_COUNT)
+    baseline_lexer = BaselineLexer(builtin_macros, game_macros, case_macros)
+    app = QApplication(sys.argv)
+    lexer = make_editor(builtin_macros, game_macros, case_macros).lexer()
+
+    script = make_script(arguments.lines, builtin_macros + game_macros + case_macros, arguments.seed)
+    rng = random.Random(arguments.seed)
+    scripts = {
+        "generated": script,
+        "generated (CRLF)": script.replace("\n", "\r\n"),
+        "samples": "\n".join(SAMPLE_LINES) + "\n",
+        "random": "\n".join(make_random_line(rng) for _ in range(arguments.random_lines)) + "\n",
+    }
+
+    total_differences = 0
+    for name, text in scripts.items():
+        differences, shifted = compare(name, text, baseline_lexer, lexer, arguments.verbose)
+        total_differences += differences
+        print("{}: {} lines, {} different, {} shifted by the previous lexer".format(
+            name, len(text.splitlines()), differences, shifted))
+
+    sys.exit(1 if total_differences else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+# Watches the asset folders of a PyWright game (art, music, sfx and movies of the cases, the game and the PyWright folder)
+# When files are added, removed or renamed in them, the remembered results of the asset resolver are forgotten.
+
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+from .AssetResolver import AssetKind, AssetResolver
+
+# Copying a batch of assets triggers many notifications in a row, so wait for them to settle
+_INVALIDATE_DELAY_MS = 500
+
+
+class AssetFolderWatcher(QObject):
+
+    # Emitted after assets were added, removed or renamed, and the asset resolver forgot its results
+    assets_changed = pyqtSignal()
+
+    def __init__(self, asset_resolver: AssetResolver, case_names: list[str], parent=None):
+        super().__init__(parent)
+
+        self._asset_resolver = asset_resolver
+        self._case_names = list(case_names)
+
+        self._file_system_watcher = QFileSystemWatcher(self)
+        self._file_system_watcher.directoryChanged.connect(self._handle_directory_changed)
+
+        self._invalidate_timer = QTimer(self)
+        self._invalidate_timer.setSingleShot(True)
+        self._invalidate_timer.setInterval(_INVALIDATE_DELAY_MS)
+        self._invalidate_timer.timeout.connect(self._invalidate)
+
+        self._watch_asset_folders()
+
+    def _get_root_folders(self) -> list[Path]:
+        """Returns the case, game and PyWright folders, each once."""
+        root_folders = []
+        for case_name in self._case_names or [""]:
+            for root_folder_path in self._asset_resolver.get_root_folders(case_name):
+                if root_folder_path not in root_folders:
+                    root_folders.append(root_folder_path)
+        return root_folders
+
+    def _watch_asset_folders(self):
+        """Watches the root folders (for asset folders being created) and every folder inside the asset folders."""
+        paths = []
+        for root_folder_path in self._get_root_folders():
+            if not root_folder_path.is_dir():
+                continue
+            paths.append(str(root_folder_path))
+            for kind in AssetKind:
+                asset_folder_path = root_folder_path / kind.folder_name
+                if asset_folder_path.is_dir():
+                    paths.append(str(asset_folder_path))
+                    paths += [str(folder_path) for folder_path in asset_folder_path.glob("**/")
+                              if folder_path != asset_folder_path]
+
+        # Folders that were just created aren't watched yet
+        watched_paths = set(self._file_system_watcher.directories())
+        new_paths = [path for path in paths if path not in watched_paths]
+        if new_paths:
+            self._file_system_watcher.addPaths(new_paths)
+
+    def _handle_directory_changed(self, path: str):
+        self._invalidate_timer.start()
+
+    def _invalidate(self):
+        self._asset_resolver.invalidate()
+        self._watch_asset_folders()
+        self.assets_changed.emit()
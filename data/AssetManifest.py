@@ -0,0 +1,121 @@
+# Lists the asset files (art, music, sfx and movies) of a case, game or PyWright folder, with their sizes
+# Folders are only listed again when their modification time changed, so refreshing a big manifest is mostly stat calls.
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+log = logging.getLogger(__name__)
+
+
+class _ListedFolder(NamedTuple):
+    modification_time: int          # In ns
+    file_sizes: dict[str, int]      # By file name
+    folder_names: tuple[str, ...]
+
+
+class AssetManifest:
+    """
+    The files of the asset folders of one root folder (a case, a game or the PyWright folder), by path from the root.
+    It is refreshed when first needed after invalidate(), which lists again only the folders that changed.
+    All the methods can be called from any thread.
+    """
+
+    def __init__(self, root_folder_path: Path | str, asset_folder_names: list[str]):
+        """
+            :param root_folder_path: Path to the case, game or PyWright folder
+            :param asset_folder_names: Names of the asset folders in it, such as "art" and "music"
+        """
+        self.root_folder_path = Path(os.path.abspath(root_folder_path))
+        self._asset_folder_names = list(asset_folder_names)
+
+        self._lock = threading.Lock()
+        self._is_stale = True
+        self._folders: dict[str, _ListedFolder] = {}      # By path from the root, such as "art/bg"
+        # Path from the root (such as "art/bg/court.png") and size of every file, by normalized path for the lookups
+        self._files: dict[str, tuple[str, int]] = {}
+
+    def invalidate(self):
+        """Marks the manifest to be refreshed, for when files were added to or removed from the asset folders."""
+        self._is_stale = True
+
+    def contains(self, relative_path: str) -> bool:
+        """Whether a file exists, given by its path from the root folder with / separators, such as "art/bg/court.png"."""
+        with self._lock:
+            self._refresh_if_stale_locked()
+            return os.path.normcase(relative_path) in self._files
+
+    def find_first(self, relative_paths: list[str]) -> str | None:
+        """Returns the first of the given paths from the root folder that is an existing file, or None."""
+        with self._lock:
+            self._refresh_if_stale_locked()
+            for relative_path in relative_paths:
+                if os.path.normcase(relative_path) in self._files:
+                    return relative_path
+        return None
+
+    def get_file_sizes(self, asset_folder_name: str = "") -> dict[str, int]:
+        """Returns the size of every asset file (or only of the given asset folder), by path from the root folder."""
+        prefix = asset_folder_name + "/" if asset_folder_name else ""
+        with self._lock:
+            self._refresh_if_stale_locked()
+            return {relative_path: size for relative_path, size in self._files.values() if relative_path.startswith(prefix)}
+
+    def _refresh_if_stale_locked(self):
+        if not self._is_stale:
+            return
+        # Cleared first, so that changes made while listing get the manifest refreshed again on the next lookup
+        self._is_stale = False
+
+        start_time = time.perf_counter()
+        listed_folder_count = 0
+        folders = {}
+        files = {}
+        pending_folders = list(self._asset_folder_names)
+        while pending_folders:
+            relative_folder_path = pending_folders.pop()
+            folder_path = self.root_folder_path / relative_folder_path
+            try:
+                modification_time = os.stat(folder_path).st_mtime_ns
+            except OSError:
+                continue
+
+            listed_folder = self._folders.get(relative_folder_path)
+            if listed_folder is None or listed_folder.modification_time != modification_time:
+                listed_folder = self._list_folder(folder_path, modification_time)
+                listed_folder_count += 1
+            folders[relative_folder_path] = listed_folder
+
+            for file_name, size in listed_folder.file_sizes.items():
+                relative_path = relative_folder_path + "/" + file_name
+                files[os.path.normcase(relative_path)] = (relative_path, size)
+            pending_folders += [relative_folder_path + "/" + folder_name for folder_name in listed_folder.folder_names]
+
+        self._folders = folders
+        self._files = files
+        if listed_folder_count:
+            log.info("Listed %d asset folders of %s in %.3f s", listed_folder_count, self.root_folder_path,
+                     time.perf_counter() - start_time)
+
+    @staticmethod
+    def _list_folder(folder_path: Path, modification_time: int) -> _ListedFolder:
+        file_sizes = {}
+        folder_names = []
+        try:
+            with os.scandir(folder_path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir():
+                            if not entry.name.startswith("."):
+                                folder_names.append(entry.name)
+                        elif entry.is_file():
+                            file_sizes[entry.name] = entry.stat().st_size
+                    except OSError:
+                        # Removed while listing
+                        continue
+        except OSError as e:
+            log.warning("Could not list %s: %s", folder_path, e)
+        return _ListedFolder(modification_time, file_sizes, tuple(folder_names))
@@ -0,0 +1,68 @@
+# An index of the assets (backgrounds, portraits, music, sounds...) every script of a PyWright game refers to
+# Scripts are read in parallel, and only the ones that changed since the previous update are read again.
+
+import os
+import re
+from pathlib import Path
+from typing import NamedTuple
+
+from .AssetResolver import AssetReference, read_asset_references, get_command_assets
+from .PyWrightScriptTokenizer import TokenType, tokenize
+from .ScriptFiles import ScriptCache
+
+_MAX_READING_THREADS = 8
+
+# Words of the scripts, split around paths and parameters, such as "court" and "happy" in "bg court" and "e=happy"
+_WORD_REGEX = re.compile(rb"[^\s\"'{}=/\\]+")
+# Tokens whose words aren't looked at, as the text of the dialogue and the comments never names an asset
+_WORDLESS_TOKEN_TYPES = frozenset((TokenType.STRING, TokenType.STRING_TOKEN, TokenType.COMMENT))
+
+
+class _ReadFile(NamedTuple):
+    references: list[AssetReference]
+    # Every word of the commands the references don't cover with and without extension, outside of the dialogue and
+    # the comments, as assets can also be named by commands like addev or gui
+    words: frozenset[bytes]
+
+
+class AssetReferenceIndex:
+    """
+    Holds the asset references of the scripts of a game, by file.
+    All the methods can be called from any thread.
+    """
+
+    def __init__(self):
+        self._scripts: ScriptCache[_ReadFile] = ScriptCache("Read the asset references of")
+
+    def update(self, file_paths: list[Path | str], open_file_data: dict[str, bytes] | None = None,
+               max_reading_threads: int = _MAX_READING_THREADS) -> dict[str, list[AssetReference]]:
+        """Reads the references of the given files again if they changed, and forgets the files that aren't given anymore.
+            :param file_paths: The scripts of the game
+            :param open_file_data: The contents of the files open in editors by absolute path, used instead of the files
+            :return: The references of each file by absolute path"""
+        read_files = self._scripts.update(file_paths, open_file_data, _read_file,
+                                          max_reading_threads=max_reading_threads)
+        return {key: read_file.references for key, read_file in read_files.items()}
+
+    def get_words(self) -> set[bytes]:
+        """Returns the words of all the scripts of the last update, see _ReadFile.words."""
+        return set().union(*(read_file.words for read_file in self._scripts.get_values().values()))
+
+    def clear(self):
+        self._scripts.clear()
+
+
+def _read_file(key: str, script: bytes) -> _ReadFile:
+    words = set()
+    line = -1
+    is_referencing_line = False
+    for token in tokenize(script):
+        # The assets of the lines of bg, char, mus... are already their references
+        if token.line != line:
+            line = token.line
+            is_referencing_line = token.type is TokenType.COMMAND and \
+                get_command_assets(token.text.decode("utf-8")) is not None
+        if not is_referencing_line and token.type not in _WORDLESS_TOKEN_TYPES:
+            words.update(_WORD_REGEX.findall(token.text))
+    words.update([os.path.splitext(word)[0] for word in words if b"." in word])
+    return _ReadFile(read_asset_references(script, key), frozenset(words))
@@ -0,0 +1,123 @@
+# Reports about the assets of a PyWright game, built from the asset references of its scripts
+
+import logging
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import NamedTuple
+
+from .AssetResolver import AssetKind, AssetReference, AssetResolver
+
+log = logging.getLogger(__name__)
+
+# Folder of the game the unused assets are moved to, keeping their path from the game folder
+QUARANTINE_FOLDER_NAME = "quarantine"
+
+# Blink and talk animations of a portrait, which are used with the portrait itself
+_PORTRAIT_VARIANT_REGEX = re.compile(r"\((?:blink|talk)\)$")
+
+
+class UnusedAsset(NamedTuple):
+    file_path: Path
+    relative_path: str                  # From the game folder, such as "case1/art/bg/court.png"
+    size: int                           # In bytes
+
+
+class MissingAsset(NamedTuple):
+    kind: AssetKind
+    name: str                           # As in AssetReference, such as "bg/court"
+    references: list[AssetReference]    # Every place referring to it, from a case where it can't be found
+
+
+def find_missing_assets(references_by_file: dict[str, list[AssetReference]],
+                        asset_resolver: AssetResolver) -> list[MissingAsset]:
+    """
+    Finds the references to assets that the engine won't find, grouped by asset.
+    :param references_by_file: The references of the scripts, from AssetReferenceIndex.update()
+    :param asset_resolver: The asset resolver of the game
+    :return: The missing assets sorted by kind and name, with their references in file and line order
+    """
+    references_by_asset: dict[tuple[AssetKind, str], list[AssetReference]] = {}
+    # Scripts refer to the same assets over and over, each one is looked up once per case
+    found_assets: dict[tuple[AssetKind, str, str], bool] = {}
+    for file_path in sorted(references_by_file):
+        if file_path.endswith(".mcro"):
+            # Looked up from the case of the script calling the macro
+            continue
+        case_name = asset_resolver.get_case_name(file_path)
+        for reference in references_by_file[file_path]:
+            key = (reference.kind, reference.name, case_name)
+            is_found = found_assets.get(key)
+            if is_found is None:
+                is_found = found_assets[key] = asset_resolver.resolve(*key) is not None
+            if not is_found:
+                references_by_asset.setdefault((reference.kind, reference.name), []).append(reference)
+
+    return [MissingAsset(kind, name, references_by_asset[kind, name])
+            for kind, name in sorted(references_by_asset, key=lambda asset: (asset[0].value, asset[1]))]
+
+
+def find_unused_assets(references_by_file: dict[str, list[AssetReference]], words: set[bytes],
+                       asset_resolver: AssetResolver, game_path: Path, case_names: list[str]) -> list[UnusedAsset]:
+    """
+    Finds the asset files of the game and case folders that no script uses.
+    A file counts as used when a reference names it, or when its name is a word of a command the references don't
+    cover (addev, gui, variables...), as assets can also be named there. The words of the dialogue, of the comments
+    and of the bg, char, mus... commands don't count, so "court" in a line of text doesn't keep bg/court.png, and
+    "e=normal" doesn't keep the normal portrait of every character. A file named like a word of another command, such
+    as a label or a variable, is still kept: some unused files are missed, so that the files these commands name are
+    never listed. Animation data and blink or talk variants go with the asset they belong to, and files replacing
+    those of the PyWright folder are always used.
+    :param references_by_file: The references of the scripts, from AssetReferenceIndex.update()
+    :param words: The words of the scripts, from AssetReferenceIndex.get_words()
+    :param asset_resolver: The asset resolver of the game
+    :param game_path: Path to the game folder
+    :param case_names: The cases of the game
+    :return: The unused files, biggest first
+    """
+    referenced_paths = {os.path.normcase(reference.kind.folder_name + "/" + reference.name)
+                        for references in references_by_file.values() for reference in references}
+    game_path = Path(game_path)
+    pywright_manifests = [asset_resolver.get_manifest(root_folder_path)
+                          for root_folder_path in asset_resolver.get_root_folders() if root_folder_path != game_path]
+
+    result = []
+    for root_folder_path in [game_path] + [game_path / case_name for case_name in case_names]:
+        for relative_path, size in asset_resolver.get_manifest(root_folder_path).get_file_sizes().items():
+            asset_path = _PORTRAIT_VARIANT_REGEX.sub("", os.path.splitext(relative_path)[0])
+            if (os.path.normcase(asset_path) in referenced_paths
+                    or os.path.normcase(relative_path) in referenced_paths
+                    or asset_path.rsplit("/", 1)[-1].encode() in words
+                    or any(manifest.contains(relative_path) for manifest in pywright_manifests)):
+                continue
+            file_path = root_folder_path / relative_path
+            result.append(UnusedAsset(file_path, file_path.relative_to(game_path).as_posix(), size))
+
+    result.sort(key=lambda unused_asset: (-unused_asset.size, unused_asset.relative_path))
+    return result
+
+
+def quarantine_assets(unused_assets: list[UnusedAsset], asset_resolver: AssetResolver, game_path: Path) -> list[str]:
+    """
+    Moves asset files to the quarantine folder of the game, where they can be taken back from if needed.
+    :param unused_assets: The files to move, from find_unused_assets()
+    :param asset_resolver: The asset resolver of the game, invalidated afterwards
+    :param game_path: Path to the game folder
+    :return: An error message for each file that couldn't be moved
+    """
+    quarantine_folder_path = Path(game_path) / QUARANTINE_FOLDER_NAME
+    errors = []
+    for unused_asset in unused_assets:
+        target_path = quarantine_folder_path / unused_asset.relative_path
+        try:
+            if target_path.exists():
+                raise FileExistsError("{} already exists".format(target_path))
+            target_path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(unused_asset.file_path, target_path)
+        except OSError as e:
+            log.warning("Could not move %s to the quarantine folder: %s", unused_asset.file_path, e)
+            errors.append("{}: {}".format(unused_asset.relative_path, e))
+
+    asset_resolver.invalidate()
+    return errors
@@ -0,0 +1,273 @@
+# Finds the files the scripts of a PyWright game refer to (backgrounds, portraits, music, sound effects...)
+# Assets are looked up like the engine does: in the folder of the case, then of the game, then of the PyWright folder,
+# trying the usual extensions when the name has none.
+
+import os
+import re
+import threading
+from enum import Enum
+from pathlib import Path
+from typing import NamedTuple
+
+from .PyWrightScriptTokenizer import TokenType, Token, tokenize
+from .AssetManifest import AssetManifest
+
+
+class AssetKind(Enum):
+    ART = "art"
+    MUSIC = "music"
+    SFX = "sfx"
+    MOVIE = "movies"
+
+    @property
+    def folder_name(self) -> str:
+        return self.value
+
+
+# Names of the kinds of assets for the user
+ASSET_KIND_NAMES = {AssetKind.ART: "Image", AssetKind.MUSIC: "Music", AssetKind.SFX: "Sound", AssetKind.MOVIE: "Movie"}
+
+# Extensions tried, in order, after the name as it is written
+ASSET_EXTENSIONS = {
+    AssetKind.ART: (".png", ".jpg", ".gif"),
+    AssetKind.MUSIC: (".ogg", ".mp3", ".wav"),
+    AssetKind.SFX: (".ogg", ".wav", ".mp3"),
+    AssetKind.MOVIE: (".mpg", ".mpeg"),
+}
+
+# Portraits can be split in a blinking and a talking animation instead of a single image
+_PORTRAIT_VARIANTS = ("", "(blink)", "(talk)")
+_DEFAULT_EMOTION = "normal"
+
+# Commands whose first parameter is an asset, with the kind and the subfolder of the asset
+_ASSET_COMMANDS = {
+    b"bg": (AssetKind.ART, "bg/"),
+    b"fg": (AssetKind.ART, "fg/"),
+    b"ev": (AssetKind.ART, "ev/"),
+    b"char": (AssetKind.ART, "port/"),
+    b"mus": (AssetKind.MUSIC, ""),
+    b"sfx": (AssetKind.SFX, ""),
+    b"movie": (AssetKind.MOVIE, ""),
+}
+# Lines starting with one of these commands, the others can only refer to assets through {sfx} in their text
+_ASSET_LINE_REGEX = re.compile(rb"[ \t]*(?:" + b"|".join(_ASSET_COMMANDS) + rb")[ \t]")
+_NAME_TOKEN_TYPES = (TokenType.TEXT, TokenType.NUMBER, TokenType.BUILTIN_MACRO, TokenType.GAME_MACRO,
+                     TokenType.CASE_MACRO)
+
+
+def get_command_assets(command: str) -> tuple[AssetKind, str] | None:
+    """Returns the kind and the subfolder of the asset a command takes as first parameter, such as (ART, "bg/") for bg."""
+    return _ASSET_COMMANDS.get(command.encode("utf-8"))
+
+
+class AssetReference(NamedTuple):
+    kind: AssetKind
+    name: str           # Path inside the folder of its kind, without extension, such as "bg/court" or "port/maya/normal"
+    command: str        # The command referring to the asset, such as "bg"
+    file_path: str
+    line: int           # Starting from 0
+    column: int         # In UTF-8 bytes from the start of the line, not characters
+    length: int         # In bytes
+
+
+def read_asset_references(script: bytes | str, file_path: str = "") -> list[AssetReference]:
+    """
+    Finds the assets a script refers to: the bg, fg, ev, char (with its e= emotion), mus, sfx and movie commands,
+    and the {sfx} commands of the text. Names made of variables are left out, as they are only known when the game runs.
+    :param script: the script text
+    :param file_path: the path of the script, stored in the references
+    :return: the references, in the order they appear in the script
+    """
+    if isinstance(script, str):
+        script = script.encode("utf-8")
+
+    references = []
+    line_start = 0
+    for line_number, line in enumerate(script.splitlines(keepends=True)):
+        # Only the few lines that can refer to assets get tokenized, which is most of the time spent
+        if _ASSET_LINE_REGEX.match(line) or b"{sfx " in line:
+            _read_line_references(line, line_number, line_start, file_path, references)
+        line_start += len(line)
+
+    return references
+
+
+def _read_line_references(line: bytes, line_number: int, line_start: int, file_path: str,
+                           references: list[AssetReference]):
+    def add(kind: AssetKind, name: bytes, command: bytes, token: Token, start: int = 0, length: int | None = None):
+        if name and b"$" not in name and b"{" not in name:
+            references.append(AssetReference(kind, name.decode("utf-8", "replace"), command.decode("utf-8"), file_path,
+                                             line_number, token.offset + start - line_start,
+                                             len(token.text) - start if length is None else length))
+
+    tokens = [token for token in tokenize(line, line=line_number, offset=line_start)
+              if token.type is not TokenType.COMMENT]
+    if not tokens:
+        return
+
+    command = tokens[0]
+    if command.type is TokenType.COMMAND and command.text in _ASSET_COMMANDS and len(tokens) > 1 \
+            and tokens[1].type in _NAME_TOKEN_TYPES:
+        kind, subfolder = _ASSET_COMMANDS[command.text]
+        name_token = tokens[1]
+        if command.text == b"char":
+            emotion_token = None
+            for previous_token, token in zip(tokens, tokens[1:]):
+                if previous_token.type is TokenType.PARAMETER and previous_token.text == b"e=" \
+                        and token.offset == previous_token.offset + len(previous_token.text):
+                    emotion_token = token
+            emotion = emotion_token.text if emotion_token is not None else _DEFAULT_EMOTION.encode("utf-8")
+            add(kind, subfolder.encode("utf-8") + name_token.text + b"/" + emotion, command.text,
+                emotion_token if emotion_token is not None else name_token)
+        else:
+            add(kind, subfolder.encode("utf-8") + name_token.text, command.text, name_token)
+
+    for token in tokens:
+        if token.type is TokenType.STRING_TOKEN and token.text.startswith(b"{sfx "):
+            name = token.text[5:-1].lstrip()
+            start = len(token.text) - 1 - len(name)
+            name = name.rstrip()
+            add(AssetKind.SFX, name, b"sfx", token, start, len(name))
+
+
+class AssetResolver:
+    """
+    Finds asset files the way the engine does, for one game.
+    Files are looked up in the asset manifest of each folder instead of the disk, and results are remembered
+    by (kind, name, case), until invalidate() is called when asset folders change.
+    All the methods can be called from any thread.
+    """
+
+    def __init__(self, game_path: Path | str = "", pywright_folder_path: Path | str = ""):
+        self._lock = threading.Lock()
+        self._game_path = Path(game_path) if str(game_path) != "" else None
+        self._pywright_folder_path = Path(pywright_folder_path) if str(pywright_folder_path) != "" else None
+        self._results: dict[tuple[AssetKind, str, str], Path | None] = {}
+        self._manifests: dict[Path, AssetManifest] = {}
+        self._case_manifests: dict[str, list[AssetManifest]] = {}   # The manifests looked in for each case, in order
+        # Changes whenever the results are forgotten, so that what was checked against the assets gets checked again
+        self.version = 0
+
+    def invalidate(self):
+        """Forgets all the results, for when files were added to or removed from the asset folders."""
+        with self._lock:
+            self._results.clear()
+            for manifest in self._manifests.values():
+                manifest.invalidate()
+            self.version += 1
+
+    def get_root_folders(self, case_name: str = "") -> list[Path]:
+        """Returns the folders assets are looked for in, in order: the case folder, the game folder, the PyWright folder."""
+        result = []
+        if self._game_path is not None:
+            if case_name:
+                result.append(self._game_path / case_name)
+            result.append(self._game_path)
+        if self._pywright_folder_path is not None:
+            result.append(self._pywright_folder_path)
+        return result
+
+    def get_asset_folders(self, kind: AssetKind, case_name: str = "") -> list[Path]:
+        """Returns the folders assets of a kind are looked for in, in order, whether they exist or not."""
+        return [get_asset_folder_path(root_folder_path, kind) for root_folder_path in self.get_root_folders(case_name)]
+
+    def resolve(self, kind: AssetKind, name: str, case_name: str = "") -> Path | None:
+        """Returns the file of an asset as the engine would load it from a script of the given case, or None.
+            :param kind: The kind of asset
+            :param name: Its path inside the folder of its kind, with or without extension, such as "bg/court"
+            :param case_name: The case of the script, or "" for the scripts of the game folder
+            :return: The path of the file"""
+        key = (kind, name, case_name)
+        with self._lock:
+            if key in self._results:
+                return self._results[key]
+            version = self.version
+
+        result = self._find(kind, name, case_name)
+        with self._lock:
+            # A result found while the assets changed may already be wrong, it is only remembered if they didn't
+            if self.version == version:
+                self._results[key] = result
+        return result
+
+    def resolve_reference(self, reference: AssetReference) -> Path | None:
+        """Returns the file of an asset a script refers to, looked up from the case of that script."""
+        return self.resolve(reference.kind, reference.name, self.get_case_name(reference.file_path))
+
+    def find_file(self, relative_path: Path | str, case_name: str = "") -> Path | None:
+        """Returns a file given by its path from the game folder (like the icon of data.txt), in the same order as assets."""
+        for root_folder_path in self.get_root_folders(case_name):
+            file_path = root_folder_path / relative_path
+            if file_path.is_file():
+                return file_path
+        return None
+
+    def get_case_name(self, file_path: Path | str) -> str:
+        """Returns the case a script belongs to, or "" if it isn't in a case folder."""
+        if self._game_path is None or not file_path:
+            return ""
+        folder_path = Path(os.path.abspath(file_path)).parent
+        return folder_path.name if folder_path.parent == Path(os.path.abspath(self._game_path)) else ""
+
+    def list_names(self, kind: AssetKind, subfolder: str = "", case_name: str = "",
+                   extensions: tuple[str, ...] | None = None) -> list[str]:
+        """Returns the names of the assets of a kind in a subfolder, without extension, as they can be written in scripts.
+        The assets of all the folders the case sees are listed, each name once.
+        When extensions are given, only the files with one of them are listed, and no folders."""
+        names = set()
+        for folder_path in self.get_asset_folders(kind, case_name):
+            try:
+                entries = list(os.scandir(folder_path / subfolder))
+            except OSError:
+                continue
+            for entry in entries:
+                stem, extension = os.path.splitext(entry.name)
+                if entry.is_dir():
+                    if extensions is None:
+                        names.add(entry.name)
+                elif extension.lower() in (ASSET_EXTENSIONS[kind] if extensions is None else extensions):
+                    names.add(stem)
+        return sorted(names)
+
+    def list_portrait_emotions(self, character_name: str, case_name: str = "",
+                               extensions: tuple[str, ...] | None = None) -> list[str]:
+        """Returns the emotions a character has portraits for, as written after e= in scripts.
+        When extensions are given, only the portraits with one of them are looked at, see list_names()."""
+        emotions = set()
+        for name in self.list_names(AssetKind.ART, "port/" + character_name, case_name, extensions):
+            for variant in _PORTRAIT_VARIANTS[1:]:
+                if name.endswith(variant):
+                    name = name[:-len(variant)]
+            emotions.add(name)
+        return sorted(emotions)
+
+    def get_manifest(self, root_folder_path: Path) -> AssetManifest:
+        """Returns the asset manifest of a case, game or PyWright folder, shared by all the lookups."""
+        with self._lock:
+            manifest = self._manifests.get(root_folder_path)
+            if manifest is None:
+                manifest = AssetManifest(root_folder_path, [kind.folder_name for kind in AssetKind])
+                self._manifests[root_folder_path] = manifest
+            return manifest
+
+    def _find(self, kind: AssetKind, name: str, case_name: str) -> Path | None:
+        relative_paths = [kind.folder_name + "/" + name + variant + extension
+                          for variant in (_PORTRAIT_VARIANTS if name.startswith("port/") else ("",))
+                          for extension in ("",) + ASSET_EXTENSIONS[kind]]
+        for manifest in self._get_case_manifests(case_name):
+            relative_path = manifest.find_first(relative_paths)
+            if relative_path is not None:
+                return manifest.root_folder_path / relative_path
+        return None
+
+    def _get_case_manifests(self, case_name: str) -> list[AssetManifest]:
+        manifests = self._case_manifests.get(case_name)
+        if manifests is None:
+            manifests = [self.get_manifest(root_folder_path) for root_folder_path in self.get_root_folders(case_name)]
+            self._case_manifests[case_name] = manifests
+        return manifests
+
+
+def get_asset_folder_path(root_folder_path: Path | str, kind: AssetKind) -> Path:
+    """Returns the folder holding the assets of a kind in a case, game or PyWright folder."""
+    return Path(root_folder_path) / kind.folder_name
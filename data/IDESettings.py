@@ -1,4 +1,6 @@
 # Mainly for storing the key names
+from pathlib import Path
+
 from PyQt6.QtCore import QSettings, QByteArray
 
 IDE_VERSION_STRING = "1.5"
@@ -218,6 +220,13 @@ def window_state_data_exists() -> bool:
     return __program_settings.value(WINDOW_STATE_KEY) is not None
 
 
+def get_cache_folder_path() -> Path:
+    """Returns the folder next to the settings, where the IDE keeps the caches it reuses between sessions."""
+    # The native settings format is the registry on Windows, so ask where the INI file would go instead
+    ini_settings = QSettings(QSettings.Format.IniFormat, QSettings.Scope.UserScope, "PyWrightIDE", "PyWrightIDE")
+    return Path(ini_settings.fileName()).parent
+
+
 def save_settings():
     __program_settings.sync()
 
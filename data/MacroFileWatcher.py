@@ -0,0 +1,97 @@
+# Watches the macro files of a PyWright game, to keep its macros up to date without reloading the game
+# Only the folders where something changed are parsed again, and thanks to the macro index,
+# only the macro files that changed in them are actually read.
+
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+from .MacroIndex import macro_index
+from .PyWrightGame import PyWrightGameInfo
+
+# Saving a file can trigger several notifications in a row, so wait for them to settle before parsing
+_REPARSE_DELAY_MS = 300
+
+
+class MacroFileWatcher(QObject):
+
+    # Emitted after the macros of the game changed, editors showing a script should repaint to use them
+    macros_changed = pyqtSignal()
+
+    def __init__(self, game_info: PyWrightGameInfo, parent=None):
+        super().__init__(parent)
+
+        self._game_info = game_info
+        self._changed_folders: set[Path] = set()
+
+        self._file_system_watcher = QFileSystemWatcher(self)
+        self._file_system_watcher.fileChanged.connect(self._handle_path_changed)
+        self._file_system_watcher.directoryChanged.connect(self._handle_path_changed)
+
+        self._reparse_timer = QTimer(self)
+        self._reparse_timer.setSingleShot(True)
+        self._reparse_timer.setInterval(_REPARSE_DELAY_MS)
+        self._reparse_timer.timeout.connect(self._reparse_changed_folders)
+
+        self._watch_macro_files()
+
+    def _get_macro_folders(self) -> list[Path]:
+        return [self._game_info.pywright_folder_path / "core" / "macros",
+                self._game_info.game_path,
+                *(self._game_info.game_path / case_name for case_name in self._game_info.game_cases)]
+
+    def _watch_macro_files(self):
+        """Watches the macro folders (for added and removed files) and the macro files in them (for edits)."""
+        paths = []
+        for folder_path in self._get_macro_folders():
+            if not folder_path.is_dir():
+                continue
+            paths.append(str(folder_path))
+            paths += [str(macro_file_path) for macro_file_path in folder_path.glob("*.mcro")]
+            if (folder_path / "macros.txt").is_file():
+                paths.append(str(folder_path / "macros.txt"))
+
+        # Files that were replaced instead of modified, or newly created, aren't watched yet
+        watched_paths = set(self._file_system_watcher.files() + self._file_system_watcher.directories())
+        new_paths = [path for path in paths if path not in watched_paths]
+        if new_paths:
+            self._file_system_watcher.addPaths(new_paths)
+
+    def _handle_path_changed(self, path: str):
+        changed_path = Path(path)
+        macro_folders = self._get_macro_folders()
+        folder_path = changed_path if changed_path in macro_folders else changed_path.parent
+        if folder_path in macro_folders:
+            self._changed_folders.add(folder_path)
+            self._reparse_timer.start()
+
+    def _reparse_changed_folders(self):
+        core_macros_path = self._game_info.pywright_folder_path / "core" / "macros"
+        symbols_version = self._game_info.symbol_table.version
+
+        for folder_path in self._changed_folders:
+            try:
+                if folder_path == core_macros_path:
+                    self._game_info.parse_builtin_macros()
+                elif folder_path == self._game_info.game_path:
+                    self._game_info.parse_game_macros()
+                else:
+                    self._game_info.parse_macros_of_case(folder_path.name)
+            except FileNotFoundError:
+                # The folder itself got removed, its macros are gone with it
+                if folder_path == core_macros_path:
+                    self._game_info.symbol_table.set_builtin_macros([])
+                elif folder_path == self._game_info.game_path:
+                    self._game_info.symbol_table.set_game_macros([])
+                else:
+                    self._game_info.symbol_table.set_case_macros(folder_path.name, [])
+            except (OSError, UnicodeDecodeError):
+                # Most likely a file still being written, it will be parsed again on its next notification
+                pass
+
+        self._changed_folders.clear()
+        macro_index.save()
+        self._watch_macro_files()
+
+        if self._game_info.symbol_table.version != symbols_version:
+            self.macros_changed.emit()
@@ -0,0 +1,86 @@
+# An index of the macros defined in each macro file, saved between sessions
+# Files that didn't change (same modification time and size) get their macros from the index instead of being read again
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable
+
+from . import IDESettings
+from .PyWrightSymbolTable import MacroSignature
+
+_INDEX_FILE_NAME = "macro_index.json"
+_INDEX_FORMAT_VERSION = 2
+
+
+class MacroIndex:
+
+    def __init__(self, index_file_path: Path):
+        self.index_file_path = index_file_path
+        # Maps the absolute path of each macro file to its [modification time in ns, size, macros]
+        # Each macro is stored as [name, line, argument count, variables, body length]
+        # Loaded from the index file the first time it's needed
+        self._entries: dict[str, list] | None = None
+        self._is_modified = False
+        self._loading_lock = threading.Lock()   # Macro folders can be read from several threads
+
+    def get_macros(self, macro_file_path: Path,
+                   parse_function: Callable[[Path], list[MacroSignature]]) -> list[MacroSignature]:
+        """Returns the macros of a file, only calling parse_function to read them if the file changed since it was indexed.
+            :param macro_file_path: Path to the macro file
+            :param parse_function: Function reading the macros of a file
+            :return: The macros of the file"""
+        file_stat = os.stat(macro_file_path)
+        key = os.path.abspath(macro_file_path)
+
+        entry = self._get_entries().get(key)
+        if entry is not None and entry[0] == file_stat.st_mtime_ns and entry[1] == file_stat.st_size:
+            return [MacroSignature(name, str(macro_file_path), line, argument_count, tuple(variables), body_length)
+                    for name, line, argument_count, variables, body_length in entry[2]]
+
+        macros = parse_function(macro_file_path)
+        self._entries[key] = [file_stat.st_mtime_ns, file_stat.st_size,
+                              [[macro.name, macro.line, macro.argument_count, list(macro.variables), macro.body_length]
+                               for macro in macros]]
+        self._is_modified = True
+        return macros
+
+    def save(self):
+        """Writes the index file, if anything changed since it was loaded. Files that don't exist anymore are dropped."""
+        if not self._is_modified:
+            return
+
+        self._entries = {key: entry for key, entry in self._entries.items() if os.path.isfile(key)}
+
+        # Write to a temporary file first, so that the index is never left half-written
+        temporary_file_path = self.index_file_path.with_suffix(".tmp")
+        try:
+            self.index_file_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temporary_file_path, "w", encoding="utf-8") as f:
+                json.dump({"version": _INDEX_FORMAT_VERSION, "files": self._entries}, f)
+            os.replace(temporary_file_path, self.index_file_path)
+            self._is_modified = False
+        except OSError:
+            # The index is only a cache, the macros will be read again next time
+            pass
+
+    def _get_entries(self) -> dict[str, list]:
+        with self._loading_lock:
+            if self._entries is None:
+                self._entries = self._load_entries()
+        return self._entries
+
+    def _load_entries(self) -> dict[str, list]:
+        try:
+            with open(self.index_file_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") == _INDEX_FORMAT_VERSION:
+                return index["files"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            # Missing or corrupted index, it will be rebuilt
+            pass
+        return {}
+
+
+macro_index = MacroIndex(IDESettings.get_cache_folder_path() / _INDEX_FILE_NAME)
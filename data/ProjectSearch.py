@@ -0,0 +1,208 @@
+# Searches text in all the scripts of a game, and optionally of the PyWright folder, on worker threads
+# Results are given file by file as soon as they are found, and the search can be cancelled at any time
+# Replacing is done in two steps: computing all the changes first, so they can be previewed, then writing them
+
+import mmap
+import os
+import re
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+from .ScriptFiles import SCRIPT_SUFFIXES
+
+# Files bigger than this are memory-mapped instead of read at once
+_MMAP_MIN_SIZE = 1024 * 1024
+_MAX_SEARCH_THREADS = 8
+
+
+class SearchMatch(NamedTuple):
+    file_path: str
+    line: int           # Starting from 0
+    column: int         # In UTF-8 bytes from the start of the line, not characters
+    length: int         # In bytes
+    line_text: str
+
+
+def compile_search_pattern(text: str, match_case: bool = False, whole_word: bool = False,
+                           regular_expression: bool = False) -> re.Pattern:
+    """Returns the pattern to give to search_file(). Scripts are searched as UTF-8 bytes,
+    so ignoring the case and finding words only work with ASCII letters, like in Scintilla.
+    Raises a re.error if text is an invalid regular expression."""
+    pattern = text.encode("utf-8") if regular_expression else re.escape(text.encode("utf-8"))
+    if whole_word:
+        pattern = rb"(?<!\w)" + pattern + rb"(?!\w)"
+    return re.compile(pattern, 0 if match_case else re.IGNORECASE)
+
+
+def list_script_files(game_path: Path, pywright_folder_path: Path | None = None,
+                      skip_games_folder: bool = False) -> list[Path]:
+    """Lists the scripts in the game folder and its subfolders.
+        :param game_path: Path to the game folder
+        :param pywright_folder_path: Path to the PyWright folder to also list the scripts of, besides its games, or None
+        :param skip_games_folder: Whether game_path is a PyWright folder whose games must not be listed
+        :return: The paths of the scripts"""
+    folder_paths = [Path(game_path)]
+    if pywright_folder_path is not None:
+        folder_paths.append(Path(pywright_folder_path))
+
+    result = []
+    for folder_path in folder_paths:
+        is_pywright_folder = skip_games_folder or folder_path != Path(game_path)
+        for current_folder, folder_names, file_names in os.walk(folder_path):
+            # The other games of the PyWright folder are not part of the search
+            if is_pywright_folder and Path(current_folder) == folder_path and "games" in folder_names:
+                folder_names.remove("games")
+            folder_names[:] = [folder_name for folder_name in folder_names if not folder_name.startswith(".")]
+            result += [Path(current_folder) / file_name for file_name in file_names
+                       if file_name.lower().endswith(SCRIPT_SUFFIXES)]
+    return result
+
+
+def search_file(file_path: Path | str, pattern: re.Pattern) -> list[SearchMatch]:
+    """Returns all the matches of a pattern in a file, or an empty list if the file can't be read."""
+    try:
+        with open(file_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size >= _MMAP_MIN_SIZE:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    return _search_data(str(file_path), data, pattern)
+            return _search_data(str(file_path), f.read(), pattern)
+    except (OSError, ValueError):
+        return []
+
+
+def _search_data(file_path: str, data: bytes | mmap.mmap, pattern: re.Pattern) -> list[SearchMatch]:
+    result = []
+    line = 0
+    line_start = 0
+    line_end = -1
+    for match in pattern.finditer(data):
+        start = match.start()
+        # Lines are only looked for when reaching a match past the previous one
+        if start > line_end:
+            line += data[line_start:start].count(b"\n")
+            line_start = data.rfind(b"\n", 0, start) + 1
+            line_end = data.find(b"\n", start)
+            if line_end < 0:
+                line_end = len(data)
+        line_text = data[line_start:line_end].rstrip(b"\r").decode("utf-8", "replace")
+        result.append(SearchMatch(file_path, line, start - line_start, match.end() - start, line_text))
+    return result
+
+
+class FileReplacement(NamedTuple):
+    file_path: str
+    old_data: bytes                     # UTF-8 encoded, like the files and Scintilla
+    new_data: bytes
+    match_ranges: list[tuple[int, int]] # Start and end byte positions of each replaced match in old_data
+
+
+def plan_replacement(file_path: Path | str, pattern: re.Pattern, replacement: str,
+                     data: bytes | None = None) -> FileReplacement | None:
+    """Computes the replacement of all the matches of a pattern in a file, without writing anything.
+        :param file_path: Path to the file
+        :param pattern: The pattern from compile_search_pattern()
+        :param replacement: The text replacing every match, taken as is
+        :param data: The contents to use instead of the file's, such as the text of its editor, or None to read the file
+        :return: The replacement, or None if there is nothing to replace or the file can't be read"""
+    if data is None:
+        try:
+            with open(file_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+    match_ranges = [match.span() for match in pattern.finditer(data)]
+    if not match_ranges:
+        return None
+
+    replacement_data = replacement.encode("utf-8")
+    new_data = pattern.sub(lambda match: replacement_data, data)
+    return FileReplacement(str(file_path), data, new_data, match_ranges)
+
+
+def plan_replacements(file_paths: list[Path], pattern: re.Pattern, replacement: str,
+                      open_file_data: dict[str, bytes], max_threads: int = _MAX_SEARCH_THREADS) -> list[FileReplacement]:
+    """Computes the replacements of all the given files at once, on a pool of threads.
+        :param open_file_data: The contents of the files open in editors by their absolute path, used instead of the files
+        :return: The replacements of the files that have matches, in the order of file_paths"""
+    def plan(file_path: Path) -> FileReplacement | None:
+        return plan_replacement(file_path, pattern, replacement, open_file_data.get(os.path.abspath(file_path)))
+
+    with ThreadPoolExecutor(max_workers=max(1, max_threads)) as executor:
+        return [file_replacement for file_replacement in executor.map(plan, file_paths) if file_replacement is not None]
+
+
+def write_replacement(file_replacement: FileReplacement):
+    """Writes a replacement to its file. The new contents are written to a temporary file which then replaces the file,
+    so the file is never left half written. Raises an OSError if the file changed since the replacement was planned."""
+    with open(file_replacement.file_path, "rb") as f:
+        if f.read() != file_replacement.old_data:
+            raise OSError("{} changed since the replacement was computed".format(file_replacement.file_path))
+
+    folder_path = os.path.dirname(os.path.abspath(file_replacement.file_path))
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=folder_path, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, "wb") as f:
+            f.write(file_replacement.new_data)
+        # Temporary files are only readable by their owner, the file keeps its own permissions
+        shutil.copymode(file_replacement.file_path, temporary_path)
+        os.replace(temporary_path, file_replacement.file_path)
+    except OSError:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+
+class ProjectSearch:
+    """
+    Searches files with a pool of worker threads. The files are listed by list_files on the search thread,
+    as listing them can mean updating the trigram index of the game.
+    on_file_matches is called with the path and the matches of each file containing the pattern, as soon as it is searched,
+    then on_finished is called with whether the search was cancelled. Both are called from a worker thread.
+    """
+
+    def __init__(self, list_files: Callable[[], list[Path]], pattern: re.Pattern,
+                 on_file_matches: Callable[[str, list[SearchMatch]], None],
+                 on_finished: Callable[[bool], None],
+                 max_search_threads: int = _MAX_SEARCH_THREADS):
+        self._list_files = list_files
+        self._pattern = pattern
+        self._on_file_matches = on_file_matches
+        self._on_finished = on_finished
+        self._max_search_threads = max_search_threads
+        self._cancelled = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self.run, name="Project search", daemon=True).start()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def run(self):
+        """Runs the search in the calling thread, until it is done or cancelled.
+        on_finished is called even if listing or searching the files fails."""
+        try:
+            file_paths = self._list_files()
+            with ThreadPoolExecutor(max_workers=max(1, self._max_search_threads)) as executor:
+                futures = [executor.submit(self._search_file, file_path) for file_path in file_paths]
+                for future in as_completed(futures):
+                    if self._cancelled.is_set():
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        break
+                    matches = future.result()
+                    if matches:
+                        self._on_file_matches(matches[0].file_path, matches)
+        finally:
+            self._on_finished(self._cancelled.is_set())
+
+    def _search_file(self, file_path: Path) -> list[SearchMatch]:
+        if self._cancelled.is_set():
+            return []
+        return search_file(file_path, self._pattern)
@@ -1,13 +1,32 @@
 # Holds the information regarding one PyWright game
 # Like its name, version, cases and such
 
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from PyQt6.QtWidgets import QMessageBox
 
 from .PyWrightCase import PyWrightCase
+from .PyWrightSymbolTable import PyWrightSymbolTable, MacroSignature
+from .PyWrightProjectIndex import PyWrightProjectIndex
+from .AssetResolver import AssetResolver
+from .AssetReferenceIndex import AssetReferenceIndex
+from .ScriptFlowGraph import ScriptFlowGraph
+from .PyWrightScriptTokenizer import variable_setting_commands
 
 from . import PyWrightFolder
+from .MacroIndex import macro_index
+
+log = logging.getLogger(__name__)
+
+# Macro folders are read in parallel, as loading a game mostly waits on the disk (especially with network drives)
+_MAX_LOADING_THREADS = 8
+
+# Variables used in a macro body, either $1, $2... for the arguments, or named ones like $x
+_MACRO_VARIABLE_REGEX = re.compile(r"\$(\w+)")
 
 
 class PyWrightGameInfo:
@@ -24,14 +43,18 @@ class PyWrightGameInfo:
         self.game_icon_path: Path = game_icon_path
         self.game_cases: list[str] = game_cases
         self.game_path: Path = game_path
-        self.builtin_macros: list[str] = []
-        self.game_macros: list[str] = []
-        self.case_macros: dict[str, list[str]] = {} # Maps case name to list of macro names
+        self.symbol_table = PyWrightSymbolTable()  # The macros, shared by all the editors of the game
+        self.project_index = PyWrightProjectIndex()  # The labels, scripts, flags... of all the scripts, built when needed
         self.pywright_folder_path: Path = Path("")
 
         if str(self.game_path) != "":
             self.pywright_folder_path = self.game_path.parent.parent
 
+        # Finds the art, music and sounds the scripts refer to, shared by everything that checks or shows assets
+        self.asset_resolver = AssetResolver(self.game_path, self.pywright_folder_path if str(self.game_path) != "" else "")
+        self.asset_references = AssetReferenceIndex()  # The assets each script refers to, built when needed
+        self.script_flow = ScriptFlowGraph()  # The scripts and labels each script jumps to, built when needed
+
     @staticmethod
     def is_valid_game_folder(folder_path: Path):
         if folder_path.parent.stem.lower() != "games":
@@ -43,7 +66,7 @@ class PyWrightGameInfo:
         return True
 
     @staticmethod
-    def load_from_folder(folder_path: Path):
+    def load_from_folder(folder_path: Path, max_loading_threads: int = _MAX_LOADING_THREADS):
         if folder_path.parent.stem.lower() != "games":
             raise FileNotFoundError("{} is not a valid PyWright game folder".format(folder_path))
 
@@ -56,9 +79,8 @@ class PyWrightGameInfo:
 
         game_info = PyWrightGameInfo(game_title, game_version, game_author, game_icon_path, game_cases, folder_path)
         game_info.check_if_cases_exist()
-        game_info.parse_builtin_macros()
-        game_info.parse_game_macros()
-        game_info.parse_case_macros()
+        game_info.parse_all_macros(max_loading_threads)
+        macro_index.save()
 
         return game_info
 
@@ -111,15 +133,11 @@ class PyWrightGameInfo:
     def get_game_data_info(game_folder_path: Path):
         game_title, game_author, game_version, game_icon_path = PyWrightGameInfo._load_data_txt(game_folder_path)
 
-        game_icon_full_path = game_folder_path / game_icon_path
-        if not game_icon_full_path.exists() or not game_icon_full_path.is_file():
-            # Try the global folder
-            pywright_path = game_folder_path.parent.parent
-            game_icon_full_path = pywright_path / game_icon_path
-
-            if not game_icon_full_path.exists() or not game_icon_full_path.is_file():
-                # Not in the global folder either, bail out
-                game_icon_full_path = ""
+        # The icon is looked up like assets, in the game folder then in the global folder
+        game_icon_full_path = ""
+        if str(game_icon_path) not in ("", "."):
+            asset_resolver = AssetResolver(game_folder_path, game_folder_path.parent.parent)
+            game_icon_full_path = asset_resolver.find_file(game_icon_path) or ""
 
         return game_title, game_author, game_version, game_icon_full_path
 
@@ -258,7 +276,7 @@ class PyWrightGameInfo:
             pass
 
     @staticmethod
-    def _parse_macros_in_folder(folder_path: Path) -> list[str]:
+    def _parse_macros_in_folder(folder_path: Path) -> list[MacroSignature]:
         """Parses all .mcro files in a given folder path"""
         if not (folder_path.exists() and folder_path.is_dir()):
             raise FileNotFoundError("Selected folder doesn't exist!")
@@ -273,41 +291,126 @@ class PyWrightGameInfo:
         return macros_list
 
     @staticmethod
-    def _parse_macros_in_file(macro_file_name: str) -> list[str]:
-        """Parse all the macros in a specified file"""
+    def _parse_macros_in_file(macro_file_name: str) -> list[MacroSignature]:
+        """Parse all the macros in a specified file, unless the macro index already knows them"""
+        return macro_index.get_macros(macro_file_name, PyWrightGameInfo._read_macros_in_file)
+
+    @staticmethod
+    def _read_macros_in_file(macro_file_name: str) -> list[MacroSignature]:
+        """Read all the macros in a specified file, along with the arguments and variables their bodies use"""
         macros_list = []
 
         with open(macro_file_name, "r", encoding="UTF-8") as f:
-            lines = f.readlines()
-
-            for line in lines:
-                if line.startswith("macro "):
-                    splitted_lines = line.split(maxsplit=1)
-                    macros_list.append(splitted_lines[1].strip("\n"))
+            lines = f.read().splitlines()
+
+        def end_macro(name: str, start_line: int, end_line: int):
+            argument_count = 0
+            used_variables = []
+            set_variables = set()
+            for body_line in lines[start_line + 1:end_line]:
+                words = body_line.split()
+                if len(words) > 1 and words[0] in variable_setting_commands:
+                    set_variables.add(words[1])
+                for variable in _MACRO_VARIABLE_REGEX.findall(body_line):
+                    if variable.isdigit():
+                        argument_count = max(argument_count, int(variable))
+                    # Variables starting with an underscore are set by the engine
+                    elif not variable.startswith("_") and variable not in used_variables:
+                        used_variables.append(variable)
+
+            variables = tuple(variable for variable in used_variables if variable not in set_variables)
+            macros_list.append(MacroSignature(name, str(macro_file_name), start_line + 1, argument_count,
+                                              variables, end_line - start_line - 1))
+
+        macro_name = None
+        macro_start_line = 0
+        for line_index, line in enumerate(lines):
+            stripped_line = line.strip()
+            if line.startswith("macro "):
+                words = line.split(maxsplit=1)
+                # A "macro" line without a name doesn't start a macro
+                if len(words) < 2:
+                    continue
+                if macro_name is not None:
+                    end_macro(macro_name, macro_start_line, line_index)
+                macro_name = words[1]
+                macro_start_line = line_index
+            elif stripped_line == "endmacro" and macro_name is not None:
+                end_macro(macro_name, macro_start_line, line_index)
+                macro_name = None
+
+        # The engine accepts a last macro without "endmacro"
+        if macro_name is not None:
+            end_macro(macro_name, macro_start_line, len(lines))
 
         return macros_list
 
-    def parse_builtin_macros(self):
-        self.builtin_macros = PyWrightGameInfo._parse_macros_in_folder(self.pywright_folder_path / "core" / "macros")
+    def _read_builtin_macros(self) -> list[MacroSignature]:
+        return PyWrightGameInfo._parse_macros_in_folder(self.pywright_folder_path / "core" / "macros")
 
-    def parse_game_macros(self):
-        self.game_macros = PyWrightGameInfo._parse_macros_in_folder(self.game_path)
+    def _read_game_macros(self) -> list[MacroSignature]:
+        game_macros = PyWrightGameInfo._parse_macros_in_folder(self.game_path)
 
         # From the source code of the engine, a file named "macros.txt" in the game folder is also parsed for macros.
         other_location: Path = self.game_path / "macros.txt"
         if other_location.exists():
-            self.game_macros += PyWrightGameInfo._parse_macros_in_file(other_location)
+            game_macros += PyWrightGameInfo._parse_macros_in_file(other_location)
 
-    def parse_case_macros(self):
-        for case_name in self.game_cases:
-            case_macros = PyWrightGameInfo._parse_macros_in_folder(self.game_path / case_name)
+        return game_macros
+
+    def _read_case_macros(self, case_name: str) -> list[MacroSignature]:
+        case_macros = PyWrightGameInfo._parse_macros_in_folder(self.game_path / case_name)
 
-            # Once again from the source code of the engine, a file named "macros.txt" in the case folder is also parsed for macros.
-            other_location: Path = self.game_path / case_name / "macros.txt"
-            if other_location.exists():
-                case_macros += PyWrightGameInfo._parse_macros_in_file(other_location)
+        # Once again from the source code of the engine, a file named "macros.txt" in the case folder is also parsed for macros.
+        other_location: Path = self.game_path / case_name / "macros.txt"
+        if other_location.exists():
+            case_macros += PyWrightGameInfo._parse_macros_in_file(other_location)
+
+        return case_macros
 
-            self.case_macros[case_name] = case_macros
+    def parse_builtin_macros(self):
+        self.symbol_table.set_builtin_macros(self._read_builtin_macros())
+
+    def parse_game_macros(self):
+        self.symbol_table.set_game_macros(self._read_game_macros())
+
+    def parse_case_macros(self):
+        for case_name in self.game_cases:
+            self.parse_macros_of_case(case_name)
+
+    def parse_macros_of_case(self, case_name: str):
+        self.symbol_table.set_case_macros(case_name, self._read_case_macros(case_name))
+
+    def parse_all_macros(self, max_loading_threads: int = _MAX_LOADING_THREADS):
+        """Parses the builtin, game and case macros, with each folder read by a thread of a pool.
+            :param max_loading_threads: Maximum number of folders read at the same time, 1 reads them one after another
+            :return: None"""
+        start_time = time.perf_counter()
+        task_times: list[float] = []
+
+        def timed(read_function, *args):
+            task_start_time = time.perf_counter()
+            result = read_function(*args)
+            task_times.append(time.perf_counter() - task_start_time)
+            return result
+
+        with ThreadPoolExecutor(max_workers=max(1, max_loading_threads)) as executor:
+            builtin_macros = executor.submit(timed, self._read_builtin_macros)
+            game_macros = executor.submit(timed, self._read_game_macros)
+            case_macros = [(case_name, executor.submit(timed, self._read_case_macros, case_name))
+                           for case_name in self.game_cases]
+
+            # Merged in the same order as parsing them one by one, so the same errors come first
+            self.symbol_table.set_builtin_macros(builtin_macros.result())
+            self.symbol_table.set_game_macros(game_macros.result())
+            for case_name, macros in case_macros:
+                self.symbol_table.set_case_macros(case_name, macros.result())
+
+        # The speedup is how much time the folders took one by one, compared to the time it really took
+        elapsed_time = time.perf_counter() - start_time
+        log.info("Parsed the macros of %d folders in %.3f s with %d threads (%.3f s of reading, %.1fx speedup)",
+                 len(task_times), elapsed_time, max_loading_threads, sum(task_times),
+                 sum(task_times) / elapsed_time if elapsed_time > 0 else 1.0)
 
     def get_game_name(self):
         return self.game_path.name
@@ -324,8 +427,8 @@ class PyWrightGameInfo:
     def clear(self):
         self.clear_data_txt_fields()
         self.clear_case_list()
-        self.builtin_macros.clear()
-        self.game_macros.clear()
+        self.symbol_table.clear()
+        self.project_index.clear()
 
 
 class CurrentPyWrightGame:
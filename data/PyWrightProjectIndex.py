@@ -0,0 +1,281 @@
+# An index of the labels, scripts, macros, flags, variables and evidence used in the scripts of one PyWright game
+# It maps every symbol to the places that define it and the places that use it, so they can be found without reading any file
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum, auto
+from pathlib import Path
+from typing import NamedTuple
+
+from .PyWrightScriptTokenizer import TokenType, Token, tokenize, variable_setting_commands
+from .ScriptFiles import SCRIPT_SUFFIXES, list_game_scripts
+
+log = logging.getLogger(__name__)
+
+_MAX_INDEXING_THREADS = 8
+
+# Named parameters whose value is a label to jump to
+_LABEL_PARAMETERS = (b"fail=", b"result=", b"label=", b"jumpto=")
+# Conditional commands, which jump to the label given as their last parameter unless they end with a ?
+_FLAG_CONDITION_COMMANDS = (b"flag", b"noflag")
+_VARIABLE_CONDITION_COMMANDS = (b"is", b"isnot", b"isempty", b"isnotempty", b"isnumber", b"is_ex")
+_VARIABLE_SETTING_COMMANDS = tuple(command.encode("utf-8") for command in variable_setting_commands)
+
+
+class SymbolKind(Enum):
+    LABEL = auto()
+    SCRIPT = auto()
+    MACRO = auto()
+    FLAG = auto()
+    VARIABLE = auto()
+    EVIDENCE = auto()
+
+
+class SymbolOccurrence(NamedTuple):
+    kind: SymbolKind
+    name: str
+    file_path: str
+    line: int               # Starting from 0
+    column: int             # In UTF-8 bytes from the start of the line, not characters
+    is_definition: bool     # Otherwise it is a use of the symbol
+
+
+class _IndexedFile(NamedTuple):
+    modification_time: int  # In ns, to never replace the symbols of a file with older ones
+    occurrences: list[SymbolOccurrence]
+
+
+def read_symbols(script: bytes | str, file_path: str = "") -> list[SymbolOccurrence]:
+    """
+    Finds all the symbols defined and used in a script.
+    :param script: the script text
+    :param file_path: the path of the script, stored in the occurrences. A .txt file defines the script of its name.
+    :return: the occurrences, in the order they appear in the script
+    """
+    if isinstance(script, str):
+        script = script.encode("utf-8")
+
+    occurrences = []
+    if file_path.endswith(".txt"):
+        occurrences.append(SymbolOccurrence(SymbolKind.SCRIPT, Path(file_path).stem, file_path, 0, 0, True))
+
+    # Columns are computed from the start offset of each line
+    line_starts = [0]
+    for line in script.splitlines(keepends=True):
+        line_starts.append(line_starts[-1] + len(line))
+
+    def add(kind: SymbolKind, token: Token, is_definition: bool = False, prefix_length: int = 0, suffix_length: int = 0):
+        name = token.text[prefix_length:len(token.text) - suffix_length]
+        if name:
+            occurrences.append(SymbolOccurrence(kind, name.decode("utf-8", "replace"), file_path, token.line,
+                                                token.offset + prefix_length - line_starts[token.line], is_definition))
+
+    line_tokens: list[Token] = []
+    for token in tokenize(script):
+        if line_tokens and token.line != line_tokens[0].line:
+            _read_line_symbols(line_tokens, add)
+            line_tokens = []
+        if token.type is not TokenType.COMMENT:
+            line_tokens.append(token)
+    if line_tokens:
+        _read_line_symbols(line_tokens, add)
+
+    return occurrences
+
+
+def _read_line_symbols(tokens: list[Token], add):
+    command = tokens[0]
+    parameters = [token for token in tokens[1:] if token.type is not TokenType.OPERATOR or token.text != b"?"]
+    is_conditional_jump = len(parameters) > 1 and tokens[-1].text != b"?"
+
+    if command.type is TokenType.TEXT and not command.text.startswith(b"$"):
+        # Lines start with a command, so anything else is a macro
+        add(SymbolKind.MACRO, command)
+    elif command.type is TokenType.COMMAND and parameters:
+        first_parameter = parameters[0]
+        if command.text == b"label":
+            add(SymbolKind.LABEL, first_parameter, is_definition=True)
+        elif command.text == b"goto":
+            add(SymbolKind.LABEL, first_parameter)
+        elif command.text in (b"script", b"include"):
+            add(SymbolKind.SCRIPT, first_parameter)
+        elif command.text == b"macro":
+            add(SymbolKind.MACRO, first_parameter, is_definition=True)
+        elif command.text == b"setflag":
+            add(SymbolKind.FLAG, first_parameter, is_definition=True)
+        elif command.text == b"delflag":
+            add(SymbolKind.FLAG, first_parameter)
+        elif command.text in _FLAG_CONDITION_COMMANDS:
+            add(SymbolKind.FLAG, first_parameter)
+            if is_conditional_jump:
+                add(SymbolKind.LABEL, parameters[-1])
+        elif command.text in _VARIABLE_SETTING_COMMANDS:
+            add(SymbolKind.VARIABLE, first_parameter, is_definition=True)
+        elif command.text in _VARIABLE_CONDITION_COMMANDS:
+            if first_parameter.type is TokenType.TEXT:
+                add(SymbolKind.VARIABLE, first_parameter)
+            # The label comes after the whole condition, so it can't follow an operator
+            if is_conditional_jump and parameters[-1].type is TokenType.TEXT \
+                    and parameters[-2].type is not TokenType.OPERATOR:
+                add(SymbolKind.LABEL, parameters[-1])
+        elif command.text == b"addev":
+            add(SymbolKind.EVIDENCE, first_parameter, is_definition=True)
+        elif command.text == b"delev":
+            add(SymbolKind.EVIDENCE, first_parameter)
+
+    for previous_token, token in zip(tokens, tokens[1:]):
+        if previous_token.type is TokenType.PARAMETER and previous_token.text in _LABEL_PARAMETERS \
+                and token.offset == previous_token.offset + len(previous_token.text):
+            add(SymbolKind.LABEL, token)
+
+    for token in tokens:
+        if token.type in (TokenType.VARIABLE, TokenType.TEXT) and token.text.startswith(b"$") \
+                and not token.text[1:].isdigit():
+            add(SymbolKind.VARIABLE, token, prefix_length=1)
+        elif token.type is TokenType.STRING_TOKEN and token.text.startswith(b"{$"):
+            add(SymbolKind.VARIABLE, token, prefix_length=2, suffix_length=1)
+        elif token.type is TokenType.MACRO_CALL and token.text.startswith(b"{"):
+            add(SymbolKind.MACRO, token, prefix_length=1, suffix_length=1 if token.text.endswith(b"}") else 0)
+
+
+class PyWrightProjectIndex:
+    """
+    Holds the symbols of every script and macro file of a game: the game folder and its case folders.
+    It is built in the background when a game is opened, then updated one file at a time when files get saved.
+    Definitions and uses are kept by symbol, so every lookup is a dictionary access.
+    All the methods can be called from any thread.
+    """
+
+    def __init__(self):
+        self.version: int = 0   # Increased on every change
+
+        self._lock = threading.Lock()
+        self._game_path: Path | None = None
+        self._files: dict[str, _IndexedFile] = {}
+        # Maps each (kind, name) symbol to the occurrences in each file
+        self._definitions: dict[tuple[SymbolKind, str], dict[str, list[SymbolOccurrence]]] = {}
+        self._references: dict[tuple[SymbolKind, str], dict[str, list[SymbolOccurrence]]] = {}
+
+    def build_in_background(self, game_path: Path, case_names: list[str]):
+        """Indexes all the files of a game in a background thread. Lookups can be done meanwhile, with partial results."""
+        threading.Thread(target=self.build, args=(game_path, case_names), name="Project indexing", daemon=True).start()
+
+    def build(self, game_path: Path, case_names: list[str], max_indexing_threads: int = _MAX_INDEXING_THREADS):
+        """Indexes all the files of a game, replacing what was indexed before."""
+        start_time = time.perf_counter()
+        with self._lock:
+            self._clear_locked()
+            self._game_path = Path(os.path.abspath(game_path))
+
+        file_paths = list_game_scripts(game_path, case_names)
+
+        with ThreadPoolExecutor(max_workers=max(1, max_indexing_threads)) as executor:
+            list(executor.map(self.update_file, file_paths))
+
+        log.info("Indexed the symbols of %d files in %.3f s", len(file_paths), time.perf_counter() - start_time)
+
+    def update_file(self, file_path: Path | str):
+        """Reads the symbols of a file again, or forgets them if the file doesn't exist anymore.
+        Files that are not scripts of the indexed game are ignored."""
+        key = os.path.abspath(file_path)
+        if Path(key).suffix not in SCRIPT_SUFFIXES or not self._is_in_game(Path(key)):
+            return
+
+        try:
+            modification_time = os.stat(key).st_mtime_ns
+            with open(key, "rb") as f:
+                script = f.read()
+        except FileNotFoundError:
+            self.remove_file(key)
+            return
+        except OSError as e:
+            log.warning("Could not index %s: %s", key, e)
+            return
+
+        indexed_file = _IndexedFile(modification_time, read_symbols(script, key))
+        with self._lock:
+            previous_file = self._files.get(key)
+            if previous_file is not None and previous_file.modification_time > modification_time:
+                return
+            self._remove_file_locked(key)
+            self._add_file_locked(key, indexed_file)
+            self.version += 1
+
+    def remove_file(self, file_path: Path | str):
+        with self._lock:
+            self._remove_file_locked(os.path.abspath(file_path))
+            self.version += 1
+
+    def clear(self):
+        with self._lock:
+            self._clear_locked()
+            self._game_path = None
+
+    def find_definitions(self, kind: SymbolKind, name: str) -> list[SymbolOccurrence]:
+        with self._lock:
+            return [occurrence for occurrences in self._definitions.get((kind, name), {}).values()
+                    for occurrence in occurrences]
+
+    def find_definition(self, kind: SymbolKind, name: str, from_file_path: Path | str = "") -> SymbolOccurrence | None:
+        """Returns the definition of a symbol the closest to the given file:
+        preferably in the same file (as labels are local to a script), then in the same folder (like scripts of a case)."""
+        definitions = self.find_definitions(kind, name)
+        if not definitions:
+            return None
+
+        from_file_path = os.path.abspath(from_file_path) if from_file_path else ""
+        from_folder_path = os.path.dirname(from_file_path)
+        for definition in definitions:
+            if definition.file_path == from_file_path:
+                return definition
+        for definition in definitions:
+            if os.path.dirname(definition.file_path) == from_folder_path:
+                return definition
+        return definitions[0]
+
+    def find_references(self, kind: SymbolKind, name: str) -> list[SymbolOccurrence]:
+        with self._lock:
+            return [occurrence for occurrences in self._references.get((kind, name), {}).values()
+                    for occurrence in occurrences]
+
+    def get_names(self, kind: SymbolKind) -> list[str]:
+        """Returns the names of the defined symbols of a kind."""
+        with self._lock:
+            return [name for symbol_kind, name in self._definitions if symbol_kind is kind]
+
+    def get_file_symbols(self, file_path: Path | str) -> list[SymbolOccurrence]:
+        with self._lock:
+            indexed_file = self._files.get(os.path.abspath(file_path))
+            return list(indexed_file.occurrences) if indexed_file is not None else []
+
+    def _is_in_game(self, file_path: Path) -> bool:
+        # Only the game folder and the case folders right inside of it
+        return self._game_path is not None and self._game_path in (file_path.parent, file_path.parent.parent)
+
+    def _add_file_locked(self, key: str, indexed_file: _IndexedFile):
+        self._files[key] = indexed_file
+        for occurrence in indexed_file.occurrences:
+            table = self._definitions if occurrence.is_definition else self._references
+            table.setdefault((occurrence.kind, occurrence.name), {}).setdefault(key, []).append(occurrence)
+
+    def _remove_file_locked(self, key: str):
+        indexed_file = self._files.pop(key, None)
+        if indexed_file is None:
+            return
+        for occurrence in indexed_file.occurrences:
+            table = self._definitions if occurrence.is_definition else self._references
+            symbol = (occurrence.kind, occurrence.name)
+            files = table.get(symbol)
+            if files is not None:
+                files.pop(key, None)
+                if not files:
+                    del table[symbol]
+
+    def _clear_locked(self):
+        self._files.clear()
+        self._definitions.clear()
+        self._references.clear()
+        self.version += 1
@@ -1,173 +1,44 @@
 # A custom lexer for PyWright scripts, mainly for syntax highlighting
 import re
+from bisect import bisect_left
+from functools import lru_cache
 
 from PyQt6.QtGui import QColor, QFont
 
 from PyQt6.Qsci import QsciLexerCustom, QsciScintilla, QsciAPIs
 
 from data import IDESettings, EditorThemes
-
-commands = [
-    # In the written order in doc.txt (with some additions):
-    # "To add various objects"
-    "emo",
-    "gui", "Back", "Button", "Wait", "Input",
-    "menu",
-    "list", "li", "showlist", "forgetlist", "forgetlistitem",
-    "present",
-    "examine", "region",
-
-    # "Various control commands"
-    "print", "include", "nt", "goto", "label", "penalty", "pause", "timer", "waitenter",
-    "mus", "sfx", "movie",
-    "exit", "endscript", "casemenu", "script", "top",
-    "cross", "endcross", "statement", "resume", "cross_restart", "clearcross",
-    "next_statement", "prev_statement",
-
-    # "Variables and flags to keep track of what happens"
-    "setflag", "delflag", "flag", "noflag", "set",
-    "setvar", "joinvar", "addvar", "subvar", "divvar", "mulvar", "absvar",
-    "random", "getvar",
-    "is", "isnot", "isempty", "isnotempty", "isnumber",
-    "exportvars", "importvars", "savegame", "loadgame", "deletegame",
-
-    # "Working with evidence"
-    "addev", "delev",
-
-    # "Special effects"
-    "draw_off", "draw_on", "scroll", "rotate",
-
-    # macros
-    "macro", "endmacro",
-
-    # data.txt fields
-    "icon", "title", "author", "version",
-
-    # "Animation file commands" (these can be added here too)
-    "horizontal", "vertical", "length", "loops", "framedelay",
-    "blinkmode", "blipsound", "framecompress",
-
-    # "Art Types"
-    "fg", "bg", "ev",
-
-    # Not mentioned in doc.txt, but somewhere else
-    "zoom", "char", "delete", "shake", "is_ex", "setvar_ex",
-
-    # Not mentioned in doc.txt but in docs/index.html
-    "filewrite", "screenshot", "bemo", "clear", "textblock", "textbox",
-    "locked_cases", "addcase", "wincase", "resetcase", "examine3d", "localmenu", "region3d",
-    "game", "controlanim", "globaldelay", "gamemenu", "getprop", "setprop", "debug",
-    "fade", "grey", "invert", "tint", 
-
-    # Misc. stuff (some might be custom macros, or stuff that wasn't in 0.9880)
-    "in", "out", "obj",
-
-    # Undocumented commands found by reading the actual source code of the PyWright engine
-    "framerate", "step", "set_ex", "showrecord", "surf3d", "mesh"
-]
-
-special_variables = [
-    # In the written order in doc.txt
-    # "Used in actual game logic"
-    "_speaking",
-
-    # "Dev controls"
-    "_debug", "_return", "_preload",
-
-    # "Things engine sets which might be useful to use in logic"
-    "_layer_invisible", "_layer_bg", "_layer_char", "_layer_fg", "_layer_textbox", "_layer_gui"
-    "_speaking_name", "_lastline", "_currentline", "_lastlabel", "_currentlabel",
-    "_statement", "_selected", "_examine_offset_x", "_examine_offset_y",
-    "_examine_click_x", "_examine_click_y",
-
-    # "Interface toggles so you can customize look or behavior of things"
-    "_default_port_fg_delay", "_default_fg_frame_delay", "_list_checked_img", "_bigbutton_img",
-    "_textbox_show_button", "_textbox_show_recordbutton", "_textbox_lines", "_textbox_wrap",
-    "_textbox_allow_skip", "_textbox_skipupdate", "_nt_image", "_examine_skipupdate", "_examine_showbars",
-    "_examine_showcursor", "_examine_use", "_examine_mousedown", "_testimony_blinker", "_cr_button",
-    "_allow_present_evidence", "_allow_present_profiles", "_allow_click_save", "_allow_saveload",
-    "_allow_click_load",
-
-    # "Present customization"
-    "_profiles_enable", "_profiles_present", "_evidence_enable", "_evidence_present",
-    "_cr_back_button", "_list_back_button", "_menu_fade_level", "_double_screen_list_fade",
-    "_flash_sound", "_shake_sound", "_music_loop",
-
-    # "Used in intro.txt in the game folder to control menu"
-    "_order_cases",
-
-    # _case_0, _case_1, case_2... etc. are handled in a separate list
-    # Misc. stuff that wasn't in the doc.txt (some might be custom macros, or stuff that wasn't in 0.9880)
-    "_list_bg_image", "_music_fade", "ev_mode_bg_logic", "_bigbutton_bg",
-    "_production", "_ev_pages", "_ev", "_version"
-]
-
-# Support up to 100 case definitions for a single game, this should be much more than enough.
-cases = ["_case_{}".format(num) for num in range(100)]
-
-# Just for that sweet, sweet startswith()
-named_parameters = ("start=", "end=", "e=", "x=", "y=", "z=", "name=", "speed=", "width=", "height=", "rwidth=", "rheight=",
-                    "graphic=", "graphichigh=", "examine=", "talk=", "present=", "move=", "fail=", "nametag=", "result=", "label=",
-                    "mag=", "frames=", "hotkey=", "jumpto=","pause=","test=", "loops=", "rotz=", "be=", "pri=", "variable=", "threat=",
-                    "delay=", "color=", "run=", "priority=", "prop=", "value=", "degrees=", "axis=", "filter=", "after=")
-
-parameters = ["stack", "nowait", "noclear", "hide", "fade", "true", "false", "noback", "sx", "sy",
-              "blink", "loop", "noloop", "b", "t", "stop", "noauto", "password", "all", "suppress", "flipx", "wait", "hold", "try_bottom",
-              "script", "last", "both"]
-
-# Following are string tokens with pattern for autocompletion
-# Notes: {c} is reset color, {c} is also allowed to have args immediatly after the c
-# {n} is a newline
-# {$variable} introduces a variable
-# others are either special commands, or macros.
-# All commands + args + description:
-# sfx            str:sound                Play a sound effect.
-# sound          str:clicksound           Change blipping sound.
-# delay          int:multiplier           Changes the delay mutliplier per character (aka relative speed), and also does {wait manual}.    
-# spd            float:speed              Change speed of dialogue. Also bypasses {_fullspeed} and {_endfullspeed}, not present in the documentation.
-# _fullspeed     (none) (automatic)       Begin instant text. Unofficially supported, internally used when returning from a macro, not present in the documentation.
-# _endfullspeed  (none) (automatic)       Restore previous speed after instant text. Unofficially supported, internally used when returning from a macro, not present in the documentation.
-# wait           str: "manual" or "auto"  Change the waiting mode to specified arguments.
-# center         (none) (preparsed)       Centers the text.
-# type           (none)                   Change blipping sound to typewriter.ogg, set delay to 2 (according to code, but 5 according to doc) and wait mode to "manual".
-# next           (none)                   Automatically goes to the next 3 lines of text.
-# e              str:emotion              Set the current character's emotion.
-# f              int:duration str:color   Flashes the screen to a specific duration & color. Both arguments are optional.
-# s              int:duration int:power   Shakes the screen. Both arguments are optional.
-# p              int:next_char            Pauses for a number of frames (game runs at 60 fps, so 1 frame is 1/60 seconds)
-# c              hex:color                Changes the color. Color can be 3 hex-digits RGB, or 6 hex-digits RRGGBB or last part of the name of a variable named "color_something", or nothing to reset the color. 
-# tbon           (none)                   Forces Testimony Blink On.
-# tboff          (none)                   Forces Testimony Blink Off.
-# n              (none) (preparsed)       New line character.
-# $variable      (none)                   Value of variable.
-string_tokens = ["{sfx /%path/to/sound%}", "{sound %blipping sound%}", "{delay %delay:int%}", "{spd %speed:float%}", "{_fullspeed}", "{_endfullspeed}",
-                 "{wait manual}", "{wait auto}", "{center}", "{type}", "{next}", "{e %emotion%}", "{f %frames:int% %color%}",
-                 "{s %frames% %power%}", "{p %frame%}", "{c}", "{c %color%}", "{tbon}", "{tboff}", "{n}", "{$"]
-
-# Logical operators
-logic_operators = ["==", "<=", ">=", "<", ">", "NOT", "AND", "OR"]
-
-# Compiled regular expressions
-# This regex also includes whitespace characters, due to how Scintilla's styling system works
-# It only cares about the "word length" and the style it is gonna use.
-_TOKEN_REGEX = re.compile(r"//[^\r\n]*|#[^\r\n]*|\{[^\r\n]*}|[\"“][^\r\n]*|\S+|\s+")
-
-# This regex finds all the ? characters in a given string
-_QUESTION_MARK_REGEX = re.compile(r"\?+")
-
-def is_string_number(string: str) -> bool:
-    if string.startswith("-"):
-        return is_string_number(string[1:])
-
-    return string.isnumeric() or is_string_float(string)
-
-
-def is_string_float(string: str) -> bool:
-    try:
-        float(string)
-        return True
-    except ValueError:
-        return False
+from data.PyWrightSymbolTable import PyWrightCaseSymbols, MacroSignature
+from data.AssetResolver import AssetKind, AssetResolver, get_command_assets
+from data.PyWrightScriptTokenizer import (TokenType, KEYWORD_TYPES, tokenize, commands,
+                                          special_variables, named_parameters, parameters, string_tokens,
+                                          logic_operators)
+
+# Style of each type of token
+_TOKEN_TYPE_STYLES = {
+    TokenType.TEXT: 0,
+    TokenType.COMMAND: 1,
+    TokenType.VARIABLE: 2,
+    TokenType.OPERATOR: 2,
+    TokenType.PARAMETER: 3,
+    TokenType.MACRO_CALL: 3,
+    TokenType.COMMENT: 4,
+    TokenType.STRING: 5,
+    TokenType.NUMBER: 6,
+    TokenType.BUILTIN_MACRO: 7,
+    TokenType.GAME_MACRO: 8,
+    TokenType.CASE_MACRO: 8,    # Question: do we do separate styles for case and game macros?
+    TokenType.STRING_TOKEN: 9,
+}
+
+# One byte per style, to build style buffers quickly
+_STYLE_BYTES = [bytes([style]) for style in range(10)]
+
+# Sorted completions of the contexts that don't depend on macros, to only return the ones starting with what is typed
+_PARAMETER_COMPLETIONS = sorted({*["$" + variable for variable in special_variables], *named_parameters,
+                                 *parameters, *logic_operators})
+_STRING_TOKEN_COMPLETIONS = sorted(string_tokens)
+_STRING_VARIABLE_COMPLETIONS = sorted("{$" + variable + "}" for variable in special_variables)
 
 
 class CustomQsciAPIs(QsciAPIs):
@@ -179,6 +50,10 @@ class CustomQsciAPIs(QsciAPIs):
         self._has_just_inserted = 0                 # counter for _after_completion_is_applied()
         self._completion_selected :str|None = None  # Either the text to insert or None if no such text
 
+        # Sorted completions of the contexts that depend on macros, built when first needed after the macros changed
+        self._command_completions: list[str] | None = None
+        self._macro_call_completions: list[str] | None = None
+
         # Connect events
         sci: QsciScintilla = self.lexer().parent()
         sci.selectionChanged.connect(self._after_completion_is_applied)
@@ -257,6 +132,16 @@ class CustomQsciAPIs(QsciAPIs):
             self._completion_selected = textToInsert
             self._has_just_inserted = 2
 
+    def invalidate_completions(self):
+        """Drops the completions built from the macro lists, so they get rebuilt after the macros changed."""
+        self._command_completions = None
+        self._macro_call_completions = None
+
+    def _build_macro_completions(self):
+        lexer: PyWrightScriptLexer = self.lexer()
+        self._command_completions, self._macro_call_completions = buildMacroCompletions(
+            tuple(lexer.get_macro_signatures().values()))
+
     def updateAutoCompletionList(self, context:[str], list:[str])->[str]:
         """
         Triggered when the autocompletion list is about to pop-up,
@@ -269,6 +154,9 @@ class CustomQsciAPIs(QsciAPIs):
         line, index = sci.getCursorPosition()
         text:str = sci.text(line)[:index].lstrip()
 
+        # The word being typed, all the completions must start with it
+        prefix = context[-1] if context else ""
+
         # Comments:
         if text.startswith("#") or text.startswith("//"):
             return []
@@ -276,27 +164,43 @@ class CustomQsciAPIs(QsciAPIs):
         # Strings:
         if text.startswith('"') or text.startswith('“'):
             if text.rfind("{$") > text.rfind("}"):
-                return formatCompletions("{$%s}", special_variables)
-            return string_tokens
+                return completionsStartingWith(prefix, _STRING_VARIABLE_COMPLETIONS)
+            return completionsStartingWith(prefix, _STRING_TOKEN_COMPLETIONS)
 
         # Test whether we are in command area or in parameters area
         split = text.split(" ")
 
         # Commands or macros:
         if len(split) == 1:
-            macros = [*lexer.builtin_macros, *lexer.game_macros, *lexer.case_macros]
+            if self._command_completions is None:
+                self._build_macro_completions()
             if split[0].startswith("{"):
-                return formatCompletions("{%s}", macros)
-            return commands + macros
+                return completionsStartingWith(prefix, self._macro_call_completions)
+            return completionsStartingWith(prefix, self._command_completions)
+
+        # Asset names, for the first parameter of bg, fg, char, mus... and the emotion of char
+        asset_completions = self._get_asset_completions(split)
+        if asset_completions is not None:
+            return completionsStartingWith(prefix, asset_completions)
 
         # Parameters:
         # TODO for the future: make the parameter list dependent on the command name
-        return [
-            *formatCompletions("$%s", special_variables),
-            *named_parameters,
-            *parameters,
-            *logic_operators
-        ]
+        return completionsStartingWith(prefix, _PARAMETER_COMPLETIONS)
+
+    def _get_asset_completions(self, split: list[str]) -> list[str] | None:
+        lexer: PyWrightScriptLexer = self.lexer()
+        asset_resolver, case_name = lexer.get_asset_resolver()
+        command_assets = get_command_assets(split[0])
+        if asset_resolver is None or command_assets is None:
+            return None
+
+        kind, subfolder = command_assets
+        if len(split) == 2:
+            return asset_resolver.list_names(kind, subfolder, case_name)
+        # The = isn't a word character, so the word being typed is the emotion alone
+        if kind is AssetKind.ART and subfolder == "port/" and split[-1].startswith("e="):
+            return asset_resolver.list_portrait_emotions(split[1], case_name)
+        return None
 
 def formatCompletions(pattern: str, list: list):
     """
@@ -304,6 +208,29 @@ def formatCompletions(pattern: str, list: list):
     """
     return [pattern % element for element in list]
 
+def formatMacroCompletion(signature: MacroSignature) -> str:
+    """
+    Utility function to get the completion of a macro, with a %$n% parameter to fill for each of its arguments.
+    """
+    return " ".join([signature.name] + ["%${}%".format(n) for n in range(1, signature.argument_count + 1)])
+
+@lru_cache(maxsize=16)
+def buildMacroCompletions(signatures: tuple[MacroSignature, ...]) -> tuple[list, list]:
+    """
+    Utility function to build the sorted command and {} macro call completions.
+    The results are cached, so all the tabs of a game share the same lists instead of each building their own.
+    """
+    macros = {formatMacroCompletion(signature) for signature in signatures}
+    return sorted({*commands, *macros}), sorted(formatCompletions("{%s}", macros))
+
+def completionsStartingWith(prefix: str, completions: list[str]) -> list[str]:
+    """
+    Utility function to get the completions starting with prefix, with a binary search in the sorted list of completions.
+    """
+    first = bisect_left(completions, prefix)
+    last = bisect_left(completions, prefix + "\U0010ffff", first)
+    return completions[first:last]
+
 
 class PyWrightScriptLexer(QsciLexerCustom):
 
@@ -318,13 +245,35 @@ class PyWrightScriptLexer(QsciLexerCustom):
 
         self.set_font_properties(font_name, font_size, bold_font)
 
-        self.builtin_macros: list[str] = []
-        self.game_macros: list[str] = []
-        self.case_macros: list[str] = []
+        # Macros of the game, as seen from the case of the edited script (None if there are no macros to use)
+        # The symbols are shared with all the other editors, their version tells when they changed.
+        self._symbols: PyWrightCaseSymbols | None = None
+        self._symbols_version: int = -1
+
+        # Finds the assets of the game for their completion, as seen from the case of the edited script
+        self._asset_resolver: AssetResolver | None = None
+        self._case_name = ""
+
+        # Type of every token known by name: the keywords and all the macros
+        self._token_types: dict[bytes, TokenType] = KEYWORD_TYPES
+
+        # Incremental styling state.
+        # Every styled line gets the current styling generation stored as its Scintilla line state,
+        # lines holding an older generation (or 0, never styled) are restyled the next time Scintilla asks for them.
+        # _dirty_range is the (first, last) byte position range touched by edits since it was last styled.
+        self._styling_generation = 1
+        self._dirty_range: tuple[int, int] | None = None
+        self._style_buffer = bytearray()
+
+        # Style and line state changes are never needed as notifications, skipping them keeps styling cheap.
+        parent.SendScintilla(QsciScintilla.SCI_SETMODEVENTMASK,
+                             QsciScintilla.SC_MODEVENTMASKALL
+                             & ~(QsciScintilla.SC_MOD_CHANGESTYLE | QsciScintilla.SC_MOD_CHANGELINESTATE))
+        parent.SCN_MODIFIED.connect(self._handle_text_modified)
 
         # Create a custom API to manage custom autocompletion
-        api = CustomQsciAPIs(self)
-        api.prepare()
+        # It has no raw API entries, as all the completions come from updateAutoCompletionList(), so there is nothing to prepare()
+        self._api = CustomQsciAPIs(self)
 
     def wordCharacters(self)->str:
         # The important thing in this string, is to be sure to have the {} in it.
@@ -337,14 +286,52 @@ class PyWrightScriptLexer(QsciLexerCustom):
         for i in range(0, 10):
             self.setFont(QFont(font_name, font_size, weight=font_weight), i)
 
-    def set_builtin_macros(self, new_list: list[str]):
-        self.builtin_macros = new_list
+    @property
+    def builtin_macros(self) -> tuple[str, ...]:
+        return self._symbols.builtin_macros if self._symbols is not None else ()
+
+    @property
+    def game_macros(self) -> tuple[str, ...]:
+        return self._symbols.game_macros if self._symbols is not None else ()
+
+    @property
+    def case_macros(self) -> tuple[str, ...]:
+        return self._symbols.case_macros if self._symbols is not None else ()
+
+    def get_macro_signatures(self) -> dict[str, MacroSignature]:
+        return self._symbols.get_signatures() if self._symbols is not None else {}
+
+    def get_macro_signature(self, macro_name: str) -> MacroSignature | None:
+        return self.get_macro_signatures().get(macro_name)
+
+    def set_symbols(self, symbols: PyWrightCaseSymbols):
+        self._symbols = symbols
+        self._update_token_types()
+
+    def set_asset_resolver(self, asset_resolver: AssetResolver, case_name: str):
+        self._asset_resolver = asset_resolver
+        self._case_name = case_name
+
+    def get_asset_resolver(self) -> tuple[AssetResolver | None, str]:
+        return self._asset_resolver, self._case_name
+
+    def update_symbols_if_changed(self):
+        """Restyles the script if the macros it uses changed since it was last styled. This only compares versions."""
+        if self._symbols is not None and self._symbols.version != self._symbols_version:
+            self._update_token_types()
 
-    def set_game_macros(self, new_list: list[str]):
-        self.game_macros = new_list
+    def _update_token_types(self):
+        """Picks the token type table of the current symbols, then restyles the script with it."""
+        self._symbols_version = self._symbols.version
+        self._token_types = self._symbols.get_token_types()
+        self._api.invalidate_completions()
+        self._invalidate_styling()
 
-    def set_case_macros(self, new_list: list[str]):
-        self.case_macros = new_list
+    def _invalidate_styling(self):
+        """Marks every line as stale, so they get restyled (lazily) with the current macro lists."""
+        self._styling_generation = self._styling_generation % 0x7FFFFFFF + 1
+        self.parent().SendScintilla(QsciScintilla.SCI_STARTSTYLING, 0, 0)
+        self.parent().viewport().update()
 
     def set_editor_color_theme(self):
         # Default Text Settings
@@ -382,140 +369,102 @@ class PyWrightScriptLexer(QsciLexerCustom):
         else:
             return ""
 
+    def _handle_text_modified(self, position: int, modification_type: int, text: bytes, length: int, *args):
+        """Keeps track of the byte range that has been changed since it was last styled."""
+        if modification_type & QsciScintilla.SC_MOD_INSERTTEXT:
+            first, last = position, position + length
+            if self._dirty_range is not None:
+                # Shift the previous range to account for the inserted text
+                old_first, old_last = self._dirty_range
+                first = min(first, old_first if old_first < position else old_first + length)
+                last = max(last, old_last if old_last < position else old_last + length)
+            self._dirty_range = (first, last)
+        elif modification_type & QsciScintilla.SC_MOD_DELETETEXT:
+            # The line the removed text was joined at has to be restyled
+            first, last = position, position
+            if self._dirty_range is not None:
+                # Shift the previous range to account for the removed text
+                old_first, old_last = self._dirty_range
+                first = min(first, old_first if old_first <= position else max(position, old_first - length))
+                last = max(last, old_last if old_last <= position else max(position, old_last - length))
+            self._dirty_range = (first, last)
+
+    def _is_line_stale(self, line: int, line_start: int, line_end: int) -> bool:
+        if self._dirty_range is not None and line_start <= self._dirty_range[1] and line_end >= self._dirty_range[0]:
+            return True
+
+        return self.parent().SendScintilla(QsciScintilla.SCI_GETLINESTATE, line) != self._styling_generation
+
     def styleText(self, start, end):
+        # Scintilla asks to style everything from the first line it considers unstyled up to the end of the view,
+        # which after an edit includes lots of lines that didn't change at all.
+        # So only restyle the lines that were edited (or styled with outdated macros), and skip over the rest.
+        editor: QsciScintilla = self.parent()
+        line = editor.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, start)
+        line_count = editor.lines()
+        document_length = editor.length()
+
+        run_start = -1
+        run_first_line = line
+        line_start = editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line)
+
+        while line < line_count and line_start < end:
+            line_end = editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line + 1) \
+                if line + 1 < line_count else document_length
+
+            if self._is_line_stale(line, line_start, line_end):
+                if run_start < 0:
+                    run_start = line_start
+                    run_first_line = line
+            elif run_start >= 0:
+                self._style_lines(run_first_line, line - 1, run_start, line_start)
+                run_start = -1
+
+            line += 1
+            line_start = line_end
+
+        if run_start >= 0:
+            self._style_lines(run_first_line, line - 1, run_start, line_start)
+
+        # Everything until there is now up-to-date, including the skipped lines
+        self.startStyling(line_start)
+
+    def _style_lines(self, first_line: int, last_line: int, start: int, end: int):
+        """Restyles the lines between first_line and last_line (inclusive), spanning the byte range from start to end."""
+        editor: QsciScintilla = self.parent()
+
+        self._style_buffer = bytearray()
+        self._style_range(bytes(editor.bytes(start, end))[:end - start])
+
+        # Apply the styles of the whole range at once, rather than one setStyling() call per token
+        length = end - start
+        styles = bytes(self._style_buffer[:length].ljust(length, b"\x00"))
         self.startStyling(start)
-
-        text = bytearray(self.parent().text(), "utf-8")[start:end].decode("utf-8")
-
-        token_list = [(token, len(bytearray(token, "utf-8"))) for token in _TOKEN_REGEX.findall(text)]
-
-        # Keep track if a token is a newline, to distinguish commands and parameters on the next token for the ones such as "fade" and "script":
-        wasNewLine = True
-        for i, token in enumerate(token_list):
-            self._set_styling_for_token(token, wasNewLine)
-            wasNewLine = '\n' in token[0].replace('\r', '\n') or (wasNewLine and not token[0].strip())
-
-    def _set_styling_for_token(self, token: tuple[str, int], isFirstOfLine:bool = False):
-        # Handle tokens ending with ?, except comments
-        if token[0].endswith("?") and len(token[0]) > 1 and not (token[0].startswith("//") or token[0].startswith("#")):
-            # Check if there are multiple question marks first
-
-            question_marks = _QUESTION_MARK_REGEX.findall(token[0])
-
-            if len(question_marks[0]) == 1:
-                # end of a ? conditional, don't consider the ?
-                token_split = token[0].rsplit("?", maxsplit=1)
-                token_0_len = len(bytearray(token_split[0], "utf-8"))
-                # process the token sans ?
-                self._set_styling_for_token((token_split[0], token_0_len))
-                # then the ? on its own
-                self.setStyling(1, 2)
-                return
-
-        # Proceed through the tokens normally
-        if token[0] in commands:
-            # If a command token can also be a parameter (such as "fade" and "script"),
-            # check if it is a the start of a line to know which coloration to perform:
-            if token[0] in parameters and not isFirstOfLine:
-                self.setStyling(token[1], 3)
-                return
-            self.setStyling(token[1], 1)
-        elif token[0] in logic_operators:
-            self.setStyling(token[1], 2)
-        elif token[0] in special_variables or token[0] in cases:
-            self.setStyling(token[1], 2)
-        elif token[0].startswith("$") and (token[0][1:] in special_variables
-                                           or token[0][1:] in parameters 
-                                           or token[0][1:].isdigit()): # e.g. $1, $2, engine-level, used for accessing macro args
-            self.setStyling(token[1], 2)
-        elif token[0].startswith(named_parameters):
-            # Divide the = section and then colorize that instead
-            param_name = token[0].split("=", maxsplit=1)
-            param_0_len = len(param_name[0]) + 1  # + 1 for the "="
-            self.setStyling(param_0_len, 3)
-            param_1_token = (param_name[1], len(param_name[1]))
-            self._set_styling_for_token(param_1_token)
-        elif token[0] in parameters:
-            self.setStyling(token[1], 3)
-        elif token[0].startswith("{") and "}" in token[0] and ' ' in token[0]:
-            # macro call with a parameter
-
-            #split token to make sure there is not more than one macro call
-            tokens = re.findall('[^}]+}|[^}]+', token[0])
-            if (len(tokens) > 1):
-                # process all tokens separately
-                for subtoken in tokens:
-                    self._set_styling_for_token((subtoken, len(subtoken)))
-                return
-            
-            token_split = token[0].split(' ')
-            for tokenpiece in token_split:
-                # first token is always the macro
-                if tokenpiece == token_split[0]:
-                    self.setStyling(len(token_split[0]) + 1, 3)
-                    continue
-                #last token needs special handling for the closing bracket
-                elif tokenpiece.endswith("}"):
-                    tokenpiece_split = tokenpiece.split("}", maxsplit=1)
-                    # process the last token sans bracket
-                    self._set_styling_for_token((tokenpiece_split[0], len(tokenpiece_split[0])))
-                    # then the bracket by itself
-                    self._set_styling_for_token(("}", 1))
-                    break
-                # middle tokens get processed normally
-                self._set_styling_for_token((tokenpiece, len(tokenpiece) + 1))
-        elif token[0] == "}" or token[0].startswith("{") and token[0].endswith("}"):
-            self.setStyling(token[1], 3)
-        elif token[0].startswith("//") or token[0].startswith("#"):
-            self.setStyling(token[1], 4)
-        elif (token[0].startswith("\"") or token[0].startswith('“')):
-            self._set_styling_for_string_token(token[0])
-        elif is_string_number(token[0]):
-            self.setStyling(token[1], 6)
-        elif token[0] in self.builtin_macros:
-            self.setStyling(token[1], 7)
-        elif token[0] in self.game_macros:
-            self.setStyling(token[1], 8)
-        elif token[0] in self.case_macros:
-            self.setStyling(token[1], 8)    # Question: do we do separate styles for case and game macros?
-        else:
-            self.setStyling(token[1], 0)
-
-    def _set_styling_for_string_token(self, text: str):
-        # Note: text should have a " at start and at end.
-        
-        # Loop while there is text to style
-        while len(text) > 0:
-
-            # Search for braces
-            openPos = text.find("{", 1)
-            closePos = text.find("}", 1)
-
-            # Take the next found brace (need to take into account the fact that not found returns -1 and -1 is < 0)
-            if openPos < 0:
-                nextPos = closePos
-            elif closePos < 0:
-                nextPos = openPos
-            else:
-                nextPos = min(openPos, closePos)
-
-            # {} are not found: place only string
-            if openPos < 0 and closePos < 0:
-                self.setStyling(len(bytearray(text, "utf-8")), 5)
-                break
-
-            else:
-                # Split text
-                token = text[:nextPos]
-                text = text[nextPos:]
-                
-                # Apply style
-                # If token starts with { and text with }, put the } in the token and colorize it a different color
-                if token.startswith('{') and text.startswith('}'):
-                    token = token + text[0]
-                    text = text[1:]
-                    self.setStyling(len(bytearray(token, "utf-8")), 9)
-                else:
-                    self.setStyling(len(bytearray(token, "utf-8")), 5)
-
-
+        editor.SendScintilla(QsciScintilla.SCI_SETSTYLINGEX, length, styles)
+
+        for line in range(first_line, last_line + 1):
+            editor.SendScintilla(QsciScintilla.SCI_SETLINESTATE, line, self._styling_generation)
+
+        # The dirty range is consumed from the front, as Scintilla always styles forward
+        if self._dirty_range is not None and start <= self._dirty_range[0] <= end:
+            first, last = end, self._dirty_range[1]
+            self._dirty_range = None if first > last or first >= editor.length() else (first, last)
+
+    def _style_range(self, data: bytes):
+        # Whitespace isn't part of any token, it gets the default style,
+        # except for the space after each part of a {macro call}, which gets the style of that part
+        style_buffer = self._style_buffer
+        position = 0
+        style = 0
+        in_macro_call = False
+        for token_type, _, offset, text in tokenize(data, self._token_types):
+            if offset > position:
+                if in_macro_call:
+                    style_buffer += _STYLE_BYTES[style]
+                    position += 1
+                style_buffer += _STYLE_BYTES[0] * (offset - position)
+            style = _TOKEN_TYPE_STYLES[token_type]
+            style_buffer += _STYLE_BYTES[style] * len(text)
+            position = offset + len(text)
+            if token_type is TokenType.MACRO_CALL:
+                in_macro_call = text.startswith(b"{") and not text.endswith(b"}")
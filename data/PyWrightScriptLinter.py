@@ -0,0 +1,271 @@
+# A static checker for PyWright scripts, to find the mistakes that would otherwise only show up when running the game
+# It works on the UTF-8 bytes of the scripts like the tokenizer, and only checks again the files that changed
+
+import os
+import threading
+from enum import Enum, auto
+from pathlib import Path
+from typing import NamedTuple
+
+from .PyWrightScriptTokenizer import TokenType, Token, tokenize, string_tokens
+from .PyWrightProjectIndex import SymbolKind, read_symbols
+from .AssetResolver import ASSET_KIND_NAMES, AssetResolver, read_asset_references
+from .ScriptFiles import ScriptCache, get_file_stamp, find_script, is_literal_name
+
+_MAX_LINTING_THREADS = 8
+
+# Names of the {} commands of the text, such as "sfx" for {sfx ...}
+_TEXT_COMMANDS = frozenset(token[1:].rstrip("}").split(" ")[0].encode("utf-8")
+                           for token in string_tokens if not token.startswith("{$"))
+# These can be directly followed by their argument, such as {c900} or {p10}
+_SHORT_TEXT_COMMANDS = tuple(command for command in _TEXT_COMMANDS if len(command) == 1)
+_TEXT_COMMAND_ARGUMENT_CHARACTERS = frozenset(b"0123456789abcdefABCDEF.-")
+
+
+class ProblemSeverity(Enum):
+    ERROR = auto()      # The engine will fail on it
+    WARNING = auto()    # Most likely a mistake, but could be resolved at runtime
+
+
+class Problem(NamedTuple):
+    severity: ProblemSeverity
+    message: str
+    file_path: str
+    line: int           # Starting from 0
+    column: int         # In UTF-8 bytes from the start of the line, not characters
+    length: int         # In bytes
+
+
+class LintContext:
+    """What the checks of a script need to know about the rest of the game."""
+
+    def __init__(self, game_path: Path, macros_by_case: dict[str, frozenset[str]], macros_version: int = 0,
+                 open_file_data: dict[str, bytes] | None = None, asset_resolver: AssetResolver | None = None):
+        """
+            :param game_path: Path to the game folder
+            :param macros_by_case: Names of the macros seen from each case folder, builtin and game macros included.
+            The "" entry holds the macros seen from any other folder.
+            :param macros_version: Changes whenever the macros change, so that all the files get checked again
+            :param open_file_data: The contents of the files open in editors by absolute path, used instead of the files
+            :param asset_resolver: Finds the art, music and sounds of the game, assets aren't checked without it
+        """
+        self.game_path = Path(os.path.abspath(game_path))
+        self.macros_by_case = macros_by_case
+        self.macros_version = macros_version
+        self.open_file_data = open_file_data if open_file_data is not None else {}
+        self.asset_resolver = asset_resolver
+        # Taken now, so that assets changing during a pass get the files checked again by the next one
+        self.assets_version = asset_resolver.version if asset_resolver is not None else 0
+
+    def get_known_macros(self, file_path: str) -> frozenset[str]:
+        case_name = Path(file_path).parent.name
+        return self.macros_by_case.get(case_name, self.macros_by_case.get("", frozenset()))
+
+    def find_script(self, name: str, from_file_path: str) -> str | None:
+        """Returns the absolute path of the script a script or include command loads, see ScriptFiles.find_script()."""
+        return find_script(name, from_file_path, self.game_path,
+                           lambda file_path: file_path in self.open_file_data or os.path.isfile(file_path))
+
+    def read_file(self, file_path: str) -> bytes | None:
+        data = self.open_file_data.get(os.path.abspath(file_path))
+        if data is not None:
+            return data
+        try:
+            with open(file_path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+
+def lint_script(script: bytes | str, file_path: str, context: LintContext) -> list[Problem]:
+    """
+    Checks a script for unknown commands, jumps to missing labels, missing scripts and assets,
+    unbalanced macro/endmacro and cross/endcross, and malformed {} commands in the text.
+    :param script: the script text
+    :param file_path: the path of the script, stored in the problems and used to find the scripts it loads
+    :param context: what is known about the rest of the game
+    :return: the problems, in the order they appear in the script
+    """
+    return _lint_script(script, file_path, context)[0]
+
+
+def _lint_script(script: bytes | str, file_path: str, context: LintContext) -> tuple[list[Problem], list[str]]:
+    # Also returns the included scripts, whose labels the script can jump to
+    if isinstance(script, str):
+        script = script.encode("utf-8")
+
+    problems = []
+    line_starts = [0]
+    for line in script.splitlines(keepends=True):
+        line_starts.append(line_starts[-1] + len(line))
+
+    def add(severity: ProblemSeverity, message: str, token: Token, start: int = 0, length: int | None = None):
+        problems.append(Problem(severity, message, file_path, token.line, token.offset + start - line_starts[token.line],
+                                len(token.text) - start if length is None else length))
+
+    known_macros = context.get_known_macros(file_path)
+    defined_macros = set()
+    included_file_paths = []
+    open_blocks: dict[bytes, Token] = {}    # The macro and cross commands waiting for their end
+
+    line_tokens: list[Token] = []
+    lines_tokens: list[list[Token]] = []
+    for token in tokenize(script):
+        if line_tokens and token.line != line_tokens[0].line:
+            lines_tokens.append(line_tokens)
+            line_tokens = []
+        if token.type is not TokenType.COMMENT:
+            line_tokens.append(token)
+    if line_tokens:
+        lines_tokens.append(line_tokens)
+
+    # Macros can be used before they are defined
+    for tokens in lines_tokens:
+        if tokens[0].text == b"macro" and len(tokens) > 1:
+            defined_macros.add(tokens[1].text.decode("utf-8", "replace"))
+
+    for tokens in lines_tokens:
+        command = tokens[0]
+        if command.type is TokenType.COMMAND:
+            if command.text in (b"macro", b"cross"):
+                if command.text in open_blocks:
+                    add(ProblemSeverity.ERROR, "{} inside of another {}, which has no end{} before".format(
+                        command.text.decode(), command.text.decode(), command.text.decode()), command)
+                open_blocks[command.text] = command
+            elif command.text in (b"endmacro", b"endcross"):
+                if open_blocks.pop(command.text[3:], None) is None:
+                    add(ProblemSeverity.ERROR, "{} without a {} before".format(command.text.decode(),
+                                                                                command.text[3:].decode()), command)
+            elif command.text in (b"script", b"include") and len(tokens) > 1:
+                name = tokens[1]
+                script_name = name.text.decode("utf-8", "replace")
+                if is_literal_name(script_name):
+                    target_path = context.find_script(script_name, file_path)
+                    if target_path is None:
+                        add(ProblemSeverity.ERROR, "Script {} not found".format(script_name), name)
+                    elif command.text == b"include":
+                        included_file_paths.append(target_path)
+        elif command.type is TokenType.TEXT and not command.text.startswith(b"$"):
+            name = command.text.decode("utf-8", "replace")
+            if is_literal_name(name) and name not in known_macros and name not in defined_macros:
+                add(ProblemSeverity.WARNING, "Unknown command or macro {}".format(name), command)
+
+        for token in tokens:
+            if token.type is TokenType.STRING:
+                brace_position = min((position for position in (token.text.find(b"{"), token.text.find(b"}"))
+                                      if position >= 0), default=-1)
+                if brace_position >= 0 and token.text[brace_position:brace_position + 1] == b"{":
+                    add(ProblemSeverity.ERROR, "{ without a } after it in the text", token, brace_position, 1)
+                elif brace_position >= 0:
+                    add(ProblemSeverity.ERROR, "} without a { before it in the text", token, brace_position, 1)
+            elif token.type is TokenType.STRING_TOKEN:
+                _check_text_command(token, known_macros, defined_macros, add)
+
+    for command in open_blocks.values():
+        add(ProblemSeverity.ERROR, "{} without an end{} after it".format(command.text.decode(), command.text.decode()),
+            command)
+
+    # Jumps of macro files are to the labels of the scripts calling the macros, and their assets are looked up from there
+    if not file_path.endswith(".mcro"):
+        _check_labels(script, file_path, included_file_paths, context, problems)
+        if context.asset_resolver is not None:
+            _check_assets(script, file_path, context.asset_resolver, problems)
+
+    problems.sort(key=lambda problem: (problem.line, problem.column))
+    return problems, included_file_paths
+
+
+def _check_text_command(token: Token, known_macros: frozenset[str], defined_macros: set[str], add):
+    content = token.text[1:-1]
+    if not content.strip():
+        add(ProblemSeverity.ERROR, "Empty {} in the text", token)
+        return
+
+    name = content.split()[0]
+    if name.startswith(b"$") or name in _TEXT_COMMANDS:
+        return
+    if name.startswith(_SHORT_TEXT_COMMANDS) and _TEXT_COMMAND_ARGUMENT_CHARACTERS.issuperset(name[1:]):
+        return
+    decoded_name = name.decode("utf-8", "replace")
+    if decoded_name not in known_macros and decoded_name not in defined_macros:
+        add(ProblemSeverity.WARNING, "Unknown text command or macro {}".format(decoded_name), token, 1, len(name))
+
+
+def _check_labels(script: bytes, file_path: str, included_file_paths: list[str], context: LintContext,
+                  problems: list[Problem]):
+    symbols = read_symbols(script, file_path)
+    labels = {symbol.name for symbol in symbols if symbol.kind is SymbolKind.LABEL and symbol.is_definition}
+    # Included scripts are inserted in the script, along with their labels
+    for included_file_path in included_file_paths:
+        included_script = context.read_file(included_file_path)
+        if included_script is not None:
+            labels.update(symbol.name for symbol in read_symbols(included_script)
+                          if symbol.kind is SymbolKind.LABEL and symbol.is_definition)
+
+    for symbol in symbols:
+        if symbol.kind is SymbolKind.LABEL and not symbol.is_definition and symbol.name not in labels \
+                and is_literal_name(symbol.name):
+            problems.append(Problem(ProblemSeverity.ERROR, "Label {} not found in this script".format(symbol.name),
+                                    file_path, symbol.line, symbol.column, len(symbol.name.encode("utf-8"))))
+
+
+def _check_assets(script: bytes, file_path: str, asset_resolver: AssetResolver, problems: list[Problem]):
+    for reference in read_asset_references(script, file_path):
+        if asset_resolver.resolve_reference(reference) is None:
+            problems.append(Problem(ProblemSeverity.WARNING, "{} {} not found".format(
+                                        ASSET_KIND_NAMES[reference.kind], reference.name),
+                                    file_path, reference.line, reference.column, reference.length))
+
+
+class _LintedFile(NamedTuple):
+    dependencies: tuple[tuple[str, tuple], ...] # The included files, with their stamps when the file was checked
+    problems: list[Problem]
+
+
+class PyWrightScriptLinter:
+    """
+    Checks all the scripts of a game, remembering the problems of each file.
+    A pass only checks again the files that changed since the previous one, or whose included scripts changed.
+    Everything is checked again when the macros or the assets change, or when scripts are added or removed.
+    All the methods can be called from any thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._scripts: ScriptCache[_LintedFile] = ScriptCache("Checked")
+        self._file_paths: frozenset[str] = frozenset()
+        self._macros_version: int | None = None
+        self._assets_version: int | None = None
+
+    def lint(self, file_paths: list[Path | str], context: LintContext,
+             max_linting_threads: int = _MAX_LINTING_THREADS) -> dict[str, list[Problem]]:
+        """Checks the given files, reusing the problems of the files that didn't change.
+            :return: The problems of each file by absolute path, files without problems included"""
+        keys = frozenset(os.path.abspath(file_path) for file_path in file_paths)
+        with self._lock:
+            if keys != self._file_paths or context.macros_version != self._macros_version \
+                    or context.assets_version != self._assets_version:
+                self._scripts.clear()
+                self._file_paths = keys
+                self._macros_version = context.macros_version
+                self._assets_version = context.assets_version
+
+        def lint_file(key: str, script: bytes) -> _LintedFile:
+            problems, included_file_paths = _lint_script(script, key, context)
+            dependencies = tuple((path, get_file_stamp(path, context.open_file_data)) for path in included_file_paths)
+            return _LintedFile(dependencies, problems)
+
+        def is_up_to_date(linted_file: _LintedFile) -> bool:
+            return all(get_file_stamp(path, context.open_file_data) == dependency_stamp
+                       for path, dependency_stamp in linted_file.dependencies)
+
+        linted_files = self._scripts.update(file_paths, context.open_file_data, lint_file, is_up_to_date,
+                                            max_linting_threads)
+        return {key: linted_file.problems for key, linted_file in linted_files.items()}
+
+    def clear(self):
+        self._scripts.clear()
+        with self._lock:
+            self._file_paths = frozenset()
+            self._macros_version = None
+            self._assets_version = None
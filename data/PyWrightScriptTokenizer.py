@@ -0,0 +1,384 @@
+# A tokenizer for PyWright scripts, without any Qt dependency.
+# It is used by the script lexer for syntax highlighting, and can be used by any tool working on script files.
+import re
+from enum import Enum, auto
+from typing import Iterator, NamedTuple
+
+commands = [
+    # In the written order in doc.txt (with some additions):
+    # "To add various objects"
+    "emo",
+    "gui", "Back", "Button", "Wait", "Input",
+    "menu",
+    "list", "li", "showlist", "forgetlist", "forgetlistitem",
+    "present",
+    "examine", "region",
+
+    # "Various control commands"
+    "print", "include", "nt", "goto", "label", "penalty", "pause", "timer", "waitenter",
+    "mus", "sfx", "movie",
+    "exit", "endscript", "casemenu", "script", "top",
+    "cross", "endcross", "statement", "resume", "cross_restart", "clearcross",
+    "next_statement", "prev_statement",
+
+    # "Variables and flags to keep track of what happens"
+    "setflag", "delflag", "flag", "noflag", "set",
+    "setvar", "joinvar", "addvar", "subvar", "divvar", "mulvar", "absvar",
+    "random", "getvar",
+    "is", "isnot", "isempty", "isnotempty", "isnumber",
+    "exportvars", "importvars", "savegame", "loadgame", "deletegame",
+
+    # "Working with evidence"
+    "addev", "delev",
+
+    # "Special effects"
+    "draw_off", "draw_on", "scroll", "rotate",
+
+    # macros
+    "macro", "endmacro",
+
+    # data.txt fields
+    "icon", "title", "author", "version",
+
+    # "Animation file commands" (these can be added here too)
+    "horizontal", "vertical", "length", "loops", "framedelay",
+    "blinkmode", "blipsound", "framecompress",
+
+    # "Art Types"
+    "fg", "bg", "ev",
+
+    # Not mentioned in doc.txt, but somewhere else
+    "zoom", "char", "delete", "shake", "is_ex", "setvar_ex",
+
+    # Not mentioned in doc.txt but in docs/index.html
+    "filewrite", "screenshot", "bemo", "clear", "textblock", "textbox",
+    "locked_cases", "addcase", "wincase", "resetcase", "examine3d", "localmenu", "region3d",
+    "game", "controlanim", "globaldelay", "gamemenu", "getprop", "setprop", "debug",
+    "fade", "grey", "invert", "tint", 
+
+    # Misc. stuff (some might be custom macros, or stuff that wasn't in 0.9880)
+    "in", "out", "obj",
+
+    # Undocumented commands found by reading the actual source code of the PyWright engine
+    "framerate", "step", "set_ex", "showrecord", "surf3d", "mesh"
+]
+
+# Commands whose first parameter is the name of a variable they set
+variable_setting_commands = ["set", "setvar", "set_ex", "setvar_ex", "joinvar", "addvar", "subvar",
+                             "mulvar", "divvar", "absvar", "random", "getvar", "getprop"]
+
+special_variables = [
+    # In the written order in doc.txt
+    # "Used in actual game logic"
+    "_speaking",
+
+    # "Dev controls"
+    "_debug", "_return", "_preload",
+
+    # "Things engine sets which might be useful to use in logic"
+    "_layer_invisible", "_layer_bg", "_layer_char", "_layer_fg", "_layer_textbox", "_layer_gui"
+    "_speaking_name", "_lastline", "_currentline", "_lastlabel", "_currentlabel",
+    "_statement", "_selected", "_examine_offset_x", "_examine_offset_y",
+    "_examine_click_x", "_examine_click_y",
+
+    # "Interface toggles so you can customize look or behavior of things"
+    "_default_port_fg_delay", "_default_fg_frame_delay", "_list_checked_img", "_bigbutton_img",
+    "_textbox_show_button", "_textbox_show_recordbutton", "_textbox_lines", "_textbox_wrap",
+    "_textbox_allow_skip", "_textbox_skipupdate", "_nt_image", "_examine_skipupdate", "_examine_showbars",
+    "_examine_showcursor", "_examine_use", "_examine_mousedown", "_testimony_blinker", "_cr_button",
+    "_allow_present_evidence", "_allow_present_profiles", "_allow_click_save", "_allow_saveload",
+    "_allow_click_load",
+
+    # "Present customization"
+    "_profiles_enable", "_profiles_present", "_evidence_enable", "_evidence_present",
+    "_cr_back_button", "_list_back_button", "_menu_fade_level", "_double_screen_list_fade",
+    "_flash_sound", "_shake_sound", "_music_loop",
+
+    # "Used in intro.txt in the game folder to control menu"
+    "_order_cases",
+
+    # _case_0, _case_1, case_2... etc. are handled in a separate list
+    # Misc. stuff that wasn't in the doc.txt (some might be custom macros, or stuff that wasn't in 0.9880)
+    "_list_bg_image", "_music_fade", "ev_mode_bg_logic", "_bigbutton_bg",
+    "_production", "_ev_pages", "_ev", "_version"
+]
+
+# Support up to 100 case definitions for a single game, this should be much more than enough.
+cases = ["_case_{}".format(num) for num in range(100)]
+
+# Just for that sweet, sweet startswith()
+named_parameters = ("start=", "end=", "e=", "x=", "y=", "z=", "name=", "speed=", "width=", "height=", "rwidth=", "rheight=",
+                    "graphic=", "graphichigh=", "examine=", "talk=", "present=", "move=", "fail=", "nametag=", "result=", "label=",
+                    "mag=", "frames=", "hotkey=", "jumpto=","pause=","test=", "loops=", "rotz=", "be=", "pri=", "variable=", "threat=",
+                    "delay=", "color=", "run=", "priority=", "prop=", "value=", "degrees=", "axis=", "filter=", "after=")
+
+parameters = ["stack", "nowait", "noclear", "hide", "fade", "true", "false", "noback", "sx", "sy",
+              "blink", "loop", "noloop", "b", "t", "stop", "noauto", "password", "all", "suppress", "flipx", "wait", "hold", "try_bottom",
+              "script", "last", "both"]
+
+# Following are string tokens with pattern for autocompletion
+# Notes: {c} is reset color, {c} is also allowed to have args immediatly after the c
+# {n} is a newline
+# {$variable} introduces a variable
+# others are either special commands, or macros.
+# All commands + args + description:
+# sfx            str:sound                Play a sound effect.
+# sound          str:clicksound           Change blipping sound.
+# delay          int:multiplier           Changes the delay mutliplier per character (aka relative speed), and also does {wait manual}.    
+# spd            float:speed              Change speed of dialogue. Also bypasses {_fullspeed} and {_endfullspeed}, not present in the documentation.
+# _fullspeed     (none) (automatic)       Begin instant text. Unofficially supported, internally used when returning from a macro, not present in the documentation.
+# _endfullspeed  (none) (automatic)       Restore previous speed after instant text. Unofficially supported, internally used when returning from a macro, not present in the documentation.
+# wait           str: "manual" or "auto"  Change the waiting mode to specified arguments.
+# center         (none) (preparsed)       Centers the text.
+# type           (none)                   Change blipping sound to typewriter.ogg, set delay to 2 (according to code, but 5 according to doc) and wait mode to "manual".
+# next           (none)                   Automatically goes to the next 3 lines of text.
+# e              str:emotion              Set the current character's emotion.
+# f              int:duration str:color   Flashes the screen to a specific duration & color. Both arguments are optional.
+# s              int:duration int:power   Shakes the screen. Both arguments are optional.
+# p              int:next_char            Pauses for a number of frames (game runs at 60 fps, so 1 frame is 1/60 seconds)
+# c              hex:color                Changes the color. Color can be 3 hex-digits RGB, or 6 hex-digits RRGGBB or last part of the name of a variable named "color_something", or nothing to reset the color. 
+# tbon           (none)                   Forces Testimony Blink On.
+# tboff          (none)                   Forces Testimony Blink Off.
+# n              (none) (preparsed)       New line character.
+# $variable      (none)                   Value of variable.
+string_tokens = ["{sfx /%path/to/sound%}", "{sound %blipping sound%}", "{delay %delay:int%}", "{spd %speed:float%}", "{_fullspeed}", "{_endfullspeed}",
+                 "{wait manual}", "{wait auto}", "{center}", "{type}", "{next}", "{e %emotion%}", "{f %frames:int% %color%}",
+                 "{s %frames% %power%}", "{p %frame%}", "{c}", "{c %color%}", "{tbon}", "{tboff}", "{n}", "{$"]
+
+# Logical operators
+logic_operators = ["==", "<=", ">=", "<", ">", "NOT", "AND", "OR"]
+
+# Compiled regular expressions
+# The tokenizer works directly on UTF-8 bytes (as Scintilla and the script files hold them), so these are all bytes patterns.
+# Whitespace is spelled out in UTF-8 to match the same characters as \s does in str patterns.
+_WHITESPACE = rb"[\t-\r\x1c-\x20]|\xc2[\x85\xa0]|\xe1\x9a\x80|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]|\xe2\x81\x9f|\xe3\x80\x80"
+_NON_WHITESPACE = (rb"[^\t-\r\x1c-\x20\xc2\xe1\xe2\xe3]|\xc2[^\x85\xa0]|\xe1(?!\x9a\x80)"
+                   rb"|\xe2(?!\x80[\x80-\x8a\xa8\xa9\xaf]|\x81\x9f)|\xe3(?!\x80\x80)")
+
+# This regex also matches whitespace, which is needed to keep track of lines and of the start of each line.
+_TOKEN_REGEX = re.compile(rb"(?P<comment>(?://|#)[^\r\n]*)"
+                          rb"|(?P<brace>\{[^\r\n]*})"
+                          rb"|(?P<string>(?:\"|\xe2\x80\x9c)[^\r\n]*)"
+                          rb"|(?P<word>(?:" + _NON_WHITESPACE + rb")+)"
+                          rb"|(?P<space>(?:" + _WHITESPACE + rb")+)")
+
+# This regex splits a string into its text and {} token parts
+_STRING_PART_REGEX = re.compile(rb"(?P<token>\{[^{}]*})|(?s:.)[^{}]*")
+
+# Tokens that might be numbers, the rest can skip is_string_number() entirely
+_NUMBER_CANDIDATE_REGEX = re.compile(rb"-*[\s\x1c-\x1f]*[+-]?[0-9.iInN]")
+
+_COMMENT_STARTS = (b"//", b"#")
+_QUOTES = (b'"', "“".encode("utf-8"))
+_NAMED_PARAMETERS = tuple(named_parameter.encode("utf-8") for named_parameter in named_parameters)
+
+
+class TokenType(Enum):
+    TEXT = auto()               # Anything that isn't known, such as dialogue or asset names
+    COMMAND = auto()
+    PARAMETER = auto()          # Including the name= part of named parameters
+    VARIABLE = auto()           # Special variables, $variables and $1 macro arguments
+    OPERATOR = auto()           # Logic operators, and the ? at the end of conditionals
+    COMMENT = auto()
+    STRING = auto()
+    STRING_TOKEN = auto()       # {} tokens inside of strings
+    NUMBER = auto()
+    MACRO_CALL = auto()         # The {name part and the closing } of a {macro call}, and the {} on their own
+    BUILTIN_MACRO = auto()
+    GAME_MACRO = auto()
+    CASE_MACRO = auto()
+
+
+class Token(NamedTuple):
+    type: TokenType
+    line: int       # Line number, starting from the line given to tokenize()
+    offset: int     # Position in bytes, starting from the offset given to tokenize()
+    text: bytes     # UTF-8 encoded, so len(text) is the length in bytes
+
+
+# Type of all the known keywords, for a single lookup per token.
+# Filled from the lowest priority to the highest one, so that the highest priority wins for the tokens in several lists
+KEYWORD_TYPES: dict[bytes, TokenType] = {}
+for _token_type, _keywords in ((TokenType.PARAMETER, parameters),
+                               (TokenType.VARIABLE, ["$" + keyword for keyword in special_variables + parameters]),
+                               (TokenType.VARIABLE, special_variables + cases),
+                               (TokenType.OPERATOR, logic_operators),
+                               (TokenType.COMMAND, commands)):
+    KEYWORD_TYPES.update((keyword.encode("utf-8"), _token_type) for keyword in _keywords)
+
+# Commands that are also parameters (such as "fade" and "script"), these are only commands at the start of a line
+_COMMAND_PARAMETERS = frozenset(keyword.encode("utf-8") for keyword in commands if keyword in parameters)
+
+
+def is_string_number(string: str) -> bool:
+    if string.startswith("-"):
+        return is_string_number(string[1:])
+
+    return string.isnumeric() or is_string_float(string)
+
+
+def is_string_float(string: str) -> bool:
+    try:
+        float(string)
+        return True
+    except ValueError:
+        return False
+
+
+def _is_token_number(token: bytes) -> bool:
+    if token.isascii() and not _NUMBER_CANDIDATE_REGEX.match(token):
+        return False
+
+    return is_string_number(token.decode("utf-8", "replace"))
+
+
+def _is_token_digits(token: bytes) -> bool:
+    # Non-ASCII digits count as well, just like str.isdigit()
+    return token.isdigit() or (not token.isascii() and token.decode("utf-8", "replace").isdigit())
+
+
+def _is_typed_before_macros(token: bytes) -> bool:
+    """Whether the token is caught by one of the rules _word_tokens() checks before looking for macros."""
+    return (token.startswith(b"$") and _is_token_digits(token[1:])
+            or token.startswith(_NAMED_PARAMETERS)
+            or token.startswith(b"{") and b"}" in token and b" " in token
+            or token == b"}" or token.startswith(b"{") and token.endswith(b"}")
+            or token.startswith(_COMMENT_STARTS)
+            or token.startswith(_QUOTES)
+            or _is_token_number(token))
+
+
+def build_token_types(builtin_macros: list[str], game_macros: list[str], case_macros: list[str]) -> dict[bytes, TokenType]:
+    """
+    Builds the table of every token known by name, the keywords and the given macros, to give to tokenize().
+    Macro names that another rule would type first are left out, so a single lookup gives the same result as the rules.
+    """
+    # Filled from the lowest priority to the highest one, the keywords come last as they win over macros of the same name.
+    token_types: dict[bytes, TokenType] = {}
+    for token_type, macros in ((TokenType.CASE_MACRO, case_macros),
+                               (TokenType.GAME_MACRO, game_macros),
+                               (TokenType.BUILTIN_MACRO, builtin_macros)):
+        for macro in macros:
+            token = macro.encode("utf-8")
+            if not _is_typed_before_macros(token):
+                token_types[token] = token_type
+    token_types.update(KEYWORD_TYPES)
+    return token_types
+
+
+def tokenize(script: bytes | str, token_types: dict[bytes, TokenType] = KEYWORD_TYPES,
+             line: int = 0, offset: int = 0) -> Iterator[Token]:
+    """
+    Splits a script into typed tokens, lazily. Whitespace isn't part of any token.
+    :param script: the script text, or a part of it starting at the beginning of a line.
+    :param token_types: the table from build_token_types() to recognize macros, by default only keywords are recognized.
+    :param line: the line number of the first line of script, to number lines in a part of a script.
+    :param offset: the byte offset of the start of script, to compute offsets in a part of a script.
+    """
+    if isinstance(script, str):
+        script = script.encode("utf-8")
+
+    # Keep track if a token is at the start of a line, to distinguish commands and parameters for the ones such as "fade" and "script":
+    is_first_of_line = True
+    for match in _TOKEN_REGEX.finditer(script):
+        token = match.group()
+        token_kind = match.lastgroup
+
+        if token_kind == "space":
+            line_endings = token.count(b"\n") + token.count(b"\r") - token.count(b"\r\n")
+            if line_endings:
+                line += line_endings
+                is_first_of_line = True
+            continue
+
+        if token_kind == "comment":
+            yield Token(TokenType.COMMENT, line, offset + match.start(), token)
+        else:
+            yield from _word_tokens(token, token_types, line, offset + match.start(), is_first_of_line)
+        is_first_of_line = False
+
+
+def _word_tokens(token: bytes, token_types: dict[bytes, TokenType], line: int, offset: int,
+                 is_first_of_line: bool = False) -> Iterator[Token]:
+    # Handle tokens ending with ?, except comments
+    if token.endswith(b"?") and len(token) > 1 and not token.startswith(_COMMENT_STARTS):
+        # Check if there are multiple question marks first
+        question_mark = token.find(b"?")
+
+        if token[question_mark + 1:question_mark + 2] != b"?":
+            # end of a ? conditional, process the token sans ?
+            yield from _word_tokens(token[:-1], token_types, line, offset)
+            # then the ? on its own
+            yield Token(TokenType.OPERATOR, line, offset + len(token) - 1, b"?")
+            return
+
+    # Proceed through the tokens normally, keywords and macros are all found with a single lookup
+    token_type = token_types.get(token)
+    if token_type is not None:
+        # If a command token can also be a parameter (such as "fade" and "script"),
+        # check if it is a the start of a line to know which one it is:
+        if token_type is TokenType.COMMAND and not is_first_of_line and token in _COMMAND_PARAMETERS:
+            token_type = TokenType.PARAMETER
+        yield Token(token_type, line, offset, token)
+    elif token.startswith(b"$") and _is_token_digits(token[1:]):
+        # e.g. $1, $2, engine-level, used for accessing macro args
+        yield Token(TokenType.VARIABLE, line, offset, token)
+    elif token.startswith(_NAMED_PARAMETERS):
+        # Divide the = section and then type the value on its own
+        param_name_length = token.index(b"=") + 1  # + 1 for the "="
+        yield Token(TokenType.PARAMETER, line, offset, token[:param_name_length])
+        if param_name_length < len(token):
+            yield from _word_tokens(token[param_name_length:], token_types, line, offset + param_name_length)
+    elif token.startswith(b"{") and b"}" in token and b" " in token:
+        yield from _macro_call_tokens(token, token_types, line, offset)
+    elif token == b"}" or token.startswith(b"{") and token.endswith(b"}"):
+        yield Token(TokenType.MACRO_CALL, line, offset, token)
+    elif token.startswith(_COMMENT_STARTS):
+        yield Token(TokenType.COMMENT, line, offset, token)
+    elif token.startswith(_QUOTES):
+        yield from _string_tokens(token, line, offset)
+    elif _is_token_number(token):
+        yield Token(TokenType.NUMBER, line, offset, token)
+    elif token:
+        yield Token(TokenType.TEXT, line, offset, token)
+
+
+def _macro_call_tokens(token: bytes, token_types: dict[bytes, TokenType], line: int, offset: int) -> Iterator[Token]:
+    # macro call with a parameter
+
+    # split token to make sure there is not more than one macro call
+    token_parts = token.split(b"}")
+    subtokens = [part + b"}" for part in token_parts[:-1]]
+    if token_parts[-1]:
+        subtokens.append(token_parts[-1])
+
+    if len(subtokens) > 1:
+        # process all tokens separately
+        for subtoken in subtokens:
+            yield from _word_tokens(subtoken, token_types, line, offset)
+            offset += len(subtoken)
+        return
+
+    token_split = token.split(b" ")
+    for tokenpiece in token_split:
+        # first token is always the macro
+        if tokenpiece == token_split[0]:
+            yield Token(TokenType.MACRO_CALL, line, offset, tokenpiece)
+        # last token needs special handling for the closing bracket
+        elif tokenpiece.endswith(b"}"):
+            # process the last token sans bracket
+            yield from _word_tokens(tokenpiece[:-1], token_types, line, offset)
+            # then the bracket by itself
+            yield Token(TokenType.MACRO_CALL, line, offset + len(tokenpiece) - 1, b"}")
+        # middle tokens get processed normally
+        else:
+            yield from _word_tokens(tokenpiece, token_types, line, offset)
+        offset += len(tokenpiece) + 1   # + 1 for the space
+
+
+def _string_tokens(text: bytes, line: int, offset: int) -> Iterator[Token]:
+    # Note: text should have a " at start.
+    # Everything is part of the string, except for the {} tokens
+    for match in _STRING_PART_REGEX.finditer(text):
+        token_type = TokenType.STRING_TOKEN if match.lastgroup == "token" else TokenType.STRING
+        yield Token(token_type, line, offset + match.start(), match.group())
@@ -0,0 +1,147 @@
+# Holds the macros known in one PyWright game
+# A single table is shared by all the editors of the game, each one seeing it through the view of its case
+
+from dataclasses import dataclass
+
+from .PyWrightScriptTokenizer import TokenType, build_token_types
+
+
+@dataclass(frozen=True)
+class MacroSignature:
+    """What is known about a macro from its definition, for autocompletion and tooltips."""
+    name: str
+    file_path: str = ""                 # Empty if unknown
+    line: int = 0                       # Line of the "macro" line, starting from 1 (0 if unknown)
+    argument_count: int = 0             # Highest $1, $2... argument used in the body
+    variables: tuple[str, ...] = ()     # Other variables the body reads without setting them, probably named arguments
+    body_length: int = 0                # Number of lines between "macro" and "endmacro"
+
+
+class PyWrightSymbolTable:
+    """
+    Holds the builtin, game and case macros of one PyWright game.
+    Every change increases the version counter, and records which part of the table changed at which version,
+    so that each case view can tell if the symbols it uses changed without comparing any list.
+    Setting the same macros again keeps the version, so that nothing gets restyled for nothing.
+    """
+
+    def __init__(self):
+        self.version: int = 0
+        self.builtin_signatures: tuple[MacroSignature, ...] = ()
+        self.game_signatures: tuple[MacroSignature, ...] = ()
+        self._case_signatures: dict[str, tuple[MacroSignature, ...]] = {}
+
+        # Only the names, for the lexers
+        self.builtin_macros: tuple[str, ...] = ()
+        self.game_macros: tuple[str, ...] = ()
+        self._case_macros: dict[str, tuple[str, ...]] = {}
+
+        # Version at which each part of the table last changed
+        self._builtin_macros_version: int = 0
+        self._game_macros_version: int = 0
+        self._case_macros_versions: dict[str, int] = {}
+
+        self._case_views: dict[str, PyWrightCaseSymbols] = {}
+
+    def set_builtin_macros(self, builtin_macros: list[MacroSignature]):
+        if tuple(builtin_macros) == self.builtin_signatures:
+            return
+        self.version += 1
+        self.builtin_signatures = tuple(builtin_macros)
+        self.builtin_macros = tuple(signature.name for signature in builtin_macros)
+        self._builtin_macros_version = self.version
+
+    def set_game_macros(self, game_macros: list[MacroSignature]):
+        if tuple(game_macros) == self.game_signatures:
+            return
+        self.version += 1
+        self.game_signatures = tuple(game_macros)
+        self.game_macros = tuple(signature.name for signature in game_macros)
+        self._game_macros_version = self.version
+
+    def set_case_macros(self, case_name: str, case_macros: list[MacroSignature]):
+        if case_name in self._case_signatures and tuple(case_macros) == self._case_signatures[case_name]:
+            return
+        self.version += 1
+        self._case_signatures[case_name] = tuple(case_macros)
+        self._case_macros[case_name] = tuple(signature.name for signature in case_macros)
+        self._case_macros_versions[case_name] = self.version
+
+    def get_case_macros(self, case_name: str) -> tuple[str, ...]:
+        return self._case_macros.get(case_name, ())
+
+    def get_case_signatures(self, case_name: str) -> tuple[MacroSignature, ...]:
+        return self._case_signatures.get(case_name, ())
+
+    def get_case_names(self) -> list[str]:
+        return list(self._case_macros)
+
+    def get_case_version(self, case_name: str) -> int:
+        """Returns the version at which the symbols seen from the given case last changed."""
+        return max(self._builtin_macros_version, self._game_macros_version,
+                   self._case_macros_versions.get(case_name, 0))
+
+    def case_view(self, case_name: str) -> 'PyWrightCaseSymbols':
+        """Returns the symbols seen by the scripts of a case. The same view is returned for every call with the same case."""
+        if case_name not in self._case_views:
+            self._case_views[case_name] = PyWrightCaseSymbols(self, case_name)
+        return self._case_views[case_name]
+
+    def clear(self):
+        self.set_builtin_macros([])
+        self.set_game_macros([])
+        for case_name in self.get_case_names():
+            self.set_case_macros(case_name, [])
+
+
+class PyWrightCaseSymbols:
+    """
+    The symbols seen by the scripts of one case: the builtin and game macros, plus the macros of that case.
+    Scripts outside any case get a view of a case without macros.
+    """
+
+    def __init__(self, symbol_table: PyWrightSymbolTable, case_name: str):
+        self.symbol_table = symbol_table
+        self.case_name = case_name
+
+        self._token_types: dict[bytes, TokenType] | None = None
+        self._token_types_version: int = -1
+        self._signatures: dict[str, MacroSignature] | None = None
+        self._signatures_version: int = -1
+
+    @property
+    def version(self) -> int:
+        return self.symbol_table.get_case_version(self.case_name)
+
+    @property
+    def builtin_macros(self) -> tuple[str, ...]:
+        return self.symbol_table.builtin_macros
+
+    @property
+    def game_macros(self) -> tuple[str, ...]:
+        return self.symbol_table.game_macros
+
+    @property
+    def case_macros(self) -> tuple[str, ...]:
+        return self.symbol_table.get_case_macros(self.case_name)
+
+    def get_token_types(self) -> dict[bytes, TokenType]:
+        """Returns the token type table of these symbols, only rebuilt when they changed."""
+        version = self.version
+        if self._token_types is None or self._token_types_version != version:
+            self._token_types = build_token_types(self.builtin_macros, self.game_macros, self.case_macros)
+            self._token_types_version = version
+        return self._token_types
+
+    def get_signatures(self) -> dict[str, MacroSignature]:
+        """Returns the signature of each macro by name, only rebuilt when the symbols changed."""
+        version = self.version
+        if self._signatures is None or self._signatures_version != version:
+            # Like in the engine, case macros override game macros, which override builtin macros
+            self._signatures = {signature.name: signature
+                                for signatures in (self.symbol_table.builtin_signatures,
+                                                   self.symbol_table.game_signatures,
+                                                   self.symbol_table.get_case_signatures(self.case_name))
+                                for signature in signatures}
+            self._signatures_version = version
+        return self._signatures
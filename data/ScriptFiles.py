@@ -0,0 +1,151 @@
+# The scripts of a PyWright game: where they are, how the engine finds the one a script loads,
+# and what was read from each of them, read again only when they change
+# Shared by the project index, the linter, the asset references and the script flow
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Generic, TypeVar
+
+log = logging.getLogger(__name__)
+
+# Scripts are .txt files, macro files hold script code as well
+SCRIPT_SUFFIXES = (".txt", ".mcro")
+_MAX_READING_THREADS = 8
+
+# What is read from each script
+T = TypeVar("T")
+
+
+def list_game_scripts(game_path: Path, case_names: list[str]) -> list[Path]:
+    """Lists the scripts and macro files of the game folder and of its case folders."""
+    result = []
+    for folder_path in [Path(game_path)] + [Path(game_path) / case_name for case_name in case_names]:
+        if folder_path.is_dir():
+            result += [file_path for file_path in folder_path.iterdir()
+                       if file_path.suffix in SCRIPT_SUFFIXES and file_path.is_file()]
+    return result
+
+
+def get_file_stamp(key: str, open_file_data: dict[str, bytes]) -> tuple | None:
+    """Returns what changes when a file changes: the hash of its contents if it is open in an editor,
+    its modification time and size otherwise.
+        :param key: The absolute path of the file
+        :param open_file_data: The contents of the files open in editors by absolute path
+        :return: The stamp, or None if the file can't be found"""
+    data = open_file_data.get(key)
+    if data is not None:
+        return "open", hash(data)
+    try:
+        file_stat = os.stat(key)
+    except OSError:
+        return None
+    return "file", file_stat.st_mtime_ns, file_stat.st_size
+
+
+def find_script(name: str, from_file_path: str, game_path: Path | str, exists: Callable[[str], bool]) -> str | None:
+    """Returns the absolute path of the script a script or include command loads, like the engine looks for it:
+    in the folder of the current script, then in the game folder, with the .txt extension or as written.
+        :param name: The name of the script, as written after the command
+        :param from_file_path: The path of the script running the command
+        :param game_path: Path to the game folder
+        :param exists: Tells whether there is a script at an absolute path, such as os.path.isfile
+        :return: The path of the script, or None if there is none"""
+    for folder_path in (os.path.dirname(os.path.abspath(from_file_path)), os.path.abspath(game_path)):
+        for file_name in (name + ".txt", name):
+            file_path = os.path.join(folder_path, file_name)
+            if exists(file_path):
+                return file_path
+    return None
+
+
+def is_literal_name(name: str) -> bool:
+    """Returns whether a name of a script, label or macro is written as is.
+    Names built from variables or macro arguments are only known when the game runs."""
+    return "$" not in name and "{" not in name
+
+
+class ScriptCache(Generic[T]):
+    """
+    Holds what was read from each script of a game by absolute path, along with the stamp of the script when it was read.
+    update() only reads again the scripts that changed, in parallel.
+    All the methods can be called from any thread.
+    """
+
+    def __init__(self, description: str):
+        """
+            :param description: What reading is, for the log, such as "Read the flow of" in "Read the flow of 3 scripts"
+        """
+        self.version: int = 0   # Increased whenever a script is read again or forgotten
+
+        self._description = description
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple[tuple, T]] = {}
+
+    def update(self, file_paths: list[Path | str], open_file_data: dict[str, bytes] | None,
+               read_script: Callable[[str, bytes], T], is_up_to_date: Callable[[T], bool] | None = None,
+               max_reading_threads: int = _MAX_READING_THREADS) -> dict[str, T]:
+        """Reads the given scripts again if they changed, and forgets the scripts that aren't given anymore.
+            :param file_paths: The scripts of the game
+            :param open_file_data: The contents of the files open in editors by absolute path, read instead of the files
+            :param read_script: Reads a script from its absolute path and its contents, called from worker threads.
+            A script that can't be read is given as empty.
+            :param is_up_to_date: Tells whether what was read from a script that didn't change is still right,
+            such as when it depends on other files. By default, it always is
+            :param max_reading_threads: The number of scripts read at once
+            :return: What was read from each script by absolute path"""
+        start_time = time.perf_counter()
+        open_file_data = open_file_data if open_file_data is not None else {}
+        stamps = {}
+        for file_path in file_paths:
+            key = os.path.abspath(file_path)
+            stamp = get_file_stamp(key, open_file_data)
+            if stamp is not None:
+                stamps[key] = stamp
+
+        with self._lock:
+            removed_paths = set(self._entries) - set(stamps)
+            for key in removed_paths:
+                del self._entries[key]
+            changed_paths = [key for key, stamp in stamps.items()
+                             if key not in self._entries or self._entries[key][0] != stamp
+                             or (is_up_to_date is not None and not is_up_to_date(self._entries[key][1]))]
+            if removed_paths:
+                self.version += 1
+
+        def read_file(key: str) -> T:
+            script = open_file_data.get(key)
+            if script is None:
+                try:
+                    with open(key, "rb") as f:
+                        script = f.read()
+                except OSError as e:
+                    log.warning("Could not read %s: %s", key, e)
+                    script = b""
+            return read_script(key, script)
+
+        with ThreadPoolExecutor(max_workers=max(1, max_reading_threads)) as executor:
+            values = list(executor.map(read_file, changed_paths))
+
+        with self._lock:
+            self._entries.update((key, (stamps[key], value)) for key, value in zip(changed_paths, values))
+            if changed_paths:
+                self.version += 1
+            result = {key: self._entries[key][1] for key in stamps if key in self._entries}
+
+        if changed_paths:
+            log.info("%s %d scripts in %.3f s", self._description, len(changed_paths), time.perf_counter() - start_time)
+        return result
+
+    def get_values(self) -> dict[str, T]:
+        """Returns what was read from each script of the last update by absolute path."""
+        with self._lock:
+            return {key: value for key, (stamp, value) in self._entries.items()}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.version += 1
@@ -0,0 +1,389 @@
+# The control flow of a PyWright game: which scripts and labels can be reached from the intro.txt of each case
+# Scripts are summarized once per change, and the graph is only analyzed again when a summary changed.
+
+import bisect
+import logging
+import os
+import re
+import threading
+import time
+from enum import Enum, auto
+from pathlib import Path
+from typing import NamedTuple
+
+from .PyWrightProjectIndex import SymbolKind, read_symbols
+from .ScriptFiles import ScriptCache, find_script, is_literal_name
+
+log = logging.getLogger(__name__)
+
+_MAX_READING_THREADS = 8
+_ENTRY_SCRIPT_NAME = "intro.txt"
+# Files the engine loads by itself, which no script needs to jump to
+_ENGINE_SCRIPT_NAMES = frozenset(("data.txt", "evidence.txt", "case_screen.txt", "macros.txt", "menu.txt",
+                                  "menu.script.txt"))
+# Commands after which the lines below are only run when jumped to, unless the command itself is conditional
+_TERMINATING_COMMANDS = frozenset((b"goto", b"exit", b"endscript"))
+_LABEL_JUMP_PARAMETER_REGEX = re.compile(rb"(?:^|\s)(?:result|fail|label|jumpto)=")
+
+
+class JumpKind(Enum):
+    GOTO = auto()       # To a label: goto, conditional commands, result=, fail=, region...
+    SCRIPT = auto()
+    INCLUDE = auto()
+
+
+class Jump(NamedTuple):
+    kind: JumpKind
+    target: str         # Name of the label or script, as written
+    command: str        # The command jumping, such as "goto" or "present"
+    line: int           # Starting from 0
+    column: int         # In UTF-8 bytes from the start of the line, not characters
+
+
+class Label(NamedTuple):
+    name: str
+    line: int
+    column: int
+
+
+class _FileFlow(NamedTuple):
+    """What the graph needs to know about one file, read again only when the file changes."""
+    labels: list[Label]
+    jumps: list[Jump]
+    terminating_lines: list[int]    # Lines that can't be followed by the next one
+    # Lines jumping to a label chosen when the game runs, such as present without result= jumping to the evidence name
+    open_jump_lines: list[int]
+    # Labels the engine jumps to by itself, such as the "press" and evidence labels of cross examinations
+    engine_label_names: frozenset[str]
+
+
+def _read_file_flow(script: bytes, file_path: str) -> _FileFlow:
+    lines = script.splitlines()
+
+    def command_of(line: int) -> bytes:
+        words = lines[line].split(None, 1)
+        return words[0] if words else b""
+
+    labels = []
+    jumps = []
+    engine_label_names = set()
+    for symbol in read_symbols(script, file_path):
+        if symbol.kind is SymbolKind.LABEL:
+            if symbol.is_definition:
+                labels.append(Label(symbol.name, symbol.line, symbol.column))
+                # "label press 1" and the like are jumped to by cross examinations
+                if len(lines[symbol.line].split()) > 2:
+                    engine_label_names.add(symbol.name)
+            else:
+                jumps.append(Jump(JumpKind.GOTO, symbol.name, command_of(symbol.line).decode("utf-8", "replace"),
+                                  symbol.line, symbol.column))
+        elif symbol.kind is SymbolKind.SCRIPT and not symbol.is_definition:
+            command = command_of(symbol.line)
+            jumps.append(Jump(JumpKind.INCLUDE if command == b"include" else JumpKind.SCRIPT, symbol.name,
+                              command.decode("utf-8", "replace"), symbol.line, symbol.column))
+
+    terminating_lines = []
+    open_jump_lines = []
+    is_in_macro = False
+    is_conditional = False
+    for line_number, line in enumerate(lines):
+        words = line.split()
+        if not words or words[0].startswith(b"#"):
+            continue
+        command = words[0]
+        if command == b"macro":
+            is_in_macro = True
+        elif command == b"endmacro":
+            is_in_macro = False
+        elif not is_in_macro:
+            if command == b"region" and len(words) > 5:
+                jumps.append(Jump(JumpKind.GOTO, words[-1].decode("utf-8", "replace"), "region", line_number,
+                                  line.rfind(words[-1])))
+            elif command == b"present" and not _LABEL_JUMP_PARAMETER_REGEX.search(line):
+                open_jump_lines.append(line_number)
+            elif not is_conditional and (command in _TERMINATING_COMMANDS
+                                         or (command == b"script" and b"stack" not in words[2:])):
+                terminating_lines.append(line_number)
+        # "flag name ?" only runs the next line if the flag is set
+        is_conditional = words[-1] == b"?"
+
+    jumps.sort(key=lambda jump: (jump.line, jump.column))
+    return _FileFlow(labels, jumps, terminating_lines, open_jump_lines, frozenset(engine_label_names))
+
+
+class FlowProblemKind(Enum):
+    UNREACHABLE_SCRIPT = auto()
+    UNREACHABLE_LABEL = auto()
+    INCLUDE_CYCLE = auto()
+    DANGLING_JUMP = auto()
+
+
+class FlowProblem(NamedTuple):
+    kind: FlowProblemKind
+    message: str
+    file_path: str
+    line: int
+    column: int
+
+
+class FlowSegment(NamedTuple):
+    """The lines of a script from its start or from one of its labels, up to the next label."""
+    label: Label | None                 # None for the start of the script
+    jumps: list[tuple[Jump, tuple[str, int, int] | None]]  # With the (file path, line, column) they lead to, if found
+    is_reachable: bool
+
+
+class ScriptFlow:
+    """
+    The analyzed flow graph of a game: scripts and labels are the nodes, jumps and falling through a label the edges.
+    Jumps to labels or scripts built from variables can't be followed, so the scripts having them get all their labels
+    counted as reachable, and their cases all their scripts.
+    """
+
+    def __init__(self, entry_points: dict[str, str], segments: dict[str, list[FlowSegment]],
+                 reachable_file_paths: set[str], problems: list[FlowProblem]):
+        self.entry_points = entry_points            # The intro.txt of each case (and of the game), by case name
+        self.segments = segments                    # By absolute path of the script
+        self.reachable_file_paths = reachable_file_paths
+        self.problems = problems                    # By file, line and column
+
+
+class ScriptFlowGraph:
+    """
+    Holds the flow of the scripts of a game, by file.
+    update() reads again the files that changed, and get_flow() analyzes the graph again only if one did.
+    All the methods can be called from any thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._scripts: ScriptCache[_FileFlow] = ScriptCache("Read the flow of")
+        self._flow: ScriptFlow | None = None
+        self._flow_key: tuple | None = None
+
+    def update(self, file_paths: list[Path | str], open_file_data: dict[str, bytes] | None = None,
+               max_reading_threads: int = _MAX_READING_THREADS):
+        """Reads the flow of the given files again if they changed, and forgets the files that aren't given anymore.
+            :param file_paths: The scripts and macro files of the game
+            :param open_file_data: The contents of the files open in editors by absolute path, used instead of the files
+            :return: None"""
+        self._scripts.update(file_paths, open_file_data, lambda key, script: _read_file_flow(script, key),
+                             max_reading_threads=max_reading_threads)
+
+    def get_flow(self, game_path: Path | str, case_names: list[str]) -> ScriptFlow:
+        """Returns the flow graph of the files of the last update, analyzed again only if a file changed since."""
+        # The version is taken before the flows, so that flows newer than it are analyzed again next time, not older ones
+        key = (os.path.abspath(game_path), tuple(case_names), self._scripts.version)
+        flows = self._scripts.get_values()
+        with self._lock:
+            if self._flow is None or self._flow_key != key:
+                self._flow = _analyze(flows, key[0], case_names)
+                self._flow_key = key
+            return self._flow
+
+    def clear(self):
+        self._scripts.clear()
+        with self._lock:
+            self._flow = None
+
+
+def _analyze(flows: dict[str, _FileFlow], game_path: str, case_names: list[str]) -> ScriptFlow:
+    start_time = time.perf_counter()
+    scripts = {path: flow for path, flow in flows.items() if path.endswith(".txt")}
+
+    def find_script_path(name: str, from_file_path: str) -> str | None:
+        return find_script(name, from_file_path, game_path, scripts.__contains__)
+
+    # Included scripts are inserted in the script, along with their labels, and can jump to the labels around them
+    includes: dict[str, list[tuple[Jump, str]]] = {}
+    included_by: dict[str, list[str]] = {}
+    for path, flow in scripts.items():
+        for jump in flow.jumps:
+            target = find_script_path(jump.target, path) if jump.kind is JumpKind.INCLUDE else None
+            if target is not None:
+                includes.setdefault(path, []).append((jump, target))
+                included_by.setdefault(target, []).append(path)
+
+    include_targets = {path: [target for _, target in path_includes] for path, path_includes in includes.items()}
+
+    def get_scope(path: str, links: dict[str, list[str]]) -> list[str]:
+        # The script, then the ones linked to it, recursively
+        scope = [path]
+        for scope_path in scope:
+            scope += [link for link in links.get(scope_path, ()) if link not in scope]
+        return scope
+
+    label_locations: dict[str, dict[str, tuple[str, int, int]]] = {}
+    for path in scripts:
+        locations = {}
+        for scope_path in reversed(get_scope(path, include_targets)):
+            locations.update((label.name, (scope_path, label.line, label.column)) for label in scripts[scope_path].labels)
+        label_locations[path] = locations
+
+    def find_labels(name: str, from_file_path: str) -> list[tuple[str, int, int]]:
+        location = label_locations[from_file_path].get(name)
+        if location is not None:
+            return [location]
+        return [label_locations[path][name] for path in get_scope(from_file_path, included_by)[1:]
+                if name in label_locations[path]]
+
+    # Macros jump to the labels of the scripts calling them, and can run scripts from anywhere
+    macro_label_names = set()
+    entry_paths = set()
+    dynamic_folders = set()     # Folders whose scripts are all counted as reachable
+    for path, flow in flows.items():
+        if path.endswith(".mcro"):
+            for jump in flow.jumps:
+                if jump.kind is JumpKind.GOTO:
+                    macro_label_names.add(jump.target)
+                elif not is_literal_name(jump.target):
+                    dynamic_folders.add(os.path.dirname(path))
+                elif find_script_path(jump.target, path) is not None:
+                    entry_paths.add(find_script_path(jump.target, path))
+
+    entry_points = {}
+    for case_name in [""] + list(case_names):
+        entry_path = os.path.join(game_path, case_name, _ENTRY_SCRIPT_NAME) if case_name \
+            else os.path.join(game_path, _ENTRY_SCRIPT_NAME)
+        if entry_path in scripts:
+            entry_points[case_name] = entry_path
+    entry_paths.update(entry_points.values())
+    entry_paths.update(path for path in scripts if os.path.basename(path) in _ENGINE_SCRIPT_NAMES)
+
+    # Each script is split in segments, from its start and from each of its labels to the next label
+    segment_labels = {path: [None] + sorted(flow.labels, key=lambda label: label.line) for path, flow in scripts.items()}
+
+    segment_lines = {path: [label.line for label in labels[1:]] for path, labels in segment_labels.items()}
+
+    def segment_index(path: str, line: int) -> int:
+        return bisect.bisect_right(segment_lines[path], line)
+
+    segment_jumps: dict[str, list[list[tuple[Jump, list[tuple[str, int, int]]]]]] = {}
+    for path, flow in scripts.items():
+        file_segment_jumps = [[] for _ in segment_labels[path]]
+        for jump in flow.jumps:
+            if not is_literal_name(jump.target):
+                locations = []
+            elif jump.kind is JumpKind.GOTO:
+                locations = find_labels(jump.target, path)
+            else:
+                target = find_script_path(jump.target, path)
+                locations = [(target, 0, 0)] if target is not None else []
+            file_segment_jumps[segment_index(path, jump.line)].append((jump, locations))
+        segment_jumps[path] = file_segment_jumps
+
+    # Scripts named after a script, such as office.examine.txt for office.txt, are run by its investigation
+    companion_paths: dict[str, list[str]] = {}
+    for path in scripts:
+        name = os.path.basename(path)
+        if name.count(".") > 1:
+            main_path = os.path.join(os.path.dirname(path), name.split(".", 1)[0] + ".txt")
+            companion_paths.setdefault(main_path, []).append(path)
+
+    pending = [(path, 0) for path in entry_paths]
+    reachable_segments = set()
+    while pending:
+        node = pending.pop()
+        if node in reachable_segments:
+            continue
+        reachable_segments.add(node)
+        path, index = node
+        flow = scripts[path]
+        labels = segment_labels[path]
+
+        if index == 0:
+            pending += [(companion_path, 0) for companion_path in companion_paths.get(path, ())]
+            # Labels the engine or macros jump to
+            for name, location in label_locations[path].items():
+                if name in macro_label_names or name in scripts[location[0]].engine_label_names:
+                    pending.append((location[0], segment_index(*location[:2])))
+
+        is_open = any(segment_index(path, line) == index for line in flow.open_jump_lines)
+        for jump, locations in segment_jumps[path][index]:
+            if is_literal_name(jump.target):
+                pending += [(location[0], segment_index(*location[:2])) for location in locations]
+            elif jump.kind is JumpKind.GOTO:
+                is_open = True
+            else:
+                dynamic_folders.add(os.path.dirname(path))
+        if is_open:
+            pending += [(location[0], segment_index(*location[:2])) for location in label_locations[path].values()]
+
+        # Falls through the next label, unless the segment ends the flow before it
+        if index + 1 < len(labels) and not any(segment_index(path, line) == index for line in flow.terminating_lines):
+            pending.append((path, index + 1))
+
+    reachable_file_paths = {path for path, _ in reachable_segments}
+    reachable_file_paths.update(path for path in scripts if os.path.dirname(path) in dynamic_folders)
+
+    problems = []
+    segments = {}
+    for path in sorted(scripts):
+        is_reachable_file = path in reachable_file_paths
+        is_dynamic_folder = os.path.dirname(path) in dynamic_folders
+        file_segments = []
+        for index, label in enumerate(segment_labels[path]):
+            is_reachable = (path, index) in reachable_segments or is_dynamic_folder
+            jumps = [(jump, locations[0] if locations else None) for jump, locations in segment_jumps[path][index]]
+            file_segments.append(FlowSegment(label, jumps, is_reachable))
+
+            if label is not None and is_reachable_file and not is_reachable:
+                problems.append(FlowProblem(FlowProblemKind.UNREACHABLE_LABEL, "Label {} is never reached".format(
+                    label.name), path, label.line, label.column))
+            for jump, location in jumps:
+                if location is None and is_literal_name(jump.target):
+                    problems.append(FlowProblem(FlowProblemKind.DANGLING_JUMP, "{} leads to no {} {}".format(
+                        jump.command, "label" if jump.kind is JumpKind.GOTO else "script", jump.target),
+                        path, jump.line, jump.column))
+        segments[path] = file_segments
+
+        if not is_reachable_file:
+            problems.append(FlowProblem(FlowProblemKind.UNREACHABLE_SCRIPT, "Script {} is never run".format(
+                os.path.relpath(path, game_path)), path, 0, 0))
+
+    problems += _find_include_cycles(includes)
+    problems.sort(key=lambda problem: (problem.file_path, problem.line, problem.column))
+    log.info("Analyzed the flow of %d scripts in %.3f s", len(scripts), time.perf_counter() - start_time)
+    return ScriptFlow(entry_points, segments, reachable_file_paths, problems)
+
+
+def _find_include_cycles(includes: dict[str, list[tuple[Jump, str]]]) -> list[FlowProblem]:
+    # Scripts including each other end up including themselves forever
+    def reach(path: str) -> set[str]:
+        result = set()
+        pending = [path]
+        while pending:
+            for _, target in includes.get(pending.pop(), ()):
+                if target not in result:
+                    result.add(target)
+                    pending.append(target)
+        return result
+
+    reached = {path: reach(path) for path in includes}
+    problems = []
+    reported_paths = set()
+    for path in sorted(includes):
+        if path not in reached[path] or path in reported_paths:
+            continue
+        cycle_paths = {other_path for other_path in reached[path] if path in reached.get(other_path, ())}
+        reported_paths.update(cycle_paths)
+
+        # Shortest way back to the script, to show the cycle in order
+        previous: dict[str, tuple[str, Jump]] = {}
+        pending = [path]
+        while path not in previous:
+            next_pending = []
+            for pending_path in pending:
+                for jump, target in includes.get(pending_path, ()):
+                    if target in cycle_paths and target not in previous:
+                        previous[target] = (pending_path, jump)
+                        next_pending.append(target)
+            pending = next_pending
+        chain = [path]
+        while len(chain) == 1 or chain[-1] != path:
+            chain.append(previous[chain[-1]][0])
+        chain.reverse()
+        first_jump = next(jump for jump, target in includes[path] if target == chain[1])
+        problems.append(FlowProblem(FlowProblemKind.INCLUDE_CYCLE, "Include cycle: {}".format(
+            " -> ".join(os.path.basename(chain_path) for chain_path in chain)), path, first_jump.line, first_jump.column))
+    return problems
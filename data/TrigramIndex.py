@@ -0,0 +1,372 @@
+# A trigram index of the scripts of a game folder, saved between sessions, to search a game without reading all its files
+# Each file is indexed by the sequences of 3 bytes it contains, so only the files containing all the trigrams of a search
+# need to be read. Files that didn't change (same modification time and size) are not read again when updating the index.
+
+import hashlib
+import logging
+import os
+import re
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+try:
+    from re import _parser as _regex_parser
+except ImportError:
+    # Python 3.10
+    import sre_parse as _regex_parser
+
+from . import IDESettings
+from .ProjectSearch import list_script_files
+
+log = logging.getLogger(__name__)
+
+_INDEX_FOLDER_NAME = "trigram_indexes"
+_INDEX_FILE_MAGIC = b"PWTI"
+_INDEX_FORMAT_VERSION = 1
+_MAX_INDEXING_THREADS = 8
+
+# Header: magic, version, file count, trigram count
+_HEADER_STRUCT = struct.Struct("<4sIII")
+# Each file: id, modification time in ns, size, length of the relative path, length of the trigrams
+_FILE_STRUCT = struct.Struct("<IqqII")
+# Each trigram: the trigram, length of the bitmap of the files containing it
+_TRIGRAM_STRUCT = struct.Struct("<3sI")
+
+_REPEAT_OPCODES = tuple(getattr(_regex_parser, name) for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+                        if hasattr(_regex_parser, name))
+_ZERO_WIDTH_OPCODES = (_regex_parser.AT, _regex_parser.ASSERT, _regex_parser.ASSERT_NOT)
+
+
+class _IndexedFile(NamedTuple):
+    file_id: int            # Bit of the file in the trigram bitmaps
+    modification_time: int  # In ns
+    size: int
+    trigrams: bytes         # All the distinct trigrams of the file, sorted and joined
+
+
+def get_trigrams(data: bytes) -> bytes:
+    """Returns the distinct trigrams of some data, sorted and joined. The data is lowercased first (ASCII letters only,
+    like the searches ignoring the case), so the same trigrams serve searches matching the case and ignoring it."""
+    data = data.lower()
+    return b"".join(sorted({data[i:i + 3] for i in range(len(data) - 2)}))
+
+
+def get_required_literals(pattern: re.Pattern) -> list:
+    """Returns the texts that every match of a pattern contains, lowercased, so that files lacking one can be skipped.
+    Each item is either some bytes, or a list of alternatives (one per branch of a | ) holding lists of items in turn.
+    An empty list means that nothing is known about the matches."""
+    try:
+        parsed_pattern = _regex_parser.parse(pattern.pattern, pattern.flags)
+    except Exception:
+        # The pattern compiled, so this only happens if the parser of this Python version differs
+        return []
+    return _read_required_literals(parsed_pattern, isinstance(pattern.pattern, bytes),
+                                   bool(pattern.flags & re.IGNORECASE))
+
+
+def _read_required_literals(items, is_bytes: bool, ignore_case: bool) -> list:
+    result = []
+    literal = bytearray()
+
+    def end_literal():
+        if len(literal) >= 3:
+            result.append(bytes(literal).lower())
+        literal.clear()
+
+    for opcode, argument in items:
+        # Ignoring the case of non-ASCII characters can match other bytes than the lowercased ones
+        if opcode is _regex_parser.LITERAL and (is_bytes or not ignore_case or argument < 128):
+            literal.extend(bytes([argument]) if is_bytes else chr(argument).encode("utf-8"))
+            continue
+        if opcode in _ZERO_WIDTH_OPCODES:
+            # Assertions don't consume anything, the texts before and after them are still next to each other
+            continue
+
+        end_literal()
+        if opcode is _regex_parser.SUBPATTERN:
+            _group, add_flags, del_flags, sub_items = argument
+            sub_ignore_case = (ignore_case or bool(add_flags & re.IGNORECASE)) and not del_flags & re.IGNORECASE
+            result += _read_required_literals(sub_items, is_bytes, sub_ignore_case)
+        elif opcode in _REPEAT_OPCODES:
+            minimum, _maximum, sub_items = argument
+            if minimum > 0:
+                result += _read_required_literals(sub_items, is_bytes, ignore_case)
+        elif opcode is _regex_parser.BRANCH:
+            branches = [_read_required_literals(branch, is_bytes, ignore_case) for branch in argument[1]]
+            # A branch that can match anything makes the whole alternative useless
+            if all(branches):
+                result.append(branches)
+    end_literal()
+    return result
+
+
+class TrigramIndex:
+    """
+    Maps each trigram to a bitmap of the files containing it, in one folder and its subfolders.
+    update() indexes the files that changed since the last update, find_candidate_files() then gives the files
+    that can contain a match of a search. The index is loaded from its file the first time it's needed.
+    All the methods can be called from any thread.
+    """
+
+    def __init__(self, folder_path: Path, index_file_path: Path):
+        self.folder_path = Path(os.path.abspath(folder_path))
+        self.index_file_path = index_file_path
+
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()    # Only one update at a time, searches can run meanwhile
+        self._is_loaded = False
+        self._is_modified = False
+        # Files by their path relative to the folder, in the POSIX format
+        self._files: dict[str, _IndexedFile] = {}
+        self._paths_by_id: dict[int, str] = {}
+        self._free_ids: list[int] = []
+        # Bit n of the bitmap of a trigram is set when the file of id n contains it
+        self._bitmaps: dict[bytes, bytearray] = {}
+
+    def update(self, max_indexing_threads: int = _MAX_INDEXING_THREADS) -> int:
+        """Indexes the files that are new or changed since the last update, and forgets the removed ones.
+            :return: The number of indexed and forgotten files"""
+        with self._update_lock:
+            start_time = time.perf_counter()
+            self._load()
+
+            changed_paths = []
+            current_paths = set()
+            for file_path in list_script_files(self.folder_path):
+                relative_path = file_path.relative_to(self.folder_path).as_posix()
+                current_paths.add(relative_path)
+                try:
+                    file_stat = os.stat(file_path)
+                except OSError:
+                    continue
+                indexed_file = self._files.get(relative_path)
+                if indexed_file is None or indexed_file.modification_time != file_stat.st_mtime_ns \
+                        or indexed_file.size != file_stat.st_size:
+                    changed_paths.append(relative_path)
+            removed_paths = [relative_path for relative_path in self._files if relative_path not in current_paths]
+
+            with ThreadPoolExecutor(max_workers=max(1, max_indexing_threads)) as executor:
+                read_files = list(executor.map(self._read_file, changed_paths))
+
+            with self._lock:
+                for relative_path in removed_paths:
+                    self._remove_file_locked(relative_path)
+                for relative_path, read_file in zip(changed_paths, read_files):
+                    self._remove_file_locked(relative_path)
+                    if read_file is not None:
+                        self._add_file_locked(relative_path, *read_file)
+                if changed_paths or removed_paths:
+                    self._is_modified = True
+
+            if changed_paths or removed_paths:
+                log.info("Indexed the trigrams of %d files in %.3f s", len(changed_paths) + len(removed_paths),
+                         time.perf_counter() - start_time)
+            return len(changed_paths) + len(removed_paths)
+
+    def find_candidate_files(self, pattern: re.Pattern) -> list[Path]:
+        """Returns the indexed files that may contain a match of a pattern. The others surely don't.
+            :param pattern: A compiled pattern, of bytes or str
+            :return: The absolute paths of the files"""
+        literals = get_required_literals(pattern)
+        with self._lock:
+            all_files_bitmap = sum(1 << indexed_file.file_id for indexed_file in self._files.values())
+            candidates_bitmap = all_files_bitmap & self._get_literals_bitmap_locked(literals, all_files_bitmap)
+            file_ids = [file_id for file_id, bit in enumerate(reversed(bin(candidates_bitmap)[2:])) if bit == "1"]
+            return [self.folder_path / self._paths_by_id[file_id] for file_id in file_ids]
+
+    def get_file_paths(self) -> list[Path]:
+        """Returns the absolute paths of all the indexed files."""
+        with self._lock:
+            return [self.folder_path / relative_path for relative_path in self._files]
+
+    def save(self):
+        """Writes the index file, if anything changed since it was loaded."""
+        with self._lock:
+            if not self._is_modified:
+                return
+            chunks = [b""]  # The header, once the trigrams are counted
+            for relative_path, indexed_file in self._files.items():
+                encoded_path = relative_path.encode("utf-8")
+                chunks += [_FILE_STRUCT.pack(indexed_file.file_id, indexed_file.modification_time, indexed_file.size,
+                                             len(encoded_path), len(indexed_file.trigrams)),
+                           encoded_path, indexed_file.trigrams]
+            trigram_count = 0
+            for trigram, bitmap in self._bitmaps.items():
+                # Trigrams of removed files are left with empty bitmaps
+                if any(bitmap):
+                    chunks += [_TRIGRAM_STRUCT.pack(trigram, len(bitmap)), bitmap]
+                    trigram_count += 1
+            chunks[0] = _HEADER_STRUCT.pack(_INDEX_FILE_MAGIC, _INDEX_FORMAT_VERSION, len(self._files), trigram_count)
+            self._is_modified = False
+
+        # Write to a temporary file first, so that the index is never left half-written
+        temporary_file_path = self.index_file_path.with_suffix(".tmp")
+        try:
+            self.index_file_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temporary_file_path, "wb") as f:
+                f.writelines(chunks)
+            os.replace(temporary_file_path, self.index_file_path)
+        except OSError as e:
+            # The index is only a cache, the changed files will be read again next time
+            log.warning("Could not save the trigram index of %s: %s", self.folder_path, e)
+
+    def _read_file(self, relative_path: str) -> tuple[int, int, bytes] | None:
+        file_path = self.folder_path / relative_path
+        try:
+            with open(file_path, "rb") as f:
+                file_stat = os.fstat(f.fileno())
+                data = f.read()
+        except OSError as e:
+            log.warning("Could not index %s: %s", file_path, e)
+            return None
+        return file_stat.st_mtime_ns, file_stat.st_size, get_trigrams(data)
+
+    def _get_literals_bitmap_locked(self, literals: list, all_files_bitmap: int) -> int:
+        result = all_files_bitmap
+        for literal in literals:
+            if isinstance(literal, bytes):
+                for start in range(0, len(literal) - 2):
+                    bitmap = self._bitmaps.get(literal[start:start + 3])
+                    result &= int.from_bytes(bitmap, "little") if bitmap is not None else 0
+            else:
+                alternatives_bitmap = 0
+                for branch in literal:
+                    alternatives_bitmap |= self._get_literals_bitmap_locked(branch, all_files_bitmap)
+                result &= alternatives_bitmap
+            if result == 0:
+                break
+        return result
+
+    def _add_file_locked(self, relative_path: str, modification_time: int, size: int, trigrams: bytes):
+        file_id = self._free_ids.pop() if self._free_ids else len(self._paths_by_id)
+        self._files[relative_path] = _IndexedFile(file_id, modification_time, size, trigrams)
+        self._paths_by_id[file_id] = relative_path
+
+        byte_index, bit = file_id >> 3, 1 << (file_id & 7)
+        for start in range(0, len(trigrams), 3):
+            trigram = trigrams[start:start + 3]
+            bitmap = self._bitmaps.get(trigram)
+            if bitmap is None:
+                bitmap = self._bitmaps[trigram] = bytearray()
+            if len(bitmap) <= byte_index:
+                bitmap.extend(bytes(byte_index + 1 - len(bitmap)))
+            bitmap[byte_index] |= bit
+
+    def _remove_file_locked(self, relative_path: str):
+        indexed_file = self._files.pop(relative_path, None)
+        if indexed_file is None:
+            return
+        del self._paths_by_id[indexed_file.file_id]
+        self._free_ids.append(indexed_file.file_id)
+
+        byte_index, mask = indexed_file.file_id >> 3, ~(1 << (indexed_file.file_id & 7)) & 0xFF
+        trigrams = indexed_file.trigrams
+        for start in range(0, len(trigrams), 3):
+            bitmap = self._bitmaps.get(trigrams[start:start + 3])
+            if bitmap is not None and len(bitmap) > byte_index:
+                bitmap[byte_index] &= mask
+
+    def _load(self):
+        with self._lock:
+            if self._is_loaded:
+                return
+            self._is_loaded = True
+            try:
+                with open(self.index_file_path, "rb") as f:
+                    data = f.read()
+                self._read_index_data(data)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, struct.error, UnicodeDecodeError) as e:
+                # Corrupted index, it will be rebuilt
+                log.warning("Could not load the trigram index of %s: %s", self.folder_path, e)
+                self._files.clear()
+                self._paths_by_id.clear()
+                self._bitmaps.clear()
+
+            used_ids = set(self._paths_by_id)
+            self._free_ids = [file_id for file_id in range(max(used_ids, default=-1) + 1) if file_id not in used_ids]
+
+    def _read_index_data(self, data: bytes):
+        magic, version, file_count, trigram_count = _HEADER_STRUCT.unpack_from(data, 0)
+        if magic != _INDEX_FILE_MAGIC or version != _INDEX_FORMAT_VERSION:
+            return
+
+        offset = _HEADER_STRUCT.size
+        for _ in range(file_count):
+            file_id, modification_time, size, path_length, trigrams_length = _FILE_STRUCT.unpack_from(data, offset)
+            offset += _FILE_STRUCT.size
+            relative_path = data[offset:offset + path_length].decode("utf-8")
+            offset += path_length
+            trigrams = data[offset:offset + trigrams_length]
+            offset += trigrams_length
+            self._files[relative_path] = _IndexedFile(file_id, modification_time, size, trigrams)
+            self._paths_by_id[file_id] = relative_path
+
+        for _ in range(trigram_count):
+            trigram, bitmap_length = _TRIGRAM_STRUCT.unpack_from(data, offset)
+            offset += _TRIGRAM_STRUCT.size
+            self._bitmaps[trigram] = bytearray(data[offset:offset + bitmap_length])
+            offset += bitmap_length
+
+        if offset != len(data) or len(self._paths_by_id) != len(self._files):
+            raise ValueError("unexpected index size")
+
+
+_indexes: dict[str, TrigramIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(folder_path: Path, index_folder_path: Path | None = None) -> TrigramIndex:
+    """Returns the index of a game folder, the same one every time.
+        :param folder_path: Path to the game folder
+        :param index_folder_path: Folder the index files are kept in, or None for the cache folder of the IDE
+        :return: The index, to update before searching"""
+    key = os.path.abspath(folder_path)
+    if index_folder_path is None:
+        index_folder_path = IDESettings.get_cache_folder_path() / _INDEX_FOLDER_NAME
+    # Named after the path of the game, as several games can have the same folder name
+    index_file_path = Path(index_folder_path) / (hashlib.sha1(key.encode("utf-8")).hexdigest() + ".bin")
+
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None or index.index_file_path != index_file_path:
+            index = _indexes[key] = TrigramIndex(Path(key), index_file_path)
+        return index
+
+
+def list_candidate_files(game_path: Path, pattern: re.Pattern, pywright_folder_path: Path | None = None,
+                         open_file_data: dict[str, bytes] | None = None) -> list[Path]:
+    """Updates the index of a game, then lists the scripts that may contain a match of a pattern.
+        :param game_path: Path to the game folder
+        :param pattern: The pattern from compile_search_pattern()
+        :param pywright_folder_path: Path to the PyWright folder to also list all the scripts of, besides its games, or None
+        :param open_file_data: The contents of the files open in editors by their absolute path, to use instead of the
+        indexed contents of these files, or None
+        :return: The paths of the scripts"""
+    index = get_index(game_path)
+    index.update()
+    index.save()
+    result = index.find_candidate_files(pattern)
+    if open_file_data:
+        # Open files can have unsaved changes, so they are listed when their current text matches instead
+        result = [file_path for file_path in result if os.path.abspath(file_path) not in open_file_data]
+        result += [file_path for file_path in index.get_file_paths()
+                   if pattern.search(open_file_data.get(os.path.abspath(file_path), b""))]
+    if pywright_folder_path is not None:
+        # The scripts of the PyWright folder itself are few, they are always searched
+        result += list_script_files(pywright_folder_path, skip_games_folder=True)
+    return result
+
+
+def update_in_background(game_path: Path):
+    """Updates and saves the index of a game in a background thread."""
+    def update():
+        index = get_index(game_path)
+        index.update()
+        index.save()
+    threading.Thread(target=update, name="Trigram indexing", daemon=True).start()
@@ -9,10 +9,11 @@ from PyQt6.QtGui import QDesktopServices, QGuiApplication, QClipboard, QAction,
 from PyQt6.QtCore import pyqtSignal, Qt, QUrl, QFileSystemWatcher, QModelIndex
 
 from data.PyWrightGame import PyWrightGameInfo
+from data.AssetResolver import AssetKind, get_asset_folder_path
 from data import IconThemes
 
-MUSIC_FOLDER_NAME = "music"
-SFX_FOLDER_NAME = "sfx"
+MUSIC_FOLDER_NAME = AssetKind.MUSIC.folder_name
+SFX_FOLDER_NAME = AssetKind.SFX.folder_name
 
 
 class AudioType(Enum):
@@ -36,6 +37,7 @@ class AssetBrowserAudioWidget(QWidget):
 
         self.__audio_type = audio_type
         self.__AUDIO_FOLDER = MUSIC_FOLDER_NAME if audio_type == AudioType.Music else SFX_FOLDER_NAME
+        self.__ASSET_KIND = AssetKind.MUSIC if audio_type == AudioType.Music else AssetKind.SFX
 
         self._audio_list_view = QListView(self)
         self._audio_list_model = QStandardItemModel()
@@ -105,9 +107,9 @@ class AssetBrowserAudioWidget(QWidget):
         if self._game_info is None:
             return
 
-        global_audio_folder_path = Path("{}/{}/".format(self._pywright_dir, self.__AUDIO_FOLDER))
+        global_audio_folder_path = get_asset_folder_path(self._pywright_dir, self.__ASSET_KIND)
 
-        game_audio_folder_path = Path("{}/{}/".format(self._game_info.game_path, self.__AUDIO_FOLDER))
+        game_audio_folder_path = get_asset_folder_path(self._game_info.game_path, self.__ASSET_KIND)
 
         self._available_audio_folders.clear()
 
@@ -121,11 +123,7 @@ class AssetBrowserAudioWidget(QWidget):
 
         # Also add the relevant folders in Cases if they exist
         for current_case in self._game_info.game_cases:
-            case_audio_folder_path = Path("{}/{}/{}/".format(
-                self._game_info.game_path,
-                current_case,
-                self.__AUDIO_FOLDER
-            ))
+            case_audio_folder_path = get_asset_folder_path(self._game_info.game_path / current_case, self.__ASSET_KIND)
 
             if case_audio_folder_path.exists() and case_audio_folder_path.is_dir():
                 self._available_audio_folders.append("{}/{}".format(current_case, self.__AUDIO_FOLDER))
@@ -210,19 +208,15 @@ class AssetBrowserAudioWidget(QWidget):
             if case_text == "":
                 return Path()
 
-            return Path("{}/{}/{}/".format(self._game_info.game_path, case_text, self.__AUDIO_FOLDER))
+            return get_asset_folder_path(self._game_info.game_path / case_text, self.__ASSET_KIND)
         else:
             is_global = folder_text == "Global"
 
-            return Path("{}/{}/".format(self._pywright_dir if is_global else self._game_info.game_path,
-                                        self.__AUDIO_FOLDER))
+            return get_asset_folder_path(self._pywright_dir if is_global else self._game_info.game_path,
+                                         self.__ASSET_KIND)
 
     def _handle_open_current_folder(self):
-        folder_text = self._audio_folders_combo_box.currentText()
-        is_global = folder_text == "Global"
-
-        folder_path = Path("{}/{}/".format(self._pywright_dir if is_global else self._game_info.game_path,
-                                           self.__AUDIO_FOLDER))
+        folder_path = self._get_selected_audio_folder_path()
 
         QDesktopServices.openUrl(QUrl.fromLocalFile(str(folder_path)))
 
@@ -9,6 +9,7 @@ from PyQt6.QtGui import QIcon, QPixmap, QDesktopServices, QClipboard, QGuiApplic
 from PyQt6.QtCore import QSize, QDir, Qt, QUrl, pyqtSignal, QFileSystemWatcher
 
 from data.PyWrightGame import PyWrightGameInfo
+from data.AssetResolver import AssetKind, get_asset_folder_path
 from data import IconThemes
 
 insertable_folders = ("bg", "ev", "fg")
@@ -87,15 +88,15 @@ class AssetManagerTextureWidget(QWidget):
         if self._pywright_dir == "":
             return
 
-        global_art_folder_path = Path("{}/art/".format(self._pywright_dir))
+        global_art_folder_path = self._get_art_folder_path(True)
 
         global_art_folders = ["global/" + x.name for x in global_art_folder_path.iterdir() if x.is_dir()]
 
-        game_art_folder_path = Path("{}/art/".format(self._game_info.game_path))
+        game_art_folder_path = self._get_art_folder_path(False)
         game_art_folders = []
         game_art_subfolders = []
 
-        if game_art_folder_path.exists():
+        if self._game_info is not None and game_art_folder_path.exists():
             game_art_folders = [x.name for x in game_art_folder_path.iterdir() if x.is_dir()]
 
             # Iterate over subfolders as well
@@ -103,12 +104,13 @@ class AssetManagerTextureWidget(QWidget):
             game_art_subfolders = []
 
             for folder in game_art_folders:
-                folder_path = Path("{}/art/{}".format(self._game_info.game_path, folder))
+                folder_path = game_art_folder_path / folder
                 game_art_subfolders.extend([folder + "/" + x.name for x in folder_path.iterdir() if x.is_dir()])
 
         self._available_folders = global_art_folders + game_art_folders + game_art_subfolders
 
-        self.__file_system_watcher.addPaths(self._available_folders)
+        if self._available_folders:
+            self.__file_system_watcher.addPaths([str(self._get_folder_path(folder)) for folder in self._available_folders])
 
     def refresh_art_folders(self):
         self._query_available_folders()
@@ -116,17 +118,21 @@ class AssetManagerTextureWidget(QWidget):
         self._folders_combo_box.addItems(self._available_folders)
         self._refresh_texture_view()
 
-    def _refresh_texture_view(self):
-        subfolder_name = self._folders_combo_box.currentText()
-
-        is_global = subfolder_name.startswith("global/")
-
-        root_folder = self._pywright_dir if is_global or self._game_info is None else self._game_info.game_path
+    def _get_art_folder_path(self, is_global: bool) -> Path:
+        """Returns the art folder of the PyWright folder if is_global, or else of the game (when there is one)."""
+        if is_global or self._game_info is None:
+            return get_asset_folder_path(self._pywright_dir, AssetKind.ART)
+        return get_asset_folder_path(self._game_info.game_path, AssetKind.ART)
 
+    def _get_folder_path(self, folder_name: str) -> Path:
+        """Returns the path of a folder as listed in the combo box, such as "global/bg" or "port/maya"."""
+        is_global = folder_name.startswith("global/")
         if is_global:
-            subfolder_name = subfolder_name.split("global/", maxsplit=1)[1]
+            folder_name = folder_name.split("global/", maxsplit=1)[1]
+        return self._get_art_folder_path(is_global) / folder_name
 
-        folder_path = Path("{}/art/{}".format(root_folder, subfolder_name))
+    def _refresh_texture_view(self):
+        folder_path = self._get_folder_path(self._folders_combo_box.currentText())
 
         fs_model = QFileSystemModel()
         icon_provider = ThumbnailIconProvider()
@@ -149,7 +155,7 @@ class AssetManagerTextureWidget(QWidget):
         self._refresh_texture_view()
 
     def _handle_directory_contents_changed(self, path: str):
-        if path == self._folders_combo_box.currentText():
+        if Path(path) == self._get_folder_path(self._folders_combo_box.currentText()):
             self._refresh_texture_view()
 
     def _handle_texture_context_menu(self, position):
@@ -242,19 +248,7 @@ class AssetManagerTextureWidget(QWidget):
         self.command_insert_at_cursor_requested.emit(final_command)
 
     def _handle_open_current_folder(self):
-        subfolder_name = self._folders_combo_box.currentText()
-
-        is_global = subfolder_name.startswith("global/")
-
-        if self._game_info is not None:
-            root_folder = self._pywright_dir if is_global else self._game_info.game_path
-        else:
-            root_folder = self._pywright_dir
-
-        if is_global:
-            subfolder_name = subfolder_name.split("global/", maxsplit=1)[1]
-
-        folder_path = Path("{}/art/{}".format(root_folder, subfolder_name))
+        folder_path = self._get_folder_path(self._folders_combo_box.currentText())
         QDesktopServices.openUrl(QUrl.fromLocalFile(str(folder_path)))
 
     def __get_subfolder_name(self) -> str:
@@ -0,0 +1,286 @@
+# Dock listing the assets the scripts of the game refer to but the engine won't find, with every place using them,
+# and the asset files no script uses, which can be moved to the quarantine folder of the game
+# The report is built in the background, only the scripts that changed since the previous report are read again
+
+import logging
+import threading
+from pathlib import Path
+
+from PyQt6.QtWidgets import QWidget, QDockWidget, QTreeWidget, QTreeWidgetItem, QHBoxLayout, QVBoxLayout, QLabel, \
+    QPushButton, QTabWidget, QMessageBox, QHeaderView
+from PyQt6.QtGui import QIcon
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+
+from data.AssetReport import MissingAsset, UnusedAsset, QUARANTINE_FOLDER_NAME, find_missing_assets, \
+    find_unused_assets, quarantine_assets
+from data.AssetResolver import ASSET_KIND_NAMES
+from data.PyWrightGame import PyWrightGameInfo
+from data.ScriptFiles import list_game_scripts
+
+import data.IconThemes as IconThemes
+
+log = logging.getLogger(__name__)
+
+# Role of the tree items holding the (file path, line, index) to jump to
+_LOCATION_ROLE = Qt.ItemDataRole.UserRole
+# Role of the unused asset items holding their UnusedAsset
+_UNUSED_ASSET_ROLE = Qt.ItemDataRole.UserRole + 1
+
+
+def _format_size(size: int) -> str:
+    for unit in ("bytes", "KB", "MB"):
+        if size < 1024:
+            return "{} {}".format(size, unit) if unit == "bytes" else "{:.1f} {}".format(size, unit)
+        size /= 1024
+    return "{:.1f} GB".format(size)
+
+
+class _ReportSignals(QObject):
+    """Brings the report from the worker thread to the GUI thread, along with its id."""
+    missing_assets_found = pyqtSignal(int, list)
+    unused_assets_found = pyqtSignal(int, list)
+    report_failed = pyqtSignal(int)
+
+
+class AssetReportWidget(QDockWidget):
+    # Gives the file path, line and index to open
+    open_location_requested = pyqtSignal(str, int, int)
+    # Asks for the report to be built again
+    refresh_requested = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+
+        self.setWindowTitle("Asset Report")
+        self.setObjectName("AssetReportWidget")
+
+        self._missing_assets_tree = QTreeWidget()
+        self._missing_assets_tree.setHeaderHidden(True)
+        self._missing_assets_tree.itemActivated.connect(self._handle_item_activated)
+        self._missing_assets_tree.itemClicked.connect(self._handle_item_activated)
+
+        self._unused_assets_tree = QTreeWidget()
+        self._unused_assets_tree.setHeaderLabels(["File", "Size"])
+        self._unused_assets_tree.setRootIsDecorated(False)
+        self._unused_assets_tree.header().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self._unused_assets_tree.header().setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
+        self._unused_assets_tree.header().setStretchLastSection(False)
+        self._unused_assets_tree.itemChanged.connect(self._update_unused_assets_label)
+
+        self._unused_assets_label = QLabel()
+        self._check_all_button = QPushButton("Check All")
+        self._check_all_button.setEnabled(False)
+        self._check_all_button.clicked.connect(lambda: self._set_unused_assets_check_state(Qt.CheckState.Checked))
+        self._uncheck_all_button = QPushButton("Uncheck All")
+        self._uncheck_all_button.setEnabled(False)
+        self._uncheck_all_button.clicked.connect(lambda: self._set_unused_assets_check_state(Qt.CheckState.Unchecked))
+        self._quarantine_button = QPushButton("Move to Quarantine")
+        self._quarantine_button.setToolTip("Move the checked files to the \"{}\" folder of the game"
+                                           .format(QUARANTINE_FOLDER_NAME))
+        self._quarantine_button.setEnabled(False)
+        self._quarantine_button.clicked.connect(self._handle_quarantine)
+
+        self._tab_widget = QTabWidget()
+        self._tab_widget.addTab(self._missing_assets_tree, "Missing")
+        self._tab_widget.addTab(self._create_unused_assets_widget(), "Unused")
+
+        self.setWidget(self._tab_widget)
+        self.setFeatures(QDockWidget.DockWidgetFeature.DockWidgetClosable)
+
+        self._title_label = QLabel("Asset Report")
+
+        refresh_icon_path = IconThemes.icon_path_from_theme(IconThemes.ICON_NAME_REFRESH)
+        self._refresh_button = QPushButton(QIcon(refresh_icon_path), "")
+        self._refresh_button.setFlat(True)
+        self._refresh_button.setToolTip("Check the assets again")
+        self._refresh_button.clicked.connect(self.refresh_requested)
+        self._refresh_button.setFixedWidth(30)
+
+        hide_icon_path = IconThemes.icon_path_from_theme(IconThemes.ICON_NAME_MINUS)
+        self._hide_button = QPushButton(QIcon(hide_icon_path), "")
+        self._hide_button.setFlat(True)
+        self._hide_button.clicked.connect(self.hide)
+        self._hide_button.setFixedWidth(30)
+
+        self.setTitleBarWidget(self._create_title_bar_widget())
+
+        # Late reports of a previous game or of a previous check are told apart by their id
+        self._report_id = 0
+        self._game_info: PyWrightGameInfo | None = None
+        self._game_path = Path("")
+        self._report_signals = _ReportSignals(self)
+        self._report_signals.missing_assets_found.connect(self._handle_missing_assets_found)
+        self._report_signals.unused_assets_found.connect(self._handle_unused_assets_found)
+        self._report_signals.report_failed.connect(self._handle_report_failed)
+
+    def _create_title_bar_widget(self):
+        result = QWidget()
+
+        layout = QHBoxLayout()
+
+        layout.addWidget(self._title_label)
+        layout.addStretch()
+        layout.addWidget(self._refresh_button)
+        layout.addWidget(self._hide_button)
+        layout.setContentsMargins(4, 0, 2, 4)
+
+        result.setLayout(layout)
+        return result
+
+    def _create_unused_assets_widget(self):
+        result = QWidget()
+
+        bottom_layout = QHBoxLayout()
+        bottom_layout.addWidget(self._unused_assets_label)
+        bottom_layout.addStretch()
+        bottom_layout.addWidget(self._check_all_button)
+        bottom_layout.addWidget(self._uncheck_all_button)
+        bottom_layout.addWidget(self._quarantine_button)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self._unused_assets_tree)
+        layout.addLayout(bottom_layout)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        result.setLayout(layout)
+        return result
+
+    def start_report(self, game_info: PyWrightGameInfo, open_file_data: dict[str, bytes]):
+        """Checks the asset references of every script of the game on a worker thread, then lists the missing assets
+        and the unused ones.
+            :param game_info: The game to check
+            :param open_file_data: The contents of the files open in editors by absolute path, checked instead of the files
+            :return: None"""
+        self._report_id += 1
+        report_id = self._report_id
+        self._game_info = game_info
+        self._game_path = Path(game_info.game_path)
+        self._title_label.setText("Asset Report (checking...)")
+
+        game_path = game_info.game_path
+        case_names = list(game_info.game_cases)
+
+        def report():
+            # Always told, so that a failed check (such as a file being written) doesn't leave the report checking
+            try:
+                references_by_file = game_info.asset_references.update(list_game_scripts(game_path, case_names),
+                                                                       open_file_data)
+                missing_assets = find_missing_assets(references_by_file, game_info.asset_resolver)
+                self._report_signals.missing_assets_found.emit(report_id, missing_assets)
+                unused_assets = find_unused_assets(references_by_file, game_info.asset_references.get_words(),
+                                                   game_info.asset_resolver, game_path, case_names)
+                self._report_signals.unused_assets_found.emit(report_id, unused_assets)
+            except Exception:
+                log.exception("Could not check the assets of %s", game_path)
+                self._report_signals.report_failed.emit(report_id)
+
+        threading.Thread(target=report, name="Asset report", daemon=True).start()
+
+    def _handle_missing_assets_found(self, report_id: int, missing_assets: list[MissingAsset]):
+        if report_id != self._report_id:
+            return
+
+        self._missing_assets_tree.clear()
+        for missing_asset in missing_assets:
+            asset_item = QTreeWidgetItem(self._missing_assets_tree, ["{} {} ({})".format(
+                ASSET_KIND_NAMES[missing_asset.kind], missing_asset.name, len(missing_asset.references))])
+            for reference in missing_asset.references:
+                try:
+                    file_name = Path(reference.file_path).relative_to(self._game_path).as_posix()
+                except ValueError:
+                    file_name = reference.file_path
+                reference_item = QTreeWidgetItem(asset_item, ["{}:{}: {}".format(
+                    file_name, reference.line + 1, reference.command)])
+                reference_item.setData(0, _LOCATION_ROLE, (reference.file_path, reference.line, reference.column))
+
+        self._tab_widget.setTabText(0, "Missing ({})".format(len(missing_assets)))
+
+    def _handle_unused_assets_found(self, report_id: int, unused_assets: list[UnusedAsset]):
+        if report_id != self._report_id:
+            return
+
+        # Files are only moved once checked by hand, as they can still be used in ways the report can't see
+        # Setting the check state of every item would update the label each time
+        self._unused_assets_tree.blockSignals(True)
+        self._unused_assets_tree.clear()
+        for unused_asset in unused_assets:
+            item = QTreeWidgetItem(self._unused_assets_tree, [unused_asset.relative_path,
+                                                              _format_size(unused_asset.size)])
+            item.setTextAlignment(1, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            item.setCheckState(0, Qt.CheckState.Unchecked)
+            item.setData(0, _UNUSED_ASSET_ROLE, unused_asset)
+        self._unused_assets_tree.blockSignals(False)
+
+        self._tab_widget.setTabText(1, "Unused ({})".format(len(unused_assets)))
+        self._title_label.setText("Asset Report ({} reclaimable)".format(
+            _format_size(sum(unused_asset.size for unused_asset in unused_assets))))
+        self._update_unused_assets_label()
+
+    def _handle_report_failed(self, report_id: int):
+        if report_id != self._report_id:
+            return
+
+        # The previous report stays shown, the next check will replace it
+        self._title_label.setText("Asset Report (check failed)")
+        self._update_unused_assets_label()
+
+    def _set_unused_assets_check_state(self, check_state: Qt.CheckState):
+        self._unused_assets_tree.blockSignals(True)
+        for index in range(self._unused_assets_tree.topLevelItemCount()):
+            self._unused_assets_tree.topLevelItem(index).setCheckState(0, check_state)
+        self._unused_assets_tree.blockSignals(False)
+        self._update_unused_assets_label()
+
+    def _get_checked_unused_assets(self) -> list[UnusedAsset]:
+        result = []
+        for index in range(self._unused_assets_tree.topLevelItemCount()):
+            item = self._unused_assets_tree.topLevelItem(index)
+            if item.checkState(0) == Qt.CheckState.Checked:
+                result.append(item.data(0, _UNUSED_ASSET_ROLE))
+        return result
+
+    def _update_unused_assets_label(self):
+        checked_unused_assets = self._get_checked_unused_assets()
+        self._unused_assets_label.setText("{} of {} files checked, {}".format(
+            len(checked_unused_assets), self._unused_assets_tree.topLevelItemCount(),
+            _format_size(sum(unused_asset.size for unused_asset in checked_unused_assets))))
+        self._quarantine_button.setEnabled(len(checked_unused_assets) > 0)
+        self._check_all_button.setEnabled(len(checked_unused_assets) < self._unused_assets_tree.topLevelItemCount())
+        self._uncheck_all_button.setEnabled(len(checked_unused_assets) > 0)
+
+    def _handle_quarantine(self):
+        unused_assets = self._get_checked_unused_assets()
+        if not unused_assets or self._game_info is None:
+            return
+
+        prompt = QMessageBox.question(self, "Move to Quarantine",
+                                      "Move {} files ({}) to the \"{}\" folder of the game?".format(
+                                          len(unused_assets), _format_size(sum(asset.size for asset in unused_assets)),
+                                          QUARANTINE_FOLDER_NAME),
+                                      QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                                      QMessageBox.StandardButton.No)
+        if prompt != QMessageBox.StandardButton.Yes:
+            return
+
+        errors = quarantine_assets(unused_assets, self._game_info.asset_resolver, self._game_path)
+        if errors:
+            QMessageBox.warning(self, "Move to Quarantine", "Some files could not be moved:\n\n" + "\n".join(errors))
+        self.refresh_requested.emit()
+
+    def clear(self):
+        self._report_id += 1
+        self._game_info = None
+        self._missing_assets_tree.clear()
+        self._unused_assets_tree.clear()
+        self._tab_widget.setTabText(0, "Missing")
+        self._tab_widget.setTabText(1, "Unused")
+        self._unused_assets_label.setText("")
+        self._quarantine_button.setEnabled(False)
+        self._check_all_button.setEnabled(False)
+        self._uncheck_all_button.setEnabled(False)
+        self._title_label.setText("Asset Report")
+
+    def _handle_item_activated(self, item: QTreeWidgetItem):
+        location = item.data(0, _LOCATION_ROLE)
+        if location is not None:
+            self.open_location_requested.emit(*location)
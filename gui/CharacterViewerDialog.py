@@ -5,6 +5,7 @@ from PyQt6.QtWidgets import QDialog, QComboBox, QLabel, QVBoxLayout, QHBoxLayout
     QSlider
 
 from data.PyWrightGame import CurrentPyWrightGame
+from data.AssetResolver import AssetKind
 from data.SpriteSheet import SpriteSheet
 from data import IconThemes
 
@@ -101,9 +102,10 @@ class CharacterViewerDialog(QDialog):
         self.setLayout(main_layout)
 
     def _populate_character_combobox(self):
-        port_path = CurrentPyWrightGame().current_game.game_path / "art" / "port"
+        # The characters of the PyWright folder can be used by the game as well
+        asset_resolver = CurrentPyWrightGame().current_game.asset_resolver
 
-        self._character_combobox.addItems([x.stem for x in port_path.iterdir() if x.is_dir()])
+        self._character_combobox.addItems(asset_resolver.list_names(AssetKind.ART, "port/"))
 
     def _handle_character_combobox_changed(self):
         if self._character_combobox.count() == 0:
@@ -116,8 +118,11 @@ class CharacterViewerDialog(QDialog):
             return
 
         character = self._character_combobox.currentText()
-        emotion = self._emotion_combobox.currentText() + ".png"
-        file_path = CurrentPyWrightGame().current_game.game_path / "art" / "port" / character / emotion
+        emotion = self._emotion_combobox.currentText()
+        file_path = CurrentPyWrightGame().current_game.asset_resolver.resolve(
+            AssetKind.ART, "port/{}/{}".format(character, emotion))
+        if file_path is None:
+            return
 
         self._spritesheet = SpriteSheet(file_path)
 
@@ -136,9 +141,11 @@ class CharacterViewerDialog(QDialog):
 
     def _populate_emotion_combobox(self):
         self._emotion_combobox.clear()
-        character_path = CurrentPyWrightGame().current_game.game_path / "art" / "port" / self._character_combobox.currentText()
+        asset_resolver = CurrentPyWrightGame().current_game.asset_resolver
 
-        self._emotion_combobox.addItems([x.stem for x in character_path.iterdir() if x.is_file() and x.suffix == ".png"])
+        # Only png portraits can be shown, and an emotion split in (blink) and (talk) animations is listed once
+        self._emotion_combobox.addItems(asset_resolver.list_portrait_emotions(self._character_combobox.currentText(),
+                                                                              extensions=(".png",)))
 
     def _handle_frame_number_value_changed(self):
         frame_num = self._frame_number_spinbox.value() - 1
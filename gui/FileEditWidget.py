@@ -7,6 +7,9 @@ from PyQt6.QtCore import pyqtSignal
 
 from PyQt6.Qsci import *
 
+from data.PyWrightSymbolTable import PyWrightCaseSymbols
+from data.PyWrightScriptLinter import Problem
+from data.AssetResolver import AssetResolver
 from gui.IDEScintillaWidget import IDEScintillaWidget
 from .FindReplaceDialog import FindType, ReplaceType, SearchScope
 
@@ -15,6 +18,12 @@ class FileEditWidget(QWidget):
 
     file_name_changed = pyqtSignal(str)
     file_modified = pyqtSignal()
+    file_saved = pyqtSignal(str)
+    # Emitted on every change of the text, to check it again
+    text_changed = pyqtSignal()
+    # Gives the path of this file and the SymbolOccurrence to find the definition of
+    definition_requested = pyqtSignal(str, object)
+    references_requested = pyqtSignal(str, object)
     # This will signal the IDE on *where* to move
     # For example if FindType is PREVIOUS, this will try to make the IDE switch to a tab that's left to this one.
     move_to_tab_requested = pyqtSignal(str, FindType)
@@ -35,9 +44,13 @@ class FileEditWidget(QWidget):
         self.sci = IDEScintillaWidget()
 
         self.sci.modificationChanged.connect(self._emit_file_modified)
+        self.sci.textChanged.connect(self.text_changed)
 
         self.sci.cursorPositionChanged.connect(self._handle_cursor_position_changed)
 
+        self.sci.definition_requested.connect(self._handle_definition_requested)
+        self.sci.references_requested.connect(self._handle_references_requested)
+
         self.pywright_working_dir = pywright_dir
 
         self.layout.addWidget(self.sci)
@@ -90,14 +103,17 @@ class FileEditWidget(QWidget):
 
         return result
 
-    def supply_builtin_macros_to_lexer(self, builtin_macros: list[str]):
-        self.sci.supply_builtin_macros_to_lexer(builtin_macros)
+    def supply_symbols_to_lexer(self, symbols: PyWrightCaseSymbols):
+        self.sci.supply_symbols_to_lexer(symbols)
+
+    def supply_asset_resolver_to_lexer(self, asset_resolver: AssetResolver, case_name: str):
+        self.sci.supply_asset_resolver_to_lexer(asset_resolver, case_name)
 
-    def supply_game_macros_to_lexer(self, game_macros: list[str]):
-        self.sci.supply_game_macros_to_lexer(game_macros)
+    def update_highlighting(self):
+        self.sci.viewport().update()
 
-    def supply_case_macros_to_lexer(self, case_macros: list[str]):
-        self.sci.supply_case_macros_to_lexer(case_macros)
+    def set_problems(self, problems: list[Problem]):
+        self.sci.set_problems(problems)
 
     def supply_font_properties_to_lexer(self, font_name: str, font_size: int, bold_font: bool):
         self.sci.supply_font_properties_to_lexer(font_name, font_size, bold_font)
@@ -113,6 +129,7 @@ class FileEditWidget(QWidget):
             with open(self.file_path, "w", newline="", encoding="utf-8") as f:
                 f.write(self.sci.text())
             self.sci.setModified(False)
+            self.file_saved.emit(self.file_path)
             return
 
         # The file name is probably empty. Prompt for a new file to save instead
@@ -128,6 +145,7 @@ class FileEditWidget(QWidget):
                 self.sci.setModified(False)
                 self.file_name = Path(self.file_path).name
                 self.file_name_changed.emit(self.file_name)
+            self.file_saved.emit(self.file_path)
 
     def insert_at_cursor_position(self, text: str):
         [line, index] = self.sci.getCursorPosition()
@@ -158,7 +176,7 @@ class FileEditWidget(QWidget):
             self.sci.SendScintilla(QsciScintilla.SCI_SETCURRENTPOS, 0, 0)
         cursor_pos = self.sci.SendScintilla(QsciScintilla.SCI_GETCURRENTPOS, 0, 0)
         self.sci.SendScintilla(QsciScintilla.SCI_SETTARGETSTART, cursor_pos, 0)
-        self.sci.SendScintilla(QsciScintilla.SCI_SETTARGETEND, len(self.sci.text()), 0)
+        self.sci.SendScintilla(QsciScintilla.SCI_SETTARGETEND, self.sci.length(), 0)
         pos = self.sci.SendScintilla(QsciScintilla.SCI_SEARCHINTARGET, len(text_to_find), text_to_find.encode("utf-8"))
 
         if pos == -1 and search_scope == SearchScope.SINGLE_FILE:
@@ -173,7 +191,7 @@ class FileEditWidget(QWidget):
 
     def find_previous_in_file(self, text_to_find: str, search_scope: SearchScope, from_bottom: bool):
         if from_bottom:
-            self.sci.SendScintilla(QsciScintilla.SCI_SETANCHOR, len(self.sci.text()), 0)
+            self.sci.SendScintilla(QsciScintilla.SCI_SETANCHOR, self.sci.length(), 0)
         cursor_pos = self.sci.SendScintilla(QsciScintilla.SCI_GETANCHOR, 0, 0)
         self.sci.SendScintilla(QsciScintilla.SCI_SETTARGETSTART, cursor_pos, 0)
         self.sci.SendScintilla(QsciScintilla.SCI_SETTARGETEND, 0, 0)  # Position at 0 so Scintilla searches backwards
@@ -208,13 +226,27 @@ class FileEditWidget(QWidget):
         self.sci.SendScintilla(QsciScintilla.SCI_SETSEL, pos - len(text_to_replace), pos)
 
     def replace_all_in_file(self, text_to_find: str, text_to_replace: str):
+        # A single undo reverts the whole replacement
+        self.sci.beginUndoAction()
         pos = self.find_next_in_file(text_to_find, SearchScope.SINGLE_FILE, from_top=True)
-        while True:
-            if pos == -1:
-                return
-
+        while pos != -1:
             self.sci.SendScintilla(QsciScintilla.SCI_REPLACESEL, 0, text_to_replace.encode("utf-8"))
             pos = self.find_next_in_file(text_to_find, SearchScope.SINGLE_FILE, from_top=False)
+        self.sci.endUndoAction()
+
+    def get_data(self) -> bytes:
+        """Returns the text of the editor, UTF-8 encoded like Scintilla holds it."""
+        return self.sci.text().encode("utf-8")
+
+    def replace_ranges(self, ranges: list[tuple[int, int]], text_to_replace: str):
+        """Replaces the given (start, end) byte position ranges with a text, all in a single undo action."""
+        replacement_data = text_to_replace.encode("utf-8")
+        self.sci.beginUndoAction()
+        # From the end, so that the positions of the next ranges don't move
+        for start, end in reversed(ranges):
+            self.sci.SendScintilla(QsciScintilla.SCI_SETTARGETRANGE, start, end)
+            self.sci.SendScintilla(QsciScintilla.SCI_REPLACETARGET, len(replacement_data), replacement_data)
+        self.sci.endUndoAction()
 
     def get_selection_length(self):
         # Obtain the text from selection
@@ -223,12 +255,24 @@ class FileEditWidget(QWidget):
         end_pos = self.sci.positionFromLineIndex(sel_end_line, sel_end_index)
         return len(self.sci.text(start_pos, end_pos))
 
+    def go_to_position(self, line: int, column: int):
+        """Moves the cursor to a line and a column in bytes, like the columns of the symbols and problems."""
+        self.sci.SendScintilla(QsciScintilla.SCI_GOTOPOS, self.sci.position_from_line_column(line, column))
+        self.sci.ensureLineVisible(line)
+        self.sci.setFocus()
+
     def get_current_cursor_position(self) -> tuple[int, int]:
         return self.sci.getCursorPosition()[0], self.sci.getCursorPosition()[1]
 
     def _handle_cursor_position_changed(self, line, column):
         self.cursor_position_changed.emit()
 
+    def _handle_definition_requested(self, symbol):
+        self.definition_requested.emit(self.file_path, symbol)
+
+    def _handle_references_requested(self, symbol):
+        self.references_requested.emit(self.file_path, symbol)
+
     def _handle_selection_changed(self):
         self.sci.highlight_all_occurrences()
         self.selected_text_changed.emit()
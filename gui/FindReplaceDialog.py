@@ -5,14 +5,14 @@ from enum import Enum
 
 from PyQt6.QtWidgets import (QDialog, QPushButton, QRadioButton,
                              QButtonGroup, QGroupBox, QVBoxLayout,
-                             QHBoxLayout, QLineEdit, QLabel, QMessageBox)
+                             QHBoxLayout, QLineEdit, QLabel, QMessageBox, QCheckBox)
 from PyQt6.QtCore import pyqtSignal
 
 
 class SearchScope(Enum):
     SINGLE_FILE = 0
     OPEN_TABS = 1
-    # ENTIRE_PROJECT = 2
+    ENTIRE_PROJECT = 2
 
 
 class FindType(Enum):
@@ -30,6 +30,10 @@ class FindReplaceDialog(QDialog):
 
     find_requested = pyqtSignal(str, FindType, SearchScope)
     replace_requested = pyqtSignal(str, str, ReplaceType, SearchScope)
+    # Gives the text to find, then whether to match the case, to only find whole words and to include the PyWright folder
+    find_in_project_requested = pyqtSignal(str, bool, bool, bool)
+    # Same, with the replacement text after the text to find
+    replace_in_project_requested = pyqtSignal(str, str, bool, bool, bool)
 
     def __init__(self, str_to_find, parent=None):
         super().__init__(parent)
@@ -48,7 +52,8 @@ class FindReplaceDialog(QDialog):
         self._find_next_button = QPushButton("Find Next")
         self._find_next_button.pressed.connect(self._handle_find_next)
         self._find_next_button.setDefault(True)
-        # self._find_all_button = QPushButton("Find All")
+        self._find_all_button = QPushButton("Find All")
+        self._find_all_button.pressed.connect(self._handle_find_all)
 
         self._replace_next_button = QPushButton("Replace Next")
         self._replace_next_button.pressed.connect(self._handle_replace_next)
@@ -66,9 +71,14 @@ class FindReplaceDialog(QDialog):
         self._scope_open_tabs_radio_button = QRadioButton("Open Tabs")
         self._scope_open_tabs_radio_button.setChecked(self.search_scope == SearchScope.OPEN_TABS)
         self._scope_open_tabs_radio_button.clicked.connect(self._handle_radio_buttons)
-        # self._scope_entire_project_radio_button = QRadioButton("Entire Project")
-        # self._scope_entire_project_radio_button.setChecked(self.search_scope == SearchScope.ENTIRE_PROJECT)
-        # self._scope_entire_project_radio_button.clicked.connect(self._handle_radio_buttons)
+        self._scope_entire_project_radio_button = QRadioButton("Entire Project")
+        self._scope_entire_project_radio_button.setChecked(self.search_scope == SearchScope.ENTIRE_PROJECT)
+        self._scope_entire_project_radio_button.clicked.connect(self._handle_radio_buttons)
+
+        # Options of the project search
+        self._match_case_check_box = QCheckBox("Match Case")
+        self._whole_word_check_box = QCheckBox("Whole Word")
+        self._include_pywright_folder_check_box = QCheckBox("Include the PyWright Folder")
 
         self._scope_group_box = QGroupBox("Search Scope")
         self._scope_group_box_layout = QVBoxLayout()
@@ -76,13 +86,20 @@ class FindReplaceDialog(QDialog):
         self._scope_radio_buttons_group = QButtonGroup()
         self._scope_radio_buttons_group.addButton(self._scope_single_file_radio_button)
         self._scope_radio_buttons_group.addButton(self._scope_open_tabs_radio_button)
-        # self._scope_radio_buttons_group.addButton(self._scope_entire_project_radio_button)
+        self._scope_radio_buttons_group.addButton(self._scope_entire_project_radio_button)
 
         self._scope_group_box_layout.addWidget(self._scope_single_file_radio_button)
         self._scope_group_box_layout.addWidget(self._scope_open_tabs_radio_button)
-        # self._scope_group_box_layout.addWidget(self._scope_entire_project_radio_button)
+        self._scope_group_box_layout.addWidget(self._scope_entire_project_radio_button)
         self._scope_group_box.setLayout(self._scope_group_box_layout)
 
+        self._options_group_box = QGroupBox("Project Search Options")
+        options_group_box_layout = QVBoxLayout()
+        options_group_box_layout.addWidget(self._match_case_check_box)
+        options_group_box_layout.addWidget(self._whole_word_check_box)
+        options_group_box_layout.addWidget(self._include_pywright_folder_check_box)
+        self._options_group_box.setLayout(options_group_box_layout)
+
         find_row_layout = QHBoxLayout()
         find_row_layout.addWidget(QLabel("Find:"))
         find_row_layout.addWidget(self._find_line_edit)
@@ -95,7 +112,7 @@ class FindReplaceDialog(QDialog):
 
         bottom_buttons_layout.addWidget(self._find_previous_button)
         bottom_buttons_layout.addWidget(self._find_next_button)
-        # bottom_buttons_layout.addWidget(self._find_all_button)
+        bottom_buttons_layout.addWidget(self._find_all_button)
         bottom_buttons_layout.addWidget(self._replace_next_button)
         bottom_buttons_layout.addWidget(self._replace_all_button)
         bottom_buttons_layout.addWidget(self._close_button)
@@ -105,17 +122,43 @@ class FindReplaceDialog(QDialog):
         main_layout.addLayout(find_row_layout)
         main_layout.addLayout(replace_row_layout)
         main_layout.addWidget(self._scope_group_box)
+        main_layout.addWidget(self._options_group_box)
         main_layout.addLayout(bottom_buttons_layout)
 
         self.setLayout(main_layout)
 
+        self._update_buttons()
+
     def _handle_radio_buttons(self):
         if self._scope_single_file_radio_button.isChecked():
             self.search_scope = SearchScope.SINGLE_FILE
         elif self._scope_open_tabs_radio_button.isChecked():
             self.search_scope = SearchScope.OPEN_TABS
-        # elif self._scope_entire_project_radio_button.isChecked():
-        #     self.search_scope = SearchScope.ENTIRE_PROJECT
+        elif self._scope_entire_project_radio_button.isChecked():
+            self.search_scope = SearchScope.ENTIRE_PROJECT
+        self._update_buttons()
+
+    def _update_buttons(self):
+        # The project is searched all at once, with the results listed in the Find Results panel,
+        # and replacements are all previewed at once before being applied
+        is_project_scope = self.search_scope == SearchScope.ENTIRE_PROJECT
+        self._find_previous_button.setEnabled(not is_project_scope)
+        self._find_next_button.setEnabled(not is_project_scope)
+        self._find_all_button.setEnabled(is_project_scope)
+        self._replace_next_button.setEnabled(not is_project_scope)
+        self._options_group_box.setEnabled(is_project_scope)
+        self._find_next_button.setDefault(not is_project_scope)
+        self._find_all_button.setDefault(is_project_scope)
+
+    def _handle_find_all(self):
+        find_text = self._find_line_edit.text()
+        if find_text.isspace() or find_text == "":
+            QMessageBox.critical(self, "Error", "Find text cannot be empty!")
+            return
+
+        self.find_in_project_requested.emit(find_text, self._match_case_check_box.isChecked(),
+                                            self._whole_word_check_box.isChecked(),
+                                            self._include_pywright_folder_check_box.isChecked())
 
     def _handle_find_previous(self):
         find_text = self._find_line_edit.text()
@@ -159,4 +202,10 @@ class FindReplaceDialog(QDialog):
             QMessageBox.critical(self, "Error", "Replace text cannot be empty!")
             return
 
+        if self.search_scope == SearchScope.ENTIRE_PROJECT:
+            self.replace_in_project_requested.emit(find_text, replace_text, self._match_case_check_box.isChecked(),
+                                                   self._whole_word_check_box.isChecked(),
+                                                   self._include_pywright_folder_check_box.isChecked())
+            return
+
         self.replace_requested.emit(find_text, replace_text, ReplaceType.REPLACE_ALL, self.search_scope)
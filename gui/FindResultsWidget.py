@@ -0,0 +1,157 @@
+# Dock listing the results of a search in all the scripts of the game, filled while the search runs
+
+import re
+from functools import partial
+from pathlib import Path
+from typing import Callable
+
+from PyQt6.QtWidgets import QWidget, QDockWidget, QTreeWidget, QTreeWidgetItem, QHBoxLayout, QLabel, QPushButton
+from PyQt6.QtGui import QIcon
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+
+from data.ProjectSearch import ProjectSearch, SearchMatch
+
+import data.IconThemes as IconThemes
+
+# Role of the tree items holding the (file path, line, index) to jump to
+_LOCATION_ROLE = Qt.ItemDataRole.UserRole
+# Listing more matches than this would only slow the IDE down, they are still counted
+_MAX_LISTED_MATCHES = 10000
+
+
+class _SearchSignals(QObject):
+    """Brings the results of the searches from their worker threads to the GUI thread, along with the id of their search."""
+    file_matches_found = pyqtSignal(int, str, list)
+    search_finished = pyqtSignal(int, bool)
+
+
+class FindResultsWidget(QDockWidget):
+    # Gives the file path, line and index to open
+    open_location_requested = pyqtSignal(str, int, int)
+
+    def __init__(self):
+        super().__init__()
+
+        self.setWindowTitle("Find Results")
+        self.setObjectName("FindResultsWidget")
+
+        self._results_tree = QTreeWidget()
+        self._results_tree.setHeaderHidden(True)
+        self._results_tree.itemActivated.connect(self._handle_item_activated)
+        self._results_tree.itemClicked.connect(self._handle_item_activated)
+
+        self.setWidget(self._results_tree)
+        self.setFeatures(QDockWidget.DockWidgetFeature.DockWidgetClosable)
+
+        self._title_label = QLabel("Find Results")
+
+        self._cancel_button = QPushButton("Cancel")
+        self._cancel_button.setFlat(True)
+        self._cancel_button.clicked.connect(self.cancel_search)
+        self._cancel_button.setVisible(False)
+
+        hide_icon_path = IconThemes.icon_path_from_theme(IconThemes.ICON_NAME_MINUS)
+        self._hide_button = QPushButton(QIcon(hide_icon_path), "")
+        self._hide_button.setFlat(True)
+        self._hide_button.clicked.connect(self.hide)
+        self._hide_button.setFixedWidth(30)
+
+        self.setTitleBarWidget(self._create_title_bar_widget())
+
+        self._search: ProjectSearch | None = None
+        # Late results of a cancelled search are told apart from the ones of the current search by their id
+        self._search_id = 0
+        self._search_signals = _SearchSignals(self)
+        self._search_signals.file_matches_found.connect(self._handle_file_matches_found)
+        self._search_signals.search_finished.connect(self._handle_search_finished)
+        self._search_description = ""
+        self._game_path = Path("")
+        self._match_count = 0
+        self._file_count = 0
+
+    def _create_title_bar_widget(self):
+        result = QWidget()
+
+        layout = QHBoxLayout()
+
+        layout.addWidget(self._title_label)
+        layout.addStretch()
+        layout.addWidget(self._cancel_button)
+        layout.addWidget(self._hide_button)
+        layout.setContentsMargins(4, 0, 2, 4)
+
+        result.setLayout(layout)
+        return result
+
+    def start_search(self, text: str, list_files: Callable[[], list[Path]], pattern: re.Pattern, game_path: Path):
+        """Cancels the running search if there is one, then searches the given files, listing the results as they come.
+            :param text: The searched text, to show
+            :param list_files: Function listing the files to search in, called on the search thread
+            :param pattern: The pattern from compile_search_pattern()
+            :param game_path: Path to the game folder, to show the files relative to it
+            :return: None"""
+        self.cancel_search()
+
+        self._results_tree.clear()
+        self._search_description = "\"{}\"".format(text)
+        self._game_path = Path(game_path)
+        self._match_count = 0
+        self._file_count = 0
+
+        self._search_id += 1
+        self._search = ProjectSearch(list_files, pattern,
+                                     partial(self._search_signals.file_matches_found.emit, self._search_id),
+                                     partial(self._search_signals.search_finished.emit, self._search_id))
+        self._cancel_button.setVisible(True)
+        self._update_title("Searching {}...".format(self._search_description))
+        self.show()
+        self._search.start()
+
+    def cancel_search(self):
+        if self._search is None:
+            return
+
+        self._search.cancel()
+        self._search = None
+        self._cancel_button.setVisible(False)
+        self._update_title("Search of {} cancelled".format(self._search_description))
+
+    def _handle_file_matches_found(self, search_id: int, file_path: str, matches: list[SearchMatch]):
+        if search_id != self._search_id or self._search is None:
+            return
+
+        self._file_count += 1
+        listed_count = max(0, min(len(matches), _MAX_LISTED_MATCHES - self._match_count))
+        self._match_count += len(matches)
+        self._update_title("Searching {}...".format(self._search_description))
+
+        if listed_count == 0:
+            return
+
+        try:
+            file_name = str(Path(file_path).relative_to(self._game_path))
+        except ValueError:
+            file_name = file_path
+        file_item = QTreeWidgetItem(self._results_tree, ["{} ({})".format(file_name, len(matches))])
+        for match in matches[:listed_count]:
+            match_item = QTreeWidgetItem(file_item, ["{}: {}".format(match.line + 1, match.line_text.strip())])
+            match_item.setData(0, _LOCATION_ROLE, (match.file_path, match.line, match.column))
+
+    def _handle_search_finished(self, search_id: int, was_cancelled: bool):
+        if search_id != self._search_id or self._search is None:
+            return
+
+        self._search = None
+        self._cancel_button.setVisible(False)
+        self._update_title("Found {} in {} files".format(self._search_description, self._file_count))
+
+    def _update_title(self, status: str):
+        matches_text = "{} matches".format(self._match_count)
+        if self._match_count > _MAX_LISTED_MATCHES:
+            matches_text += ", {} listed".format(_MAX_LISTED_MATCHES)
+        self._title_label.setText("{} ({})".format(status, matches_text))
+
+    def _handle_item_activated(self, item: QTreeWidgetItem):
+        location = item.data(0, _LOCATION_ROLE)
+        if location is not None:
+            self.open_location_requested.emit(*location)
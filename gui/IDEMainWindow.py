@@ -1,5 +1,6 @@
 # IDE Main Window
 
+from functools import partial
 from pathlib import Path
 
 from PyQt6.QtWidgets import (QMainWindow, QStatusBar, QFileDialog, QLabel, QMessageBox)
@@ -13,6 +14,12 @@ from .NewGameDialog import NewGameDialog
 from .OpenGameDialog import OpenGameDialog
 from .DirectoryViewWidget import DirectoryViewWidget
 from .PyWrightLoggerWidget import PyWrightLoggerWidget
+from .ReferencesWidget import ReferencesWidget
+from .FindResultsWidget import FindResultsWidget
+from .ProblemsWidget import ProblemsWidget
+from .AssetReportWidget import AssetReportWidget
+from .ScriptFlowWidget import ScriptFlowWidget
+from .ProjectReplaceDialog import ProjectReplaceDialog
 from .CharacterViewerDialog import CharacterViewerDialog
 from .SettingsDialog import SettingsDialog
 from .FindReplaceDialog import FindReplaceDialog
@@ -20,7 +27,7 @@ from .AssetBrowserRootWidget import AssetBrowserRootWidget
 from .FileEditWidget import FileEditWidget
 from .MissingFilesDialog import MissingFilesDialog
 
-from data import IDESettings, ColorThemes, PyWrightFolder
+from data import IDESettings, ColorThemes, PyWrightFolder, ProjectSearch, TrigramIndex
 from data.PyWrightGame import PyWrightGameInfo, CurrentPyWrightGame
 
 
@@ -48,6 +55,16 @@ class IDEMainWindow(QMainWindow):
         self.asset_manager_widget = AssetBrowserRootWidget(self)
         self.logger_view = PyWrightLoggerWidget()
         self.logger_view.hide()
+        self.references_view = ReferencesWidget()
+        self.references_view.hide()
+        self.find_results_view = FindResultsWidget()
+        self.find_results_view.hide()
+        self.problems_view = ProblemsWidget()
+        self.problems_view.hide()
+        self.asset_report_view = AssetReportWidget()
+        self.asset_report_view.hide()
+        self.script_flow_view = ScriptFlowWidget()
+        self.script_flow_view.hide()
 
         self.central_widget = MainWindowCentralWidget(self)
 
@@ -67,6 +84,8 @@ class IDEMainWindow(QMainWindow):
         self._top_toolbar.open_file_action.triggered.connect(self._handle_open_file)
         self._top_toolbar.save_file_action.triggered.connect(self.central_widget.handle_save_tab)
         self._top_toolbar.character_viewer_action.triggered.connect(self._handle_character_viewer)
+        self._top_toolbar.asset_report_action.triggered.connect(self._handle_asset_report)
+        self._top_toolbar.script_flow_action.triggered.connect(self._handle_script_flow)
         self._top_toolbar.find_replace_dialog_action.triggered.connect(self._handle_find_replace)
         self._top_toolbar.settings_action.triggered.connect(self._handle_settings)
 
@@ -77,6 +96,20 @@ class IDEMainWindow(QMainWindow):
         self.central_widget.update_save_button_requested.connect(self._top_toolbar.update_save_button)
         self.central_widget.current_tab_cursor_position_changed.connect(self.status_bar.set_cursor_position_info)
         self.central_widget.selection_length_changed.connect(self.status_bar.set_selection_length_info)
+        self.central_widget.references_found.connect(self._handle_references_found)
+        self.references_view.open_location_requested.connect(self.central_widget.open_location)
+        self.find_results_view.open_location_requested.connect(self.central_widget.open_location)
+        self.problems_view.open_location_requested.connect(self.central_widget.open_location)
+        self.central_widget.problems_found.connect(self._handle_problems_found)
+        self.problems_view.problem_count_changed.connect(self.status_bar.set_problem_count_info)
+        self.status_bar.problems_button_clicked.connect(
+            lambda: self.problems_view.setVisible(self.problems_view.isHidden()))
+        self.asset_report_view.open_location_requested.connect(self.central_widget.open_location)
+        self.asset_report_view.refresh_requested.connect(self._handle_asset_report)
+        self.script_flow_view.open_location_requested.connect(self.central_widget.open_location)
+        self.script_flow_view.refresh_requested.connect(self._handle_script_flow)
+        # Scripts are checked again whenever they change, and so is their flow while it is shown
+        self.central_widget.problems_found.connect(self._update_shown_script_flow)
 
         self.directory_view.open_new_tab.connect(self.central_widget.open_new_editing_tab)
         self.directory_view.open_game_properties_tab.connect(
@@ -89,6 +122,11 @@ class IDEMainWindow(QMainWindow):
         self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, self.directory_view)
         self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.asset_manager_widget)
         self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.logger_view)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.references_view)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.find_results_view)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.problems_view)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.asset_report_view)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.script_flow_view)
 
         # Try to load the last open game here, if the option is enabled, and the game folder still exists.
         if selected_game_path != "":
@@ -122,6 +160,8 @@ class IDEMainWindow(QMainWindow):
             self.directory_view.clear_directory_view()
             if self.central_widget.tabs_count() > 0:
                 self.central_widget.clear_tabs()
+            self.asset_report_view.clear()
+            self.script_flow_view.clear()
 
             self.status_bar.set_installation_path_info(str(current_pywright_game.current_pywright_folder_path))
 
@@ -193,11 +233,70 @@ class IDEMainWindow(QMainWindow):
         self.find_replace_dialog = FindReplaceDialog(string_to_find, self)
         self.find_replace_dialog.find_requested.connect(self.central_widget.handle_find_signals)
         self.find_replace_dialog.replace_requested.connect(self.central_widget.handle_replace_signals)
+        self.find_replace_dialog.find_in_project_requested.connect(self._handle_find_in_project)
+        self.find_replace_dialog.replace_in_project_requested.connect(self._handle_replace_in_project)
         self.find_replace_dialog.show()
 
+    def _handle_find_in_project(self, text: str, match_case: bool, whole_word: bool, include_pywright_folder: bool):
+        game_path = current_pywright_game.current_game.game_path
+        if str(game_path) == "":
+            QMessageBox.information(self, "Find/Replace", "There is no game open.")
+            return
+
+        pywright_folder_path = current_pywright_game.current_pywright_folder_path if include_pywright_folder else None
+        pattern = ProjectSearch.compile_search_pattern(text, match_case, whole_word)
+        # The trigram index of the game narrows the search down to the scripts that can contain the text
+        list_files = partial(TrigramIndex.list_candidate_files, game_path, pattern, pywright_folder_path)
+        self.find_results_view.start_search(text, list_files, pattern, game_path)
+
+    def _handle_replace_in_project(self, text_to_find: str, text_to_replace: str, match_case: bool, whole_word: bool,
+                                   include_pywright_folder: bool):
+        game_path = current_pywright_game.current_game.game_path
+        if str(game_path) == "":
+            QMessageBox.information(self, "Find/Replace", "There is no game open.")
+            return
+
+        pywright_folder_path = current_pywright_game.current_pywright_folder_path if include_pywright_folder else None
+        pattern = ProjectSearch.compile_search_pattern(text_to_find, match_case, whole_word)
+        open_file_data = self.central_widget.get_open_files_data()
+        list_files = partial(TrigramIndex.list_candidate_files, game_path, pattern, pywright_folder_path, open_file_data)
+
+        replace_dialog = ProjectReplaceDialog(self, text_to_find, text_to_replace, list_files, pattern,
+                                              open_file_data, game_path)
+        if not replace_dialog.exec():
+            return
+
+        failures = self.central_widget.apply_project_replacements(replace_dialog.get_accepted_replacements(),
+                                                                  text_to_replace)
+        if len(failures) > 0:
+            QMessageBox.warning(self, "Replace in Project",
+                                "Some files couldn't be changed:\n" + "\n".join(failures))
+
     def _handle_insert_into_cursor(self, command: str):
         self.central_widget.handle_insert_into_cursor(command)
 
+    def _handle_problems_found(self, problems_by_file: dict):
+        self.problems_view.show_problems(problems_by_file, current_pywright_game.current_game.game_path)
+
+    def _handle_references_found(self, symbol, occurrences: list):
+        self.references_view.show_references(symbol, occurrences, current_pywright_game.current_game.game_path)
+
+    def _handle_asset_report(self):
+        if current_pywright_game.current_game is None:
+            return
+        self.asset_report_view.show()
+        self.asset_report_view.start_report(current_pywright_game.current_game, self.central_widget.get_open_files_data())
+
+    def _handle_script_flow(self):
+        if current_pywright_game.current_game is None:
+            return
+        self.script_flow_view.show()
+        self.script_flow_view.start_update(current_pywright_game.current_game, self.central_widget.get_open_files_data())
+
+    def _update_shown_script_flow(self):
+        if self.script_flow_view.isVisible():
+            self._handle_script_flow()
+
     def _handle_character_viewer(self):
         char_viewer = CharacterViewerDialog(self)
         char_viewer.command_insert_at_cursor_requested.connect(self._handle_insert_into_cursor)
@@ -1,16 +1,29 @@
 import re
+from pathlib import Path
 
 from PyQt6.Qsci import QsciScintilla
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QColor, QKeyEvent
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QKeyEvent, QMouseEvent, QPaintEvent
 
 from data import EditorThemes, IDESettings
 from data.PyWrightScriptLexer import PyWrightScriptLexer
+from data.PyWrightSymbolTable import PyWrightCaseSymbols, MacroSignature
+from data.PyWrightProjectIndex import SymbolOccurrence, read_symbols
+from data.PyWrightScriptLinter import Problem, ProblemSeverity
+from data.AssetResolver import AssetResolver, AssetReference, read_asset_references
 
 
+_WARNING_INDICATOR_ID = 28
+_ERROR_INDICATOR_ID = 29
 _HIGHLIGHT_INDICATOR_ID = 30
 _PARAM_HILIGHT_INDICATOR_ID = 31 # why do we start at 30?
 
+_PROBLEM_INDICATOR_IDS = {ProblemSeverity.ERROR: _ERROR_INDICATOR_ID, ProblemSeverity.WARNING: _WARNING_INDICATOR_ID}
+_PROBLEM_INDICATOR_COLORS = {ProblemSeverity.ERROR: "#e51400", ProblemSeverity.WARNING: "#d79b00"}
+
+# Time the mouse has to stay over a macro name before its signature is shown, in milliseconds
+_MACRO_TOOLTIP_DWELL_TIME = 500
+
 
 class ParameterBoxManager:
     def __init__(self, parent: "IDEScintillaWidget"):
@@ -167,6 +180,12 @@ class IDEScintillaWidget(QsciScintilla):
     _highlight_in_progress = False
     """Ensures _highlight_all_occurences() runs only once"""
 
+    definition_requested = pyqtSignal(object)
+    """Emitted with the SymbolOccurrence under the cursor on F12, or under the mouse on Ctrl+click."""
+
+    references_requested = pyqtSignal(object)
+    """Emitted with the SymbolOccurrence under the cursor on Shift+F12."""
+
     def __init__(self, parent=None):
         super().__init__(parent)
 
@@ -191,6 +210,36 @@ class IDEScintillaWidget(QsciScintilla):
         self.setup_autocompletion()
         self.setLexer(self._lexer)
 
+        # Style the visible lines first, and the rest of the document during idle time
+        self.SendScintilla(QsciScintilla.SCI_SETIDLESTYLING, QsciScintilla.SC_IDLESTYLING_ALL)
+
+        # Squiggles under the problems found by the script linter
+        self._problems: list[Problem] = []
+        for severity, indicator_id in _PROBLEM_INDICATOR_IDS.items():
+            self.indicatorDefine(QsciScintilla.IndicatorStyle.SquiggleLowIndicator, indicator_id)
+            self.setIndicatorForegroundColor(QColor(_PROBLEM_INDICATOR_COLORS[severity]), indicator_id)
+
+        # Show the signature of the macro under the mouse, or the problem under it
+        self.SendScintilla(QsciScintilla.SCI_SETMOUSEDWELLTIME, _MACRO_TOOLTIP_DWELL_TIME)
+        self.SCN_DWELLSTART.connect(self._handle_dwell_start)
+        self.SCN_DWELLEND.connect(self._handle_dwell_end)
+
+    def paintEvent(self, event: QPaintEvent):
+        # The symbols are shared by all editors and can change while this one is in the background,
+        # so make sure the lexer uses their latest version before painting anything
+        self._lexer.update_symbols_if_changed()
+        super().paintEvent(event)
+
+    def setText(self, text: str):
+        # Replacing the text while word wrapping is on makes Scintilla wrap, and therefore style, the whole document
+        # at once, which freezes the window for seconds on big scripts.
+        # Without wrapping, only the visible lines get styled right away. Once wrapping is back on,
+        # Scintilla wraps and styles the rest of the document in small chunks whenever the window is idle.
+        wrap_mode = self.wrapMode()
+        self.setWrapMode(QsciScintilla.WrapMode.WrapNone)
+        super().setText(text)
+        self.setWrapMode(wrap_mode)
+
     def startParameterInsertion(self, line: int, indices:list[int], parameter_amount: int):
         self.parameter_manager.startParameterInsertion(line, indices, parameter_amount)
 
@@ -198,6 +247,17 @@ class IDEScintillaWidget(QsciScintilla):
         self.parameter_manager.endParameterInsertion()
 
     def keyPressEvent(self, event: QKeyEvent):
+        if event.key() == Qt.Key.Key_F12:
+            symbol = self.symbol_at(*self.line_column_from_position(
+                self.SendScintilla(QsciScintilla.SCI_GETCURRENTPOS)))
+            if symbol is None:
+                return
+            if event.modifiers() == Qt.KeyboardModifier.ShiftModifier:
+                self.references_requested.emit(symbol)
+            else:
+                self.definition_requested.emit(symbol)
+            return
+
         if event.key() == Qt.Key.Key_Escape and self.parameter_manager.isActive():
             self.endParameterInsertion()
             return
@@ -212,6 +272,43 @@ class IDEScintillaWidget(QsciScintilla):
         else:
             super().keyPressEvent(event)
 
+    def mousePressEvent(self, event: QMouseEvent):
+        if event.button() == Qt.MouseButton.LeftButton and event.modifiers() == Qt.KeyboardModifier.ControlModifier:
+            position = self.SendScintilla(QsciScintilla.SCI_POSITIONFROMPOINTCLOSE,
+                                          int(event.position().x()), int(event.position().y()))
+            symbol = self.symbol_at(*self.line_column_from_position(position)) if position >= 0 else None
+            if symbol is not None:
+                self.definition_requested.emit(symbol)
+                return
+
+        super().mousePressEvent(event)
+
+    def line_column_from_position(self, position: int) -> tuple[int, int]:
+        """Returns the line and the column in bytes of a position, like the columns of the symbols and problems.
+        Unlike lineIndexFromPosition(), which counts the characters of the line."""
+        line = self.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, position)
+        return line, position - self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line)
+
+    def position_from_line_column(self, line: int, column: int) -> int:
+        """Returns the position of a line and a column in bytes, see line_column_from_position()."""
+        return self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line) + column
+
+    def symbol_at(self, line: int, column: int) -> SymbolOccurrence | None:
+        """Returns the label, script, macro... at the given line and column in bytes, if there is one."""
+        line_text = self.text(line).encode("utf-8")
+        for symbol in read_symbols(line_text):
+            if symbol.column <= column <= symbol.column + len(symbol.name.encode("utf-8")):
+                return symbol._replace(line=line)
+        return None
+
+    def asset_at(self, line: int, column: int) -> AssetReference | None:
+        """Returns the background, portrait, music... at the given line and column in bytes, if there is one."""
+        line_text = self.text(line).encode("utf-8")
+        for reference in read_asset_references(line_text):
+            if reference.column <= column <= reference.column + reference.length:
+                return reference._replace(line=line)
+        return None
+
     def setup_autocompletion(self):
         # The autocompletion should be used from an API source to have a custom list of proposals
         threshold = IDESettings.get_autocompletion_trigger_threshold() if IDESettings.get_enable_autocompletion_check() else 0
@@ -228,14 +325,63 @@ class IDEScintillaWidget(QsciScintilla):
     def _handle_lexer_selection_request(self, line_begin: int, index_begin: int, line_end: int, index_end: int):
         self.setSelection(line_begin, index_begin, line_end, index_end)
 
-    def supply_builtin_macros_to_lexer(self, builtin_macros: list[str]):
-        self._lexer.set_builtin_macros(builtin_macros)
+    def set_problems(self, problems: list[Problem]):
+        """Underlines the given problems, replacing the previous ones. Their messages show when hovering them."""
+        self._problems = problems
+        for indicator_id in _PROBLEM_INDICATOR_IDS.values():
+            self._clear_all_highlights(indicator_id)
+        for problem in problems:
+            start = self.position_from_line_column(problem.line, problem.column)
+            self.SendScintilla(QsciScintilla.SCI_SETINDICATORCURRENT, _PROBLEM_INDICATOR_IDS[problem.severity])
+            self.SendScintilla(QsciScintilla.SCI_INDICATORFILLRANGE, start, max(1, problem.length))
+
+    def _problem_at(self, position: int) -> Problem | None:
+        line, column = self.line_column_from_position(position)
+        for problem in self._problems:
+            # Indicators move along with the text, so the problem is found where its squiggle is now
+            indicator_id = _PROBLEM_INDICATOR_IDS[problem.severity]
+            if problem.line == line and problem.column <= column <= problem.column + max(1, problem.length) \
+                    and self.SendScintilla(QsciScintilla.SCI_INDICATORVALUEAT, indicator_id, position):
+                return problem
+        return None
+
+    def _handle_dwell_start(self, position: int, x: int, y: int):
+        # The position is -1 when the mouse is not over any text
+        if position < 0 or self.isListActive():
+            return
+
+        problem = self._problem_at(position)
+        if problem is not None:
+            self.SendScintilla(QsciScintilla.SCI_CALLTIPSHOW, position, problem.message.encode("utf-8"))
+            return
+
+        word_start = self.SendScintilla(QsciScintilla.SCI_WORDSTARTPOSITION, position, True)
+        word_end = self.SendScintilla(QsciScintilla.SCI_WORDENDPOSITION, position, True)
+        # The braces of {macro} calls are word characters, for their autocompletion
+        macro_name = self.text(word_start, word_end).strip("{}")
+
+        signature = self._lexer.get_macro_signature(macro_name)
+        if signature is not None:
+            self.SendScintilla(QsciScintilla.SCI_CALLTIPSHOW, word_start,
+                               format_macro_signature(signature).encode("utf-8"))
+            return
+
+        # Show which file an asset name stands for, as the engine would find it
+        asset_resolver, case_name = self._lexer.get_asset_resolver()
+        reference = self.asset_at(*self.line_column_from_position(position)) if asset_resolver is not None else None
+        if reference is not None:
+            file_path = asset_resolver.resolve(reference.kind, reference.name, case_name)
+            self.SendScintilla(QsciScintilla.SCI_CALLTIPSHOW, position,
+                               str(file_path if file_path is not None else "Not found").encode("utf-8"))
+
+    def _handle_dwell_end(self, position: int, x: int, y: int):
+        self.SendScintilla(QsciScintilla.SCI_CALLTIPCANCEL)
 
-    def supply_game_macros_to_lexer(self, game_macros: list[str]):
-        self._lexer.set_game_macros(game_macros)
+    def supply_symbols_to_lexer(self, symbols: PyWrightCaseSymbols):
+        self._lexer.set_symbols(symbols)
 
-    def supply_case_macros_to_lexer(self, case_macros: list[str]):
-        self._lexer.set_case_macros(case_macros)
+    def supply_asset_resolver_to_lexer(self, asset_resolver: AssetResolver, case_name: str):
+        self._lexer.set_asset_resolver(asset_resolver, case_name)
 
     def supply_font_properties_to_lexer(self, font_name: str, font_size: int, bold_font: bool):
         self._lexer.set_font_properties(font_name, font_size, bold_font)
@@ -302,4 +448,16 @@ class IDEScintillaWidget(QsciScintilla):
     def _clear_all_highlights(self, id=_HIGHLIGHT_INDICATOR_ID):
         last_line = self.lines() - 1
         last_index = self.lineLength(last_line)
-        self.clearIndicatorRange(0, 0, last_line, last_index, id)
\ No newline at end of file
+        self.clearIndicatorRange(0, 0, last_line, last_index, id)
+
+
+def format_macro_signature(signature: MacroSignature) -> str:
+    """Returns the tooltip text of a macro: how to call it, and where it is defined."""
+    usage = " ".join([signature.name] + ["${}".format(n) for n in range(1, signature.argument_count + 1)])
+    lines = [usage]
+    if signature.variables:
+        lines.append("Uses " + ", ".join("$" + variable for variable in signature.variables))
+    if signature.file_path:
+        lines.append("Defined in {}, line {} ({} lines)".format(Path(signature.file_path).name,
+                                                               signature.line, signature.body_length))
+    return "\n".join(lines)
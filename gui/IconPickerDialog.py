@@ -1,8 +1,6 @@
 # Custom Icon Picker Dialog.
 # Checks through the subfolders in {PyWright Dir}/art/
 
-from pathlib import Path
-
 from PyQt6.QtWidgets import (QDialog, QDialogButtonBox, QComboBox, QCheckBox,
                              QListView, QFileIconProvider,
                              QHBoxLayout, QVBoxLayout, QMessageBox)
@@ -10,6 +8,7 @@ from PyQt6.QtGui import QPixmap, QIcon, QFileSystemModel
 from PyQt6.QtCore import QDir, QSize, Qt
 
 from data.PyWrightGame import CurrentPyWrightGame
+from data.AssetResolver import AssetKind, get_asset_folder_path
 
 accepted_types = (".png", ".jpg")
 ICON_SIZE = QSize(128, 128)
@@ -83,7 +82,7 @@ class IconPickerDialog(QDialog):
 
         selected_root_folder = self._pywright_root_dir if checking_root_art else str(self._selected_game_info.game_path)
 
-        art_folder_path = Path("{}/art/".format(selected_root_folder))
+        art_folder_path = get_asset_folder_path(selected_root_folder, AssetKind.ART)
 
         if not art_folder_path.exists() or not art_folder_path.is_dir():
             raise FileNotFoundError("art folder doesn't exist!")
@@ -105,7 +104,7 @@ class IconPickerDialog(QDialog):
         checking_root_art = self._global_folder_checkbox.isChecked()
         selected_root_folder = self._pywright_root_dir if checking_root_art else str(self._selected_game_info.game_path)
 
-        folder_path = Path("{}/art/{}".format(selected_root_folder, subfolder_name))
+        folder_path = get_asset_folder_path(selected_root_folder, AssetKind.ART) / subfolder_name
 
         fs_model = QFileSystemModel()
         icon_provider = ThumbnailIconProvider()
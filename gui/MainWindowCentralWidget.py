@@ -1,20 +1,45 @@
+import logging
+import os
+import threading
 from pathlib import Path
 
-from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
 from PyQt6.QtWidgets import QWidget, QTabWidget, QVBoxLayout, QMessageBox
 
 from data import IDESettings, EditorThemes
+from data.MacroFileWatcher import MacroFileWatcher
+from data.AssetFolderWatcher import AssetFolderWatcher
+from data import ProjectSearch, TrigramIndex
+from data.ProjectSearch import FileReplacement
 from data.PyWrightGame import PyWrightGameInfo
+from data.PyWrightProjectIndex import SymbolKind, SymbolOccurrence
+from data.PyWrightScriptLinter import PyWrightScriptLinter, LintContext, Problem
+from data.ScriptFiles import list_game_scripts
 from .FileEditWidget import FileEditWidget
 from .FindReplaceDialog import SearchScope, FindType, ReplaceType
 from .GamePropertiesWidget import GamePropertiesWidget
 from .ImageViewerWidget import ImageViewerWidget
 
+log = logging.getLogger(__name__)
+
+# Time without typing before the scripts get checked again, in milliseconds
+_LINT_DELAY = 700
+
+
+class _LintSignals(QObject):
+    """Brings the problems found on the worker thread to the GUI thread, along with the id of the pass.
+    The problems are None if the pass failed."""
+    lint_finished = pyqtSignal(int, object)
+
 
 class MainWindowCentralWidget(QWidget):
     update_save_button_requested = pyqtSignal(bool)
     current_tab_cursor_position_changed = pyqtSignal(int, int)
     selection_length_changed = pyqtSignal(int)
+    # Gives the symbol and the list of its occurrences
+    references_found = pyqtSignal(object, list)
+    # Gives the problems of every script of the game by absolute path, after each pass of the linter
+    problems_found = pyqtSignal(dict)
 
     def __init__(self, parent=None):
         """Central widget for the main window. Handles the open tabs.
@@ -39,6 +64,22 @@ class MainWindowCentralWidget(QWidget):
         self.pywright_installation_path: str = ""
         self.selected_game_info: PyWrightGameInfo | None = None
         self._game_properties_widget: GamePropertiesWidget | None = None
+        self._macro_file_watcher: MacroFileWatcher | None = None
+        self._asset_folder_watcher: AssetFolderWatcher | None = None
+
+        # The scripts are checked in the background, after each save and once typing stops
+        self._linter = PyWrightScriptLinter()
+        self._lint_timer = QTimer(self)
+        self._lint_timer.setSingleShot(True)
+        self._lint_timer.setInterval(_LINT_DELAY)
+        self._lint_timer.timeout.connect(self._start_lint)
+        # Late results of the previous game are told apart by their id, a single pass runs at a time
+        self._lint_id = 0
+        self._is_linting = False
+        self._lint_signals = _LintSignals(self)
+        self._lint_signals.lint_finished.connect(self._handle_lint_finished)
+        self._problems_by_file: dict[str, list[Problem]] = {}
+        self._linted_data: dict[str, bytes] = {}
 
     def set_selected_game(self, selected_game_info: PyWrightGameInfo):
         self.selected_game_info = selected_game_info
@@ -46,6 +87,142 @@ class MainWindowCentralWidget(QWidget):
         self._game_properties_widget = GamePropertiesWidget(self.selected_game_info)
         self._game_properties_widget.load_game(self.selected_game_info)
 
+        # Keep the macros up to date when macro files are edited, inside or outside the IDE
+        if self._macro_file_watcher is not None:
+            self._macro_file_watcher.deleteLater()
+        self._macro_file_watcher = MacroFileWatcher(self.selected_game_info, self)
+        self._macro_file_watcher.macros_changed.connect(self._handle_macros_changed)
+
+        # Forget where assets were found when they are added or removed, so that the scripts get checked against them again
+        if self._asset_folder_watcher is not None:
+            self._asset_folder_watcher.deleteLater()
+        self._asset_folder_watcher = AssetFolderWatcher(self.selected_game_info.asset_resolver,
+                                                        self.selected_game_info.game_cases, self)
+        self._asset_folder_watcher.assets_changed.connect(self._lint_timer.start)
+
+        # Index the symbols of all the scripts without blocking the window, saved files are then reindexed one by one
+        self.selected_game_info.project_index.build_in_background(self.selected_game_info.game_path,
+                                                                  self.selected_game_info.game_cases)
+        # Bring the trigram index of the game up to date now, so that the first search of the project doesn't wait for it
+        TrigramIndex.update_in_background(self.selected_game_info.game_path)
+
+        # The problems of the previous game are forgotten, and the new game gets checked from scratch
+        self._linter = PyWrightScriptLinter()
+        self._lint_id += 1
+        self._is_linting = False
+        self._problems_by_file = {}
+        self._start_lint()
+
+    def _handle_macros_changed(self):
+        # The lexers share the game's symbol table, they only need to repaint to pick the new macros up.
+        # Tabs in the background will do so when they get shown again.
+        if self.is_file_editing_tab(self.tab_widget.currentIndex()):
+            self.tab_widget.currentWidget().update_highlighting()
+        self._lint_timer.start()
+
+    def _handle_definition_requested(self, file_path: str, symbol: SymbolOccurrence):
+        if self.selected_game_info is None:
+            return
+
+        definition_path, definition_line, definition_index = None, 0, 0
+
+        # Macros are looked up like the engine does for the case of the file, builtin macros included
+        if symbol.kind is SymbolKind.MACRO:
+            case_name = Path(file_path).parent.name
+            signature = self.selected_game_info.symbol_table.case_view(case_name).get_signatures().get(symbol.name)
+            if signature is not None and signature.file_path:
+                definition_path, definition_line = signature.file_path, max(0, signature.line - 1)
+
+        if definition_path is None:
+            definition = self.selected_game_info.project_index.find_definition(symbol.kind, symbol.name, file_path)
+            if definition is None:
+                return
+            definition_path, definition_line, definition_index = \
+                definition.file_path, definition.line, definition.column
+
+        self.open_location(definition_path, definition_line, definition_index)
+
+    def _handle_references_requested(self, file_path: str, symbol: SymbolOccurrence):
+        if self.selected_game_info is None:
+            return
+
+        project_index = self.selected_game_info.project_index
+        occurrences = (project_index.find_definitions(symbol.kind, symbol.name)
+                       + project_index.find_references(symbol.kind, symbol.name))
+        # Labels are local to their script
+        if symbol.kind is SymbolKind.LABEL:
+            occurrences = [occurrence for occurrence in occurrences if Path(occurrence.file_path) == Path(file_path)]
+
+        self.references_found.emit(symbol, occurrences)
+
+    def open_location(self, file_path: str, line: int, column: int):
+        """Opens a file, or switches to its tab, then moves the cursor to the given line and column in bytes."""
+        self.open_new_editing_tab(file_path)
+        current_tab = self.tab_widget.currentWidget()
+        if isinstance(current_tab, FileEditWidget) and Path(current_tab.file_path) == Path(file_path):
+            current_tab.go_to_position(line, column)
+
+    def _handle_file_saved(self, file_path: str):
+        if self.selected_game_info is not None:
+            self.selected_game_info.project_index.update_file(file_path)
+            self._lint_timer.start()
+
+    def _start_lint(self):
+        """Checks the scripts of the game on a worker thread, or once the running pass is done."""
+        if self.selected_game_info is None:
+            return
+        if self._is_linting:
+            self._lint_timer.start()
+            return
+
+        symbol_table = self.selected_game_info.symbol_table
+        case_names = list(self.selected_game_info.game_cases)
+        macros_by_case = {case_name: frozenset(symbol_table.case_view(case_name).get_signatures())
+                          for case_name in case_names + [""]}
+        # Open files are checked with their unsaved changes
+        self._linted_data = self.get_open_files_data()
+        context = LintContext(self.selected_game_info.game_path, macros_by_case, symbol_table.version,
+                              self._linted_data, self.selected_game_info.asset_resolver)
+        game_path = self.selected_game_info.game_path
+        linter = self._linter
+        lint_id = self._lint_id
+
+        def lint():
+            # Always told, so that a failed pass (such as a file being written) doesn't stop the next ones
+            problems_by_file = None
+            try:
+                problems_by_file = linter.lint(list_game_scripts(game_path, case_names), context)
+            except Exception:
+                log.exception("Could not check the scripts of %s", game_path)
+            finally:
+                self._lint_signals.lint_finished.emit(lint_id, problems_by_file)
+
+        self._is_linting = True
+        threading.Thread(target=lint, name="Script linting", daemon=True).start()
+
+    def _handle_lint_finished(self, lint_id: int, problems_by_file: dict[str, list[Problem]] | None):
+        if lint_id != self._lint_id:
+            return
+
+        self._is_linting = False
+        # The problems already shown are kept after a failed pass, until the next one
+        if problems_by_file is None:
+            self._lint_timer.start()
+            return
+        self._problems_by_file = problems_by_file
+        for idx in range(self.tab_widget.count()):
+            if self.is_file_editing_tab(idx):
+                self._show_problems_in_tab(self.tab_widget.widget(idx))
+        self.problems_found.emit(problems_by_file)
+
+    def _show_problems_in_tab(self, file_edit_widget: FileEditWidget):
+        key = os.path.abspath(file_edit_widget.file_path) if file_edit_widget.file_path != "" else ""
+        # The positions of the problems only match the text that was checked, newer text will be checked soon
+        linted_data = self._linted_data.get(key)
+        if linted_data is not None and linted_data != file_edit_widget.get_data():
+            return
+        file_edit_widget.set_problems(self._problems_by_file.get(key, []))
+
     # ====== Tab Handling ======
     # ==== Opening new tab ====
     def open_new_tab(self, tab_widget: QWidget, tab_title: str):
@@ -81,7 +258,7 @@ class MainWindowCentralWidget(QWidget):
 
             opened_tab: FileEditWidget = self.tab_widget.widget(i)
 
-            if opened_tab.file_path == file_path:
+            if Path(opened_tab.file_path) == Path(file_path):
                 self.tab_widget.setCurrentIndex(i)
                 return
         # Create a new FileEditWidget, and add it to the tab widget
@@ -92,19 +269,23 @@ class MainWindowCentralWidget(QWidget):
         file_edit_widget.file_name_changed.connect(self.handle_rename_tab)
         EditorThemes.current_editor_theme.load_theme(IDESettings.get_editor_color_theme())
         file_edit_widget.file_modified.connect(self._update_save_button_and_current_tab)
+        file_edit_widget.file_saved.connect(self._handle_file_saved)
+        file_edit_widget.text_changed.connect(self._lint_timer.start)
+        file_edit_widget.definition_requested.connect(self._handle_definition_requested)
+        file_edit_widget.references_requested.connect(self._handle_references_requested)
 
         if self.selected_game_info is not None:
-            file_edit_widget.supply_builtin_macros_to_lexer(self.selected_game_info.builtin_macros)
-            file_edit_widget.supply_game_macros_to_lexer(self.selected_game_info.game_macros)
             case_name = Path(file_path).parent.name
-            if case_name in self.selected_game_info.case_macros:
-                file_edit_widget.supply_case_macros_to_lexer(self.selected_game_info.case_macros[case_name])
+            file_edit_widget.supply_symbols_to_lexer(self.selected_game_info.symbol_table.case_view(case_name))
+            asset_resolver = self.selected_game_info.asset_resolver
+            file_edit_widget.supply_asset_resolver_to_lexer(asset_resolver, asset_resolver.get_case_name(file_path))
 
         file_edit_widget.supply_editor_color_theme_to_lexer()
         file_edit_widget.move_to_tab_requested.connect(self._handle_move_to_tab)
         file_edit_widget.replace_next_in_next_tabs_requested.connect(self.replace_next_in_next_tabs)
         file_edit_widget.cursor_position_changed.connect(self._update_line_and_col)
         file_edit_widget.selected_text_changed.connect(self._handle_text_selection_changed)
+        self._show_problems_in_tab(file_edit_widget)
         file_name = Path(file_path).name
         # Append folder name if two tabs with the same name are open
         for i in range(self.tab_widget.count()):
@@ -372,6 +553,50 @@ class MainWindowCentralWidget(QWidget):
             curr_tab.replace_all_in_file(text_to_find, text_to_replace)
         self._update_tab_modified_infos()
 
+    def get_open_files_data(self) -> dict[str, bytes]:
+        """Returns the text of every file open in a tab by absolute path, unsaved changes included."""
+        result = {}
+        for idx in range(self.tab_widget.count()):
+            if self.is_file_editing_tab(idx) and self.tab_widget.widget(idx).file_path != "":
+                curr_tab: FileEditWidget = self.tab_widget.widget(idx)
+                result[os.path.abspath(curr_tab.file_path)] = curr_tab.get_data()
+        return result
+
+    def apply_project_replacements(self, replacements: list[FileReplacement], text_to_replace: str) -> list[str]:
+        """Applies replacements computed by ProjectSearch. Files open in a tab are changed in their editor,
+        with a single undo action each, the other ones are written to the disk.
+            :return: The reason of each file that couldn't be changed"""
+        open_tabs: dict[str, FileEditWidget] = {}
+        for idx in range(self.tab_widget.count()):
+            if self.is_file_editing_tab(idx) and self.tab_widget.widget(idx).file_path != "":
+                open_tabs[os.path.abspath(self.tab_widget.widget(idx).file_path)] = self.tab_widget.widget(idx)
+
+        failures = []
+        wrote_files = False
+        for replacement in replacements:
+            open_tab = open_tabs.get(os.path.abspath(replacement.file_path))
+            if open_tab is not None:
+                if open_tab.get_data() != replacement.old_data:
+                    failures.append("{} was edited since the replacement was computed".format(replacement.file_path))
+                    continue
+                open_tab.replace_ranges(replacement.match_ranges, text_to_replace)
+                continue
+
+            try:
+                ProjectSearch.write_replacement(replacement)
+            except OSError as e:
+                failures.append(str(e))
+                continue
+            wrote_files = True
+            if self.selected_game_info is not None:
+                self.selected_game_info.project_index.update_file(replacement.file_path)
+
+        # The editors of the open files check their scripts again by themselves, the written ones don't
+        if wrote_files:
+            self._lint_timer.start()
+        self._update_tab_modified_infos()
+        return failures
+
     def tabs_count(self) -> int:
         return self.tab_widget.count()
 
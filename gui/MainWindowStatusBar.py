@@ -1,9 +1,12 @@
 """Just a status bar with a custom separator"""
 
-from PyQt6.QtWidgets import QStatusBar, QLabel, QFrame
+from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtWidgets import QStatusBar, QLabel, QFrame, QPushButton
 
 
 class MainWindowStatusBar(QStatusBar):
+    # Clicking the problem count shows or hides the Problems panel
+    problems_button_clicked = pyqtSignal()
 
     def __init__(self, parent=None):
         super(MainWindowStatusBar, self).__init__(parent)
@@ -13,11 +16,17 @@ class MainWindowStatusBar(QStatusBar):
         self._selection_length_info_label = QLabel()
         self._line_col_info_label = QLabel()
         self._installation_path_label = QLabel("No PyWright folder selected")
+        self._problems_button = QPushButton()
+        self._problems_button.setFlat(True)
+        self._problems_button.setStatusTip("Show or hide the problems found in the scripts")
+        self._problems_button.clicked.connect(self.problems_button_clicked)
+        self._problems_button.setVisible(False)
 
         self._selection_length_info_label.setContentsMargins(4, 0, 4, 0)
         self._line_col_info_label.setContentsMargins(4, 0, 4, 0)
         self._installation_path_label.setContentsMargins(4, 0, 4, 0)
 
+        self.addPermanentWidget(self._problems_button)
         self.addPermanentWidget(self._selection_length_info_label)
         self.addPermanentWidget(self._line_col_info_label)
         self.addPermanentWidget(self._installation_path_label)
@@ -30,6 +39,10 @@ class MainWindowStatusBar(QStatusBar):
         else:
             self._selection_length_info_label.setText("")
 
+    def set_problem_count_info(self, error_count: int, warning_count: int):
+        self._problems_button.setText("{} errors, {} warnings".format(error_count, warning_count))
+        self._problems_button.setVisible(True)
+
     def set_installation_path_info(self, installation_path: str):
         self._installation_path_label.setText(installation_path)
 
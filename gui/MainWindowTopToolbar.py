@@ -1,7 +1,7 @@
 # Main Window Toolbar
 # Contains stuff like "New File", "Load File", etc.
 
-from PyQt6.QtWidgets import QToolBar, QWidget, QMenu
+from PyQt6.QtWidgets import QToolBar, QWidget, QMenu, QStyle
 from PyQt6.QtGui import QIcon, QKeySequence, QAction
 
 import gui.IDEMainWindow
@@ -127,6 +127,18 @@ class MainWindowTopToolbar(QToolBar):
         self.character_viewer_action.setIcon(QIcon(character_viewer_icon_path))
         self.character_viewer_action.setStatusTip("Open Character Viewer tool")
 
+        self.asset_report_action = QAction("Asset Report")
+        self.asset_report_action.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_FileDialogContentsView))
+        self.asset_report_action.setEnabled(False)
+        self.asset_report_action.setStatusTip(
+            "List the assets the scripts refer to that can't be found, and the ones no script uses")
+
+        self.script_flow_action = QAction("Script Flow")
+        self.script_flow_action.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_FileDialogListView))
+        self.script_flow_action.setEnabled(False)
+        self.script_flow_action.setStatusTip(
+            "Show the scripts and labels each case runs, and the ones that are never reached")
+
         run_pywright_icon_path = IconThemes.icon_path_from_theme(IconThemes.ICON_NAME_RUN_PYWRIGHT)
         self.run_pywright_action = QAction(QIcon(run_pywright_icon_path), "Run PyWright")
         self.run_pywright_action.setEnabled(False)
@@ -162,6 +174,8 @@ class MainWindowTopToolbar(QToolBar):
         self.addAction(self.logger_toggle_action)
         self.addSeparator()
         self.addAction(self.character_viewer_action)
+        self.addAction(self.asset_report_action)
+        self.addAction(self.script_flow_action)
         self.addSeparator()
         self.addAction(self.run_pywright_action)
         self.addSeparator()
@@ -189,6 +203,8 @@ class MainWindowTopToolbar(QToolBar):
         self.open_file_action.setEnabled(has_pywright_game)
         # Let's not enable the save button yet, and handle it in update_save_button() instead.
         self.find_replace_dialog_action.setEnabled(has_pywright_game)
+        self.asset_report_action.setEnabled(has_pywright_game)
+        self.script_flow_action.setEnabled(has_pywright_game)
         self.run_pywright_action.setEnabled(has_pywright)
         self.update_toolbar_toggle_buttons()
         self.update_recent_folders_list()
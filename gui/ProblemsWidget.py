@@ -0,0 +1,116 @@
+# Dock listing the problems the script linter found in the scripts of the game, grouped by file
+
+from pathlib import Path
+
+from PyQt6.QtWidgets import (QWidget, QDockWidget, QTreeWidget, QTreeWidgetItem, QHBoxLayout, QLabel, QPushButton,
+                             QStyle)
+from PyQt6.QtGui import QIcon
+from PyQt6.QtCore import Qt, pyqtSignal
+
+from data.PyWrightScriptLinter import Problem, ProblemSeverity
+
+import data.IconThemes as IconThemes
+
+# Role of the tree items holding the (file path, line, index) to jump to
+_LOCATION_ROLE = Qt.ItemDataRole.UserRole
+_SEVERITY_ICONS = {ProblemSeverity.ERROR: QStyle.StandardPixmap.SP_MessageBoxCritical,
+                   ProblemSeverity.WARNING: QStyle.StandardPixmap.SP_MessageBoxWarning}
+
+
+class ProblemsWidget(QDockWidget):
+    # Gives the file path, line and index to open
+    open_location_requested = pyqtSignal(str, int, int)
+    # Gives the number of errors and warnings
+    problem_count_changed = pyqtSignal(int, int)
+
+    def __init__(self):
+        super().__init__()
+
+        self.setWindowTitle("Problems")
+        self.setObjectName("ProblemsWidget")
+
+        self._problems_tree = QTreeWidget()
+        self._problems_tree.setHeaderHidden(True)
+        self._problems_tree.itemActivated.connect(self._handle_item_activated)
+        self._problems_tree.itemClicked.connect(self._handle_item_activated)
+
+        self.setWidget(self._problems_tree)
+        self.setFeatures(QDockWidget.DockWidgetFeature.DockWidgetClosable)
+
+        self._title_label = QLabel("Problems")
+
+        hide_icon_path = IconThemes.icon_path_from_theme(IconThemes.ICON_NAME_MINUS)
+        self._hide_button = QPushButton(QIcon(hide_icon_path), "")
+        self._hide_button.setFlat(True)
+        self._hide_button.clicked.connect(self.hide)
+        self._hide_button.setFixedWidth(30)
+
+        self.setTitleBarWidget(self._create_title_bar_widget())
+
+        # Problems of every file by path, the files whose problems didn't change keep their tree items
+        self._problems_by_file: dict[str, list[Problem]] = {}
+        self._file_items: dict[str, QTreeWidgetItem] = {}
+
+    def _create_title_bar_widget(self):
+        result = QWidget()
+
+        layout = QHBoxLayout()
+
+        layout.addWidget(self._title_label)
+        layout.addStretch()
+        layout.addWidget(self._hide_button)
+        layout.setContentsMargins(4, 0, 2, 4)
+
+        result.setLayout(layout)
+        return result
+
+    def show_problems(self, problems_by_file: dict[str, list[Problem]], game_path: Path):
+        """Lists the problems of every file, replacing the previous ones. Files without problems are left out.
+            :param problems_by_file: The problems of each file by path
+            :param game_path: Path to the game folder, to show the files relative to it
+            :return: None"""
+        problems_by_file = {file_path: problems for file_path, problems in problems_by_file.items() if problems}
+
+        for file_path in list(self._file_items):
+            if problems_by_file.get(file_path) != self._problems_by_file.get(file_path):
+                file_item = self._file_items.pop(file_path)
+                self._problems_tree.invisibleRootItem().removeChild(file_item)
+
+        for file_path in sorted(problems_by_file):
+            if file_path not in self._file_items:
+                self._file_items[file_path] = self._create_file_item(file_path, problems_by_file[file_path], game_path)
+        self._problems_by_file = problems_by_file
+
+        # Keep the files in order, whichever were added
+        self._problems_tree.sortItems(0, Qt.SortOrder.AscendingOrder)
+
+        error_count = sum(problem.severity is ProblemSeverity.ERROR
+                          for problems in problems_by_file.values() for problem in problems)
+        warning_count = sum(len(problems) for problems in problems_by_file.values()) - error_count
+        self._title_label.setText("Problems ({} errors, {} warnings)".format(error_count, warning_count))
+        self.problem_count_changed.emit(error_count, warning_count)
+
+    def _create_file_item(self, file_path: str, problems: list[Problem], game_path: Path) -> QTreeWidgetItem:
+        try:
+            file_name = str(Path(file_path).relative_to(game_path))
+        except ValueError:
+            file_name = file_path
+        file_item = QTreeWidgetItem(self._problems_tree, ["{} ({})".format(file_name, len(problems))])
+        for problem in problems:
+            problem_item = QTreeWidgetItem(file_item, ["{}: {}".format(problem.line + 1, problem.message)])
+            problem_item.setIcon(0, self.style().standardIcon(_SEVERITY_ICONS[problem.severity]))
+            problem_item.setData(0, _LOCATION_ROLE, (problem.file_path, problem.line, problem.column))
+        file_item.setExpanded(True)
+        return file_item
+
+    def clear(self):
+        self._problems_tree.clear()
+        self._problems_by_file.clear()
+        self._file_items.clear()
+        self._title_label.setText("Problems")
+        self.problem_count_changed.emit(0, 0)
+
+    def _handle_item_activated(self, item: QTreeWidgetItem):
+        location = item.data(0, _LOCATION_ROLE)
+        if location is not None:
+            self.open_location_requested.emit(*location)
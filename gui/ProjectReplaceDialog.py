@@ -0,0 +1,118 @@
+# Computes a replacement in all the scripts of the game in the background, then previews the changes of each file
+# The user picks which files to change before anything gets written
+
+import difflib
+import re
+import threading
+from pathlib import Path
+from typing import Callable
+
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import (QDialog, QWidget, QDialogButtonBox, QListWidget, QListWidgetItem, QVBoxLayout, QLabel,
+                             QPlainTextEdit, QSplitter)
+
+from data import ProjectSearch
+from data.ProjectSearch import FileReplacement
+
+# Lines of context around each change in the previews
+_DIFF_CONTEXT_LINES = 2
+
+
+class _PlanningSignals(QObject):
+    """Brings the computed replacements from the worker thread to the GUI thread."""
+    replacements_planned = pyqtSignal(list)
+
+
+class ProjectReplaceDialog(QDialog):
+    def __init__(self, parent: QWidget, text_to_find: str, text_to_replace: str, list_files: Callable[[], list[Path]],
+                 pattern: re.Pattern, open_file_data: dict[str, bytes], game_path: Path):
+        """Computes the replacement in all the given files, then shows the changes for the user to accept.
+            :param parent: The parent widget.
+            :param text_to_find: The searched text, to show
+            :param text_to_replace: The text replacing every match
+            :param list_files: Function listing the files to replace in, called on the worker thread
+            :param pattern: The pattern from compile_search_pattern()
+            :param open_file_data: The contents of the files open in editors, by absolute path
+            :param game_path: Path to the game folder, to show the files relative to it
+        """
+        super().__init__(parent)
+
+        self.setWindowTitle("Replace in Project")
+        self.setMinimumSize(800, 500)
+
+        self._game_path = Path(game_path)
+        self._replacements: list[FileReplacement] = []
+
+        self._text_label = QLabel("Looking for \"{}\"...".format(text_to_find), self)
+
+        self._files_list_widget = QListWidget(self)
+        self._files_list_widget.currentRowChanged.connect(self._show_preview)
+
+        self._preview_text_edit = QPlainTextEdit(self)
+        self._preview_text_edit.setReadOnly(True)
+        self._preview_text_edit.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self._preview_text_edit.setFont(QFont("Courier New"))
+
+        splitter = QSplitter(self)
+        splitter.addWidget(self._files_list_widget)
+        splitter.addWidget(self._preview_text_edit)
+        splitter.setStretchFactor(1, 2)
+
+        self._dialog_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        self._dialog_box.button(QDialogButtonBox.StandardButton.Ok).setText("Replace")
+        self._dialog_box.button(QDialogButtonBox.StandardButton.Ok).setEnabled(False)
+        self._dialog_box.accepted.connect(self.accept)
+        self._dialog_box.rejected.connect(self.reject)
+
+        main_layout = QVBoxLayout()
+
+        main_layout.addWidget(self._text_label)
+        main_layout.addWidget(splitter)
+        main_layout.addWidget(self._dialog_box)
+
+        self.setLayout(main_layout)
+
+        # The dialog outlives the worker thread, as its parent keeps it, so the signals can always be received
+        self._planning_signals = _PlanningSignals(self)
+        self._planning_signals.replacements_planned.connect(self._handle_replacements_planned)
+        threading.Thread(target=lambda: self._planning_signals.replacements_planned.emit(
+                             ProjectSearch.plan_replacements(list_files(), pattern, text_to_replace, open_file_data)),
+                         name="Project replace", daemon=True).start()
+
+    def get_accepted_replacements(self) -> list[FileReplacement]:
+        """Returns the replacements of the files left checked."""
+        return [replacement for row, replacement in enumerate(self._replacements)
+                if self._files_list_widget.item(row).checkState() == Qt.CheckState.Checked]
+
+    def _handle_replacements_planned(self, replacements: list[FileReplacement]):
+        self._replacements = replacements
+        match_count = sum(len(replacement.match_ranges) for replacement in replacements)
+        self._text_label.setText("{} matches will be replaced in {} files. "
+                                 "Uncheck the files to leave unchanged.".format(match_count, len(replacements)))
+
+        for replacement in replacements:
+            try:
+                file_name = str(Path(replacement.file_path).relative_to(self._game_path))
+            except ValueError:
+                file_name = replacement.file_path
+            item = QListWidgetItem("{} ({})".format(file_name, len(replacement.match_ranges)))
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked)
+            self._files_list_widget.addItem(item)
+
+        if replacements:
+            self._files_list_widget.setCurrentRow(0)
+            self._dialog_box.button(QDialogButtonBox.StandardButton.Ok).setEnabled(True)
+
+    def _show_preview(self, row: int):
+        if not 0 <= row < len(self._replacements):
+            self._preview_text_edit.clear()
+            return
+
+        replacement = self._replacements[row]
+        old_lines = replacement.old_data.decode("utf-8", "replace").splitlines()
+        new_lines = replacement.new_data.decode("utf-8", "replace").splitlines()
+        file_name = Path(replacement.file_path).name
+        diff = difflib.unified_diff(old_lines, new_lines, file_name, file_name, n=_DIFF_CONTEXT_LINES, lineterm="")
+        self._preview_text_edit.setPlainText("\n".join(diff))
@@ -0,0 +1,104 @@
+# Dock listing the places where a label, flag, variable, evidence or macro is used, grouped by case and file
+
+from pathlib import Path
+
+from PyQt6.QtWidgets import QWidget, QDockWidget, QTreeWidget, QTreeWidgetItem, QHBoxLayout, QLabel, QPushButton
+from PyQt6.QtGui import QIcon
+from PyQt6.QtCore import Qt, pyqtSignal
+
+from data.PyWrightProjectIndex import SymbolOccurrence
+
+import data.IconThemes as IconThemes
+
+# Role of the tree items holding the (file path, line, index) to jump to
+_LOCATION_ROLE = Qt.ItemDataRole.UserRole
+
+
+class ReferencesWidget(QDockWidget):
+    # Gives the file path, line and index to open
+    open_location_requested = pyqtSignal(str, int, int)
+
+    def __init__(self):
+        super().__init__()
+
+        self.setWindowTitle("References")
+        self.setObjectName("ReferencesWidget")
+
+        self._references_tree = QTreeWidget()
+        self._references_tree.setHeaderHidden(True)
+        self._references_tree.itemActivated.connect(self._handle_item_activated)
+        self._references_tree.itemClicked.connect(self._handle_item_activated)
+
+        self.setWidget(self._references_tree)
+        self.setFeatures(QDockWidget.DockWidgetFeature.DockWidgetClosable)
+
+        self._title_label = QLabel("References")
+
+        hide_icon_path = IconThemes.icon_path_from_theme(IconThemes.ICON_NAME_MINUS)
+        self._hide_button = QPushButton(QIcon(hide_icon_path), "")
+        self._hide_button.setFlat(True)
+        self._hide_button.clicked.connect(self.hide)
+        self._hide_button.setFixedWidth(30)
+
+        self.setTitleBarWidget(self._create_title_bar_widget())
+
+    def _create_title_bar_widget(self):
+        result = QWidget()
+
+        layout = QHBoxLayout()
+
+        layout.addWidget(self._title_label)
+        layout.addStretch()
+        layout.addWidget(self._hide_button)
+        layout.setContentsMargins(4, 0, 2, 4)
+
+        result.setLayout(layout)
+        return result
+
+    def show_references(self, symbol: SymbolOccurrence, occurrences: list[SymbolOccurrence], game_path: Path):
+        """Lists the occurrences of a symbol, grouped by case (or game folder) and by file.
+            :param symbol: The symbol the occurrences are of
+            :param occurrences: Its definitions and uses
+            :param game_path: Path to the game folder, to tell the case of each file
+            :return: None"""
+        self._references_tree.clear()
+        self._title_label.setText("References of {} {} ({})".format(symbol.kind.name.lower(), symbol.name,
+                                                                    len(occurrences)))
+
+        folder_items: dict[Path, QTreeWidgetItem] = {}
+        file_items: dict[str, QTreeWidgetItem] = {}
+        for occurrence in sorted(occurrences, key=lambda o: (o.file_path, o.line, o.column)):
+            file_item = file_items.get(occurrence.file_path)
+            if file_item is None:
+                folder_path = Path(occurrence.file_path).parent
+                folder_item = folder_items.get(folder_path)
+                if folder_item is None:
+                    folder_name = "(game folder)" if folder_path == Path(game_path) else folder_path.name
+                    folder_item = QTreeWidgetItem(self._references_tree, [folder_name])
+                    folder_items[folder_path] = folder_item
+                file_item = QTreeWidgetItem(folder_item, [Path(occurrence.file_path).name])
+                file_items[occurrence.file_path] = file_item
+                file_lines = self._try_read_lines(occurrence.file_path)
+
+            line_text = file_lines[occurrence.line].strip() if occurrence.line < len(file_lines) else ""
+            text = "{}: {}".format(occurrence.line + 1, line_text)
+            if occurrence.is_definition:
+                text += "  (definition)"
+            occurrence_item = QTreeWidgetItem(file_item, [text])
+            occurrence_item.setData(0, _LOCATION_ROLE, (occurrence.file_path, occurrence.line, occurrence.column))
+
+        self._references_tree.expandAll()
+        self.show()
+
+    @staticmethod
+    def _try_read_lines(file_path: str) -> list[str]:
+        try:
+            with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+                return f.read().splitlines()
+        except OSError:
+            return []
+
+    def _handle_item_activated(self, item: QTreeWidgetItem):
+        location = item.data(0, _LOCATION_ROLE)
+        if location is not None:
+            self.open_location_requested.emit(*location)
@@ -0,0 +1,222 @@
+# Dock showing the flow of the game as a tree, from the intro.txt of each case through the labels and scripts it jumps to,
+# along with the labels and scripts that are never reached, the include cycles and the jumps leading nowhere
+# The graph is updated in the background, only the scripts that changed since the previous update are read again
+
+import logging
+import os
+import threading
+from pathlib import Path
+
+from PyQt6.QtWidgets import QWidget, QDockWidget, QTreeWidget, QTreeWidgetItem, QHBoxLayout, QLabel, QPushButton, \
+    QTabWidget
+from PyQt6.QtGui import QIcon
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+
+from data.PyWrightGame import PyWrightGameInfo
+from data.ScriptFiles import list_game_scripts
+from data.ScriptFlowGraph import ScriptFlow, JumpKind
+
+import data.IconThemes as IconThemes
+
+log = logging.getLogger(__name__)
+
+# Role of the tree items holding the (file path, line, index) to jump to
+_LOCATION_ROLE = Qt.ItemDataRole.UserRole
+# Role of the tree items of scripts holding their path, until their children are added when first expanded
+_SCRIPT_ROLE = Qt.ItemDataRole.UserRole + 1
+
+
+class _FlowSignals(QObject):
+    """Brings the flow from the worker thread to the GUI thread, along with its id. The flow is None if the update failed."""
+    flow_found = pyqtSignal(int, object)
+
+
+class ScriptFlowWidget(QDockWidget):
+    # Gives the file path, line and index to open
+    open_location_requested = pyqtSignal(str, int, int)
+    # Asks for the flow to be updated
+    refresh_requested = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+
+        self.setWindowTitle("Script Flow")
+        self.setObjectName("ScriptFlowWidget")
+
+        self._flow_tree = QTreeWidget()
+        self._flow_tree.setHeaderHidden(True)
+        self._flow_tree.itemActivated.connect(self._handle_item_activated)
+        self._flow_tree.itemClicked.connect(self._handle_item_activated)
+        self._flow_tree.itemExpanded.connect(self._handle_item_expanded)
+
+        self._problems_tree = QTreeWidget()
+        self._problems_tree.setHeaderHidden(True)
+        self._problems_tree.itemActivated.connect(self._handle_item_activated)
+        self._problems_tree.itemClicked.connect(self._handle_item_activated)
+
+        self._tab_widget = QTabWidget()
+        self._tab_widget.addTab(self._flow_tree, "Flow")
+        self._tab_widget.addTab(self._problems_tree, "Problems")
+
+        self.setWidget(self._tab_widget)
+        self.setFeatures(QDockWidget.DockWidgetFeature.DockWidgetClosable)
+
+        self._title_label = QLabel("Script Flow")
+
+        refresh_icon_path = IconThemes.icon_path_from_theme(IconThemes.ICON_NAME_REFRESH)
+        self._refresh_button = QPushButton(QIcon(refresh_icon_path), "")
+        self._refresh_button.setFlat(True)
+        self._refresh_button.setToolTip("Update the flow of the scripts")
+        self._refresh_button.clicked.connect(self.refresh_requested)
+        self._refresh_button.setFixedWidth(30)
+
+        hide_icon_path = IconThemes.icon_path_from_theme(IconThemes.ICON_NAME_MINUS)
+        self._hide_button = QPushButton(QIcon(hide_icon_path), "")
+        self._hide_button.setFlat(True)
+        self._hide_button.clicked.connect(self.hide)
+        self._hide_button.setFixedWidth(30)
+
+        self.setTitleBarWidget(self._create_title_bar_widget())
+
+        # Late flows of a previous game or of a previous update are told apart by their id
+        self._update_id = 0
+        self._game_path = Path("")
+        self._flow: ScriptFlow | None = None
+        self._flow_signals = _FlowSignals(self)
+        self._flow_signals.flow_found.connect(self._handle_flow_found)
+
+    def _create_title_bar_widget(self):
+        result = QWidget()
+
+        layout = QHBoxLayout()
+
+        layout.addWidget(self._title_label)
+        layout.addStretch()
+        layout.addWidget(self._refresh_button)
+        layout.addWidget(self._hide_button)
+        layout.setContentsMargins(4, 0, 2, 4)
+
+        result.setLayout(layout)
+        return result
+
+    def start_update(self, game_info: PyWrightGameInfo, open_file_data: dict[str, bytes]):
+        """Updates the flow graph of the game on a worker thread, then shows it.
+            :param game_info: The game to show the flow of
+            :param open_file_data: The contents of the files open in editors by absolute path, read instead of the files
+            :return: None"""
+        self._update_id += 1
+        update_id = self._update_id
+        self._game_path = Path(game_info.game_path)
+        self._title_label.setText("Script Flow (updating...)")
+
+        game_path = game_info.game_path
+        case_names = list(game_info.game_cases)
+
+        def update():
+            # Always told, so that a failed update (such as a file being written) doesn't leave the flow updating
+            flow = None
+            try:
+                game_info.script_flow.update(list_game_scripts(game_path, case_names), open_file_data)
+                flow = game_info.script_flow.get_flow(game_path, case_names)
+            except Exception:
+                log.exception("Could not update the script flow of %s", game_path)
+            finally:
+                self._flow_signals.flow_found.emit(update_id, flow)
+
+        threading.Thread(target=update, name="Script flow", daemon=True).start()
+
+    def _handle_flow_found(self, update_id: int, flow: ScriptFlow | None):
+        if update_id != self._update_id:
+            return
+        # The previous flow stays shown, the next update will replace it
+        if flow is None:
+            self._title_label.setText("Script Flow (update failed)")
+            return
+        self._title_label.setText("Script Flow")
+        if flow is self._flow:
+            return
+        self._flow = flow
+
+        # The same branches are expanded again after the tree is built anew
+        expanded_paths = self._get_expanded_paths(self._flow_tree.invisibleRootItem(), ())
+        self._flow_tree.clear()
+        for case_name, entry_path in sorted(flow.entry_points.items()):
+            case_item = self._add_script_item(self._flow_tree.invisibleRootItem(), entry_path)
+            case_item.setText(0, "{}: {}".format(case_name or "(game folder)", os.path.basename(entry_path)))
+        self._expand_paths(self._flow_tree.invisibleRootItem(), expanded_paths)
+
+        self._problems_tree.clear()
+        for problem in flow.problems:
+            problem_item = QTreeWidgetItem(self._problems_tree, ["{}:{}: {}".format(
+                self._get_file_name(problem.file_path), problem.line + 1, problem.message)])
+            problem_item.setData(0, _LOCATION_ROLE, (problem.file_path, problem.line, problem.column))
+        self._tab_widget.setTabText(1, "Problems ({})".format(len(flow.problems)))
+
+    def _add_script_item(self, parent_item: QTreeWidgetItem, file_path: str) -> QTreeWidgetItem:
+        # Its labels and jumps are only added when expanded, as scripts can jump to each other forever
+        result = QTreeWidgetItem(parent_item, [self._get_file_name(file_path)])
+        result.setData(0, _LOCATION_ROLE, (file_path, 0, 0))
+        result.setData(0, _SCRIPT_ROLE, file_path)
+        result.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator)
+        return result
+
+    def _handle_item_expanded(self, item: QTreeWidgetItem):
+        file_path = item.data(0, _SCRIPT_ROLE)
+        if file_path is None or self._flow is None:
+            return
+        item.setData(0, _SCRIPT_ROLE, None)
+        item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.DontShowIndicatorWhenChildless)
+
+        for segment in self._flow.segments.get(file_path, []):
+            segment_item = item
+            if segment.label is not None:
+                segment_item = QTreeWidgetItem(item, ["label {}{}".format(
+                    segment.label.name, "" if segment.is_reachable else " (never reached)")])
+                segment_item.setData(0, _LOCATION_ROLE, (file_path, segment.label.line, segment.label.column))
+                if not segment.is_reachable:
+                    segment_item.setForeground(0, self.palette().placeholderText())
+            for jump, location in segment.jumps:
+                if jump.kind is not JumpKind.GOTO and location is not None:
+                    jump_item = self._add_script_item(segment_item, location[0])
+                    jump_item.setText(0, "{} {}".format(jump.command, jump.target))
+                else:
+                    jump_item = QTreeWidgetItem(segment_item, ["{} {}{}".format(
+                        jump.command, jump.target, " (not found)" if location is None else "")])
+                jump_item.setData(0, _LOCATION_ROLE, (file_path, jump.line, jump.column))
+
+    def _get_expanded_paths(self, item: QTreeWidgetItem, path: tuple[str, ...]) -> list[tuple[str, ...]]:
+        result = []
+        for index in range(item.childCount()):
+            child_item = item.child(index)
+            if child_item.isExpanded():
+                child_path = path + (child_item.text(0),)
+                result.append(child_path)
+                result += self._get_expanded_paths(child_item, child_path)
+        return result
+
+    def _expand_paths(self, item: QTreeWidgetItem, paths: list[tuple[str, ...]]):
+        for index in range(item.childCount()):
+            child_item = item.child(index)
+            child_paths = [path[1:] for path in paths if path[0] == child_item.text(0)]
+            if child_paths:
+                child_item.setExpanded(True)
+                self._expand_paths(child_item, [path for path in child_paths if path])
+
+    def _get_file_name(self, file_path: str) -> str:
+        try:
+            return Path(file_path).relative_to(self._game_path).as_posix()
+        except ValueError:
+            return file_path
+
+    def clear(self):
+        self._update_id += 1
+        self._flow = None
+        self._flow_tree.clear()
+        self._problems_tree.clear()
+        self._tab_widget.setTabText(1, "Problems")
+        self._title_label.setText("Script Flow")
+
+    def _handle_item_activated(self, item: QTreeWidgetItem):
+        location = item.data(0, _LOCATION_ROLE)
+        if location is not None:
+            self.open_location_requested.emit(*location)